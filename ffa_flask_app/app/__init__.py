@@ -13,9 +13,15 @@ migrate = Migrate()
 
 def create_app():
     app = Flask(__name__)
-    CORS(app)
+    CORS(app, expose_headers=["Link", "X-Next-After-Id"])  # Pagination headers
     app.config.from_object(Config)
 
+    # Client addresses from the reverse proxies' X-Forwarded-* headers (see PROXY_FIX_HOPS)
+    if app.config["PROXY_FIX_HOPS"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config["PROXY_FIX_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
     # Clear the log file each time the app starts (only in development mode)
     if app.config['ENV'] == 'development' and app.config.get("LOG_FILE"):
         with open(app.config["LOG_FILE"], "w"):
@@ -28,6 +34,19 @@ def create_app():
     # Set up logging
     configure_logging(app)
 
+    # Trained prediction models, shared by scripts and routes
+    from .model_registry import ModelRegistry
+    app.extensions["model_registry"] = ModelRegistry(app.config["MODEL_REGISTRY_DIR"])
+
+    # Cached responses of the read endpoints
+    from .response_cache import create_response_cache
+    app.extensions["response_cache"] = create_response_cache(app.config)
+
+    # Request latency and SQL statement counts, for /metrics and the batch scripts
+    from .metrics import MetricsRegistry, init_request_metrics
+    app.extensions["metrics"] = MetricsRegistry()
+    init_request_metrics(app)
+
     # Import models and register routes
     from .models import Player  # Direct relative import
 
@@ -0,0 +1,230 @@
+# ffa_flask_app/app/api_client.py
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from app.raw_cache import RawResponseCache
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://v1.american-football.api-sports.io"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ApiError(Exception):
+    """Raised when a request still fails after all retries."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code} - {message}")
+        self.status_code = status_code
+
+
+def next_quota_reset(now=None):
+    """api-sports daily quotas reset at midnight UTC."""
+    now = now or datetime.now(timezone.utc)
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+
+
+class QuotaExhausted(ApiError):
+    """The day's request quota is used up; nothing more can be fetched before reset_at (UTC)."""
+
+    def __init__(self, reset_at, message="daily request quota used up"):
+        super().__init__(429, f"{message}, resets at {reset_at:%Y-%m-%d %H:%M} UTC")
+        self.reset_at = reset_at
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Tokens refill continuously at requests_per_minute / 60 per second,
+    up to `capacity`. The default capacity of 1 spaces calls evenly across the minute, which keeps
+    fixed-window quotas (e.g. 10 per minute) from being exceeded by an initial burst.
+    """
+
+    def __init__(self, requests_per_minute, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            self.sleep(wait_time)
+
+
+class ApiSportsClient:
+    """
+    Client for the api-sports american-football API.
+    - Every request (including retries) takes a token from one shared TokenBucket.
+    - Each worker thread keeps its own requests.Session so connections are reused.
+    - 429/5xx responses and api-sports "rateLimit" errors are retried with exponential backoff.
+    - fetch_many keeps at most `max_in_flight` requests outstanding and yields responses as they
+      complete, so the caller can write to the database while later requests are still running.
+    - With a RawResponseCache, successful responses are stored on disk and served from there on
+      later calls. In replay mode the network is never used and a cache miss is an error.
+    - With a QuotaTracker (app/api_quota.py), every request is counted against the daily and
+      per-minute quota shared by all processes, and QuotaExhausted is raised once the day's is used.
+    - sleep (used between retries and by the default rate limiter) can be replaced in tests.
+    """
+
+    def __init__(self, api_key, base_url=API_URL, requests_per_minute=10, max_in_flight=4,
+                 max_retries=5, backoff=2.0, timeout=30, rate_limiter=None, cache=None, replay=False, quota=None,
+                 sleep=time.sleep):
+        if replay and cache is None:
+            raise ValueError("replay mode needs a response cache")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.sleep = sleep
+        self.rate_limiter = rate_limiter or TokenBucket(requests_per_minute, sleep=sleep)
+        self.cache = cache
+        self.replay = replay
+        self.quota = quota
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """Build a client from a Flask config mapping (see app/config.py)."""
+        cache_dir = config.get("RAW_RESPONSE_CACHE_DIR")
+        kwargs.setdefault("cache", RawResponseCache(cache_dir) if cache_dir else None)
+        kwargs.setdefault("replay", config.get("API_SPORTS_REPLAY", False))
+        return cls(
+            config.get("API_SPORTS_KEY"),
+            base_url=config.get("API_SPORTS_URL", API_URL),
+            requests_per_minute=config.get("API_SPORTS_REQUESTS_PER_MINUTE", 10),
+            max_in_flight=config.get("API_SPORTS_MAX_IN_FLIGHT", 4),
+            **kwargs
+        )
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'x-rapidapi-host': "v1.american-football.api-sports.io",
+                'x-rapidapi-key': self.api_key or "",
+            })
+            self._local.session = session
+        return session
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt)
+
+    def get(self, endpoint, params=None, refresh=False):
+        """
+        GET an endpoint and return the decoded json, retrying transient failures.
+        refresh=True skips the cache lookup (the fresh response is still stored).
+        """
+        if self.cache is not None and (self.replay or not refresh):
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+            if self.replay:
+                raise ApiError(None, f"{endpoint} {params} is not in the response cache (replay mode)")
+
+        url = self.base_url + endpoint
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if self.quota is not None:
+                self.quota.acquire()  # Raises QuotaExhausted, which is not retried
+            self.rate_limiter.acquire()
+            response = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                last_error = ApiError(None, str(e))
+            else:
+                if self.quota is not None:
+                    self.quota.record(response.headers)
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        # A truncated body or a proxy's error page: transient, retried like a 5xx
+                        data = None
+                        last_error = ApiError(response.status_code, f"invalid json: {response.text[:200]}")
+                    errors = data.get("errors") if isinstance(data, dict) else None
+                    # api-sports reports quota errors with a 200 status
+                    if isinstance(errors, dict) and "requests" in errors:
+                        if self.quota is not None:
+                            self.quota.exhaust()
+                        raise QuotaExhausted(next_quota_reset(), errors["requests"])
+                    if isinstance(errors, dict) and "rateLimit" in errors:
+                        last_error = ApiError(429, errors["rateLimit"])
+                    elif data is not None:
+                        if self.cache is not None:
+                            self.cache.put(endpoint, params, data)
+                        return data
+                elif response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = ApiError(response.status_code, response.text)
+                else:
+                    raise ApiError(response.status_code, response.text)
+
+            if attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response)
+                logger.warning(f"Request to {endpoint} {params} failed ({last_error}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+
+        raise last_error
+
+    def fetch_many(self, endpoint, params_list, refresh=False):
+        """
+        Fetch `endpoint` once per params dict using a thread pool.
+        Yields (params, data, error) as each request completes; error is None on success.
+        """
+        params_iter = iter(params_list)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight = {}
+
+            def submit_next():
+                params = next(params_iter, None)
+                if params is None:
+                    return False
+                in_flight[executor.submit(self.get, endpoint, params, refresh)] = params
+                return True
+
+            for _ in range(self.max_in_flight):
+                if not submit_next():
+                    break
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    params = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        yield params, future.result(), None
+                    except ApiError as e:
+                        yield params, None, e
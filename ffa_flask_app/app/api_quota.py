@@ -0,0 +1,102 @@
+# ffa_flask_app/app/api_quota.py
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import case, or_, update
+
+from app import db
+from app.api_client import QuotaExhausted, next_quota_reset
+from app.models import ApiUsage, insert_ignore
+
+
+class QuotaTracker:
+    """
+    The api-sports daily and per-minute quota, counted in the api_usage table so every process
+    using the key (and a backfill resumed tomorrow) sees the same usage. acquire() reserves one
+    request before it is sent with a single conditional UPDATE, which also makes it safe across
+    processes: it waits for the next minute when this minute's share is used and raises
+    QuotaExhausted when the day's is. record() catches up with the usage the API reports.
+    Safe to call from the client's worker threads, each call runs in its own app context.
+    """
+
+    def __init__(self, app, daily_limit, per_minute_limit, now=None, sleep=time.sleep):
+        self.app = app
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self.now = now or (lambda: datetime.now(timezone.utc))
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_app(cls, app, **kwargs):
+        return cls(app, app.config["API_SPORTS_DAILY_LIMIT"], app.config["API_SPORTS_REQUESTS_PER_MINUTE"], **kwargs)
+
+    def _ensure_day(self, day, now):
+        insert_ignore(ApiUsage, [{'day': day, 'requests': 0, 'minute_requests': 0, 'updated_at': now}])
+
+    def acquire(self):
+        """Count one request against the quota, waiting for the next minute if needed."""
+        while True:
+            now = self.now()
+            day, minute = now.date(), now.replace(second=0, microsecond=0)
+            with self._lock, self.app.app_context():
+                self._ensure_day(day, now)
+                same_minute = ApiUsage.minute_started_at == minute
+                result = db.session.execute(
+                    update(ApiUsage)
+                    .where(ApiUsage.day == day,
+                           ApiUsage.requests < self.daily_limit,
+                           or_(ApiUsage.minute_started_at.is_(None), ~same_minute,
+                               ApiUsage.minute_requests < self.per_minute_limit))
+                    .values(requests=ApiUsage.requests + 1,
+                            minute_requests=case((same_minute, ApiUsage.minute_requests + 1), else_=1),
+                            minute_started_at=minute, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                if result.rowcount:
+                    return
+                if db.session.get(ApiUsage, day).requests >= self.daily_limit:
+                    raise QuotaExhausted(next_quota_reset(now))
+            # This minute's share is used (maybe by another process), try again when the next one starts
+            self.sleep(60 - now.second - now.microsecond / 1e6 + 0.1)
+
+    def record(self, headers):
+        """Sync today's count with the API's x-ratelimit-requests-* headers (other clients may share the key)."""
+        remaining = headers.get("x-ratelimit-requests-remaining")
+        if remaining is None:
+            return
+        remaining = int(remaining)
+        limit = int(headers.get("x-ratelimit-requests-limit") or self.daily_limit)
+        used = limit - remaining
+        now = self.now()
+        with self._lock, self.app.app_context():
+            db.session.execute(
+                update(ApiUsage)
+                .where(ApiUsage.day == now.date())
+                .values(requests=case((ApiUsage.requests < used, used), else_=ApiUsage.requests),
+                        daily_limit=limit, remaining=remaining, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+    def exhaust(self):
+        """Mark today's quota as used up (the API said so)."""
+        now = self.now()
+        with self._lock, self.app.app_context():
+            self._ensure_day(now.date(), now)
+            db.session.execute(
+                update(ApiUsage).where(ApiUsage.day == now.date())
+                .values(requests=self.daily_limit, remaining=0, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+
+    def remaining_today(self):
+        """Requests still available before the daily reset."""
+        now = self.now()
+        with self.app.app_context():
+            usage = db.session.get(ApiUsage, now.date())
+            return max(0, self.daily_limit - (usage.requests if usage else 0))
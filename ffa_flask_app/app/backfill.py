@@ -0,0 +1,116 @@
+# ffa_flask_app/app/backfill.py
+
+import math
+from collections import namedtuple
+from datetime import date, timedelta
+
+from app import db
+from app.api_client import next_quota_reset
+from app.models import Game
+from app.projections import season_of
+
+GAMES_ENDPOINT = "/games"
+BOX_SCORE_ENDPOINT = "/games/statistics/players"
+NFL_LEAGUE_ID = 1
+SEASON_GAMES_ESTIMATE = 285  # Regular season and playoffs, for seasons whose games aren't known yet
+
+BackfillPlan = namedtuple('BackfillPlan', [
+    'season_calls',       # /games params still to fetch, one per season
+    'box_score_calls',    # Unprocessed games whose box score isn't cached
+    'estimated_calls',    # Box scores of seasons whose games aren't known yet
+    'cached_calls',       # Requests the raw response cache already answers (free)
+    'schedule',           # [(UTC day, calls)] within the daily quota
+    'finishes_at',        # Estimated UTC time of the last call
+])
+
+
+def season_games_params(season, league_id=NFL_LEAGUE_ID):
+    """
+    One /games request for every game of a league season. Asking per team returns every game
+    twice (once for each team) and takes 32 requests instead of one.
+    """
+    return {"league": str(league_id), "season": str(season), "timezone": "America/New_York"}
+
+
+def unprocessed_games_by_season(seasons):
+    """season -> ids of the played, unprocessed games of the requested seasons."""
+    first, last = min(seasons), max(seasons)
+    rows = db.session.query(Game.id, Game.date).filter(
+        Game.stats_processed.is_(False), Game.home_team_score.isnot(None),
+        Game.date >= date(first, 3, 1), Game.date < date(last + 1, 3, 1),
+    ).all()
+    games = {season: [] for season in seasons}
+    for game_id, game_date in rows:
+        if season_of(game_date) in games:
+            games[season_of(game_date)].append(game_id)
+    return games
+
+
+def known_seasons(seasons):
+    """Seasons with at least one game in the database."""
+    first, last = min(seasons), max(seasons)
+    dates = db.session.query(Game.date).filter(Game.date >= date(first, 3, 1), Game.date < date(last + 1, 3, 1))
+    return {season_of(game_date) for (game_date,) in dates.distinct()} & set(seasons)
+
+
+def schedule_calls(total, remaining_today, daily_limit, per_minute, now):
+    """
+    Spread `total` calls over days: what's left of today's quota first, then a full quota per
+    day from the next reset on, each day's calls paced at `per_minute`.
+    Returns ([(day, calls)], estimated finish time).
+    """
+    schedule, finishes_at = [], now
+    day_start, available = now, remaining_today
+    while total > 0:
+        calls = min(total, available)
+        if calls:
+            schedule.append((day_start.date(), calls))
+            finishes_at = day_start + timedelta(minutes=math.ceil(calls / per_minute))
+            total -= calls
+        day_start = next_quota_reset(day_start)
+        available = daily_limit
+    return schedule, finishes_at
+
+
+def plan_backfill(seasons, cache, remaining_today, daily_limit, per_minute, now, league_id=NFL_LEAGUE_ID):
+    """
+    The API calls a backfill of `seasons` still needs: one /games call per season whose game list
+    isn't cached, and one box score per unprocessed game that isn't cached (estimated for seasons
+    with no games in the database yet). Cached responses cost nothing, so the plan shrinks as the
+    backfill progresses and can be recomputed at any time.
+    """
+    season_calls, cached = [], 0
+    for season in seasons:
+        params = season_games_params(season, league_id)
+        if cache is not None and cache.contains(GAMES_ENDPOINT, params):
+            cached += 1
+        else:
+            season_calls.append(params)
+
+    box_score_calls = []
+    for season, game_ids in unprocessed_games_by_season(seasons).items():
+        for game_id in game_ids:
+            if cache is not None and cache.contains(BOX_SCORE_ENDPOINT, {"id": game_id}):
+                cached += 1
+            else:
+                box_score_calls.append(game_id)
+
+    fetched = {int(params["season"]) for params in season_calls}
+    estimated = SEASON_GAMES_ESTIMATE * len(fetched - known_seasons(seasons))
+
+    schedule, finishes_at = schedule_calls(len(season_calls) + len(box_score_calls) + estimated,
+                                           remaining_today, daily_limit, per_minute, now)
+    return BackfillPlan(season_calls, box_score_calls, estimated, cached, schedule, finishes_at)
+
+
+def describe_plan(plan):
+    lines = [
+        f"{len(plan.season_calls)} season game lists, {len(plan.box_score_calls)} box scores "
+        f"and ~{plan.estimated_calls} box scores of seasons not fetched yet "
+        f"({plan.cached_calls} requests already cached)"
+    ]
+    for day, calls in plan.schedule:
+        lines.append(f"  {day}: {calls} calls")
+    if plan.schedule:
+        lines.append(f"Estimated to finish at {plan.finishes_at:%Y-%m-%d %H:%M} UTC")
+    return "\n".join(lines)
@@ -0,0 +1,126 @@
+# ffa_flask_app/app/data_version.py
+
+from datetime import datetime, timezone
+
+from flask import g, request, make_response
+from sqlalchemy import select, update
+
+from app import db
+from app.models import DataVersion, insert_ignore
+
+DATA_VERSION_ID = 1  # The data version's row
+# PlayerTeam's own counters, read by the roster index (app/roster_index.py)
+ROSTER_SPELLS_ID = 2    # Bumped by every write adding spells
+ROSTER_REWRITES_ID = 3  # Bumped by writes closing, moving or deleting spells
+
+
+def _bump_counter(counter_id):
+    now = datetime.now(timezone.utc)
+    result = db.session.execute(
+        update(DataVersion)
+        .where(DataVersion.id == counter_id)
+        .values(version=DataVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        insert_ignore(DataVersion, [{'id': counter_id, 'version': 1, 'updated_at': now}])
+
+
+def bump_data_version():
+    """
+    Increment the data version inside the caller's transaction (nothing is committed),
+    so readers see the new version exactly when the new data becomes visible.
+    """
+    _bump_counter(DATA_VERSION_ID)
+
+
+def bump_roster_version(rewrite=False):
+    """
+    Mark PlayerTeam as changed inside the caller's transaction, before its spells are written:
+    the counter's row lock makes spell writers take turns, so spell ids become visible in
+    increasing order and the roster index only loads the ids past the ones it has. rewrite=True
+    when spells are closed, moved or deleted, which makes the index reload every spell.
+    """
+    _bump_counter(ROSTER_SPELLS_ID)
+    if rewrite:
+        _bump_counter(ROSTER_REWRITES_ID)
+    # The roster index checks the counters once per app context; look again after this write
+    g.pop('roster_index_checked', None)
+
+
+def get_data_version():
+    """Current (version, updated_at) with updated_at in UTC to the second; (0, None) before any import."""
+    row = db.session.execute(
+        select(DataVersion.version, DataVersion.updated_at).where(DataVersion.id == DATA_VERSION_ID)
+    ).first()
+    if row is None:
+        return 0, None
+
+    updated_at = row.updated_at
+    if updated_at.tzinfo is None:
+        # SQLite hands back naive datetimes, they were stored in UTC
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return row.version, updated_at.replace(microsecond=0)
+
+
+def get_roster_version():
+    """(spells, rewrites) counters of PlayerTeam in one read, 0 before the first write."""
+    versions = dict(db.session.execute(
+        select(DataVersion.id, DataVersion.version)
+        .where(DataVersion.id.in_([ROSTER_SPELLS_ID, ROSTER_REWRITES_ID]))
+    ).all())
+    return versions.get(ROSTER_SPELLS_ID, 0), versions.get(ROSTER_REWRITES_ID, 0)
+
+
+def data_version_etag(version, representation=None):
+    if representation is None:
+        return f"data-v{version}"
+    return f"data-v{version}-{representation}"
+
+
+def _add_validators(response, version, updated_at, representation=None):
+    response.set_etag(data_version_etag(version, representation))
+    if representation is not None:
+        response.vary.add('Accept')
+    if updated_at is not None:
+        response.last_modified = updated_at
+    # Browsers keep the payload but revalidate it on every navigation
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def add_conditional_get(blueprint, representation=None):
+    """
+    Answer GETs on every route of a blueprint with 304 Not Modified when the client already
+    has the current data version (If-None-Match, or If-Modified-Since without an ETag). Only the
+    one-row counter is read in that case; the view never runs. Successful responses carry
+    ETag and Last-Modified headers derived from the data version.
+
+    Blueprints that negotiate their format on Accept pass representation(), naming the format
+    the current request gets: it goes into the ETag, and responses carry Vary: Accept.
+    """
+    @blueprint.before_request
+    def answer_not_modified():
+        if request.method not in ('GET', 'HEAD'):
+            return None
+
+        version, updated_at = get_data_version()
+        negotiated = representation() if representation else None
+        g.data_version = (version, updated_at, negotiated)
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(data_version_etag(version, negotiated))
+        else:
+            not_modified = (updated_at is not None and request.if_modified_since is not None
+                            and updated_at <= request.if_modified_since)
+
+        if not_modified:
+            return _add_validators(make_response('', 304), version, updated_at, negotiated)
+        return None
+
+    @blueprint.after_request
+    def add_data_version_headers(response):
+        if response.status_code == 200 and 'data_version' in g:
+            _add_validators(response, *g.data_version)
+        return response
+
+    return blueprint
@@ -0,0 +1,182 @@
+# ffa_flask_app/app/defense_stats.py
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.models import Game, DefenseVsPosition, Player, PlayerGame, insert_ignore
+from app.features import (
+    STATS, DEFENSE_AVG_COLUMNS, POS_VS_TEAM_SORT_KEYS, ROLLING_WINDOW,
+    load_position_games
+)
+from app.roster_index import get_roster_index
+
+
+def top_opponent_rows(rows_df, position):
+    """
+    The best opposing performance of a position against each team in each game.
+    rows_df holds one stat line per player with player_id, team_id, game_id, date,
+    home_team_id and away_team_id; players whose team isn't in the game are ignored.
+    """
+    rows_df = rows_df[
+        (rows_df['team_id'] == rows_df['home_team_id']) | (rows_df['team_id'] == rows_df['away_team_id'])
+    ]
+    rows_df = rows_df.assign(**{stat: rows_df[stat].fillna(0) for stat in STATS})
+    # A player on the away team played against the home defense and vice versa
+    rows_df = rows_df.assign(defense_team_id=rows_df['home_team_id'].where(
+        rows_df['team_id'] == rows_df['away_team_id'], rows_df['away_team_id']
+    ))
+
+    sort_keys = POS_VS_TEAM_SORT_KEYS[position]
+    return (
+        rows_df
+        .sort_values(['game_id', 'defense_team_id', *sort_keys],
+                     ascending=[True, True] + [False] * len(sort_keys), kind='stable')
+        .drop_duplicates(subset=['game_id', 'defense_team_id'], keep='first')
+    )
+
+
+def _defense_rows(top_df, position):
+    return [
+        {
+            'team_id': int(row['defense_team_id']),
+            'game_id': int(row['game_id']),
+            'position': position,
+            'date': row['date'],
+            'player_id': int(row['player_id']),
+            **{stat: int(row[stat]) for stat in STATS},
+        }
+        for row in top_df.to_dict(orient='records')
+    ]
+
+
+def defense_averages_frame(resolved_games_df, position):
+    """
+    The DefenseVsPosition rows of a position computed in memory from stat lines with resolved
+    teams: the top opposing performance per (game, defense) plus the defense's rolling averages
+    (avg_<stat>, NaN until ROLLING_WINDOW games), sorted by defense and date.
+    """
+    top_df = top_opponent_rows(resolved_games_df, position).sort_values(['defense_team_id', 'date'], kind='stable')
+    averages = (
+        top_df.groupby('defense_team_id')[STATS]
+        .rolling(window=ROLLING_WINDOW).mean()
+        .reset_index(level=0, drop=True)
+    )
+    return top_df.join(averages.loc[top_df.index].add_prefix('avg_'))
+
+
+def refresh_rolling_averages(team_id, position, from_date=None):
+    """
+    Recompute the stored rolling averages of one (team, position) from `from_date` onward.
+    Only the ROLLING_WINDOW - 1 rows before from_date are read (they feed the window), so a
+    late-arriving older game is handled too; the averages are written in one bulk UPDATE.
+    """
+    columns = [DefenseVsPosition.id, DefenseVsPosition.date, *[getattr(DefenseVsPosition, stat) for stat in STATS]]
+    query = db.session.query(*columns).filter(
+        DefenseVsPosition.team_id == team_id, DefenseVsPosition.position == position
+    )
+
+    earlier = []
+    if from_date is not None:
+        earlier = (query.filter(DefenseVsPosition.date < from_date)
+                   .order_by(DefenseVsPosition.date.desc(), DefenseVsPosition.game_id.desc())
+                   .limit(ROLLING_WINDOW - 1)
+                   .all())[::-1]
+        query = query.filter(DefenseVsPosition.date >= from_date)
+    later = query.order_by(DefenseVsPosition.date.asc(), DefenseVsPosition.game_id.asc()).all()
+    if not later:
+        return 0
+
+    # Fewer than ROLLING_WINDOW - 1 earlier rows means they are all there is, so the
+    # averages stay NULL until the window fills exactly as they would over the whole history
+    rows = pd.DataFrame(earlier + later, columns=['id', 'date', *STATS])
+    averages = rows[STATS].fillna(0).rolling(window=ROLLING_WINDOW).mean().iloc[len(earlier):]
+    averages = averages.add_prefix('avg_').assign(id=rows['id'].iloc[len(earlier):])
+    params = averages.astype(object).where(averages.notna(), None).to_dict(orient='records')
+    db.session.execute(update(DefenseVsPosition), params)
+    return len(params)
+
+
+def record_game_defense(game_id, player_rows):
+    """
+    Add one game's DefenseVsPosition rows while its box score is being ingested, then update the
+    rolling averages of both teams. player_rows are dicts with player_id, team_id, position and STATS
+    (the team comes straight from the box score). Does not commit.
+    """
+    game = db.session.get(Game, game_id)
+    if not game or not game.date or not player_rows:
+        return 0
+
+    rows_df = pd.DataFrame(player_rows).assign(
+        game_id=game.id, date=game.date, home_team_id=game.home_team_id, away_team_id=game.away_team_id
+    )
+
+    added = 0
+    for position in POS_VS_TEAM_SORT_KEYS:
+        position_rows = rows_df[rows_df['position'] == position]
+        if position_rows.empty:
+            continue
+
+        new_rows = _defense_rows(top_opponent_rows(position_rows, position), position)
+        insert_ignore(DefenseVsPosition, new_rows)
+        added += len(new_rows)
+
+        for team_id in {row['team_id'] for row in new_rows}:
+            refresh_rolling_averages(team_id, position, from_date=game.date)
+
+    return added
+
+
+def resolve_box_score_teams(games_df, position, roster_index):
+    """
+    Attach to each stat line of a position (load_position_games) its team: the box score's
+    (PlayerGame.team_id, what ingest uses), or for rows ingested before it was stored, the
+    player's PlayerTeam spell on the game's date. Rows with neither are dropped.
+    """
+    games_df = games_df[games_df['date'].notna()]
+    box_teams = dict(
+        db.session.query(PlayerGame.id, PlayerGame.team_id)
+        .join(Player, PlayerGame.player_id == Player.id)
+        .filter(Player.position == position, PlayerGame.team_id.isnot(None))
+        .all()
+    )
+    team = games_df['id'].map(box_teams).astype('float')
+    missing = team.isna()
+    if missing.any():
+        spell_teams = roster_index.teams_of(games_df.loc[missing, 'player_id'].tolist(),
+                                            games_df.loc[missing, 'date'].tolist())
+        team[missing] = pd.Series(spell_teams, index=team[missing].index, dtype='float')
+    resolved = games_df.assign(team_id=team)
+    return resolved.dropna(subset=['team_id']).astype({'team_id': int})
+
+
+def rebuild_defense_vs_position(positions=None):
+    """
+    Rebuild the whole table from PlayerGame history. Players' teams come from the stored box-score
+    team like during ingest, falling back to PlayerTeam spells (through the roster index) for rows
+    that don't have one. Use after schema changes or manual fixes.
+    """
+    positions = positions or list(POS_VS_TEAM_SORT_KEYS)
+    DefenseVsPosition.query.filter(DefenseVsPosition.position.in_(positions)).delete(synchronize_session=False)
+
+    roster_index = get_roster_index()
+    total = 0
+    for position in positions:
+        resolved = resolve_box_score_teams(load_position_games(position), position, roster_index)
+        if resolved.empty:
+            continue
+
+        top_df = defense_averages_frame(resolved, position)
+
+        rows = _defense_rows(top_df, position)
+        for row, avg_values in zip(rows, top_df[DEFENSE_AVG_COLUMNS].to_dict(orient='records')):
+            for column, value in avg_values.items():
+                row[column] = None if pd.isna(value) else float(value)
+
+        insert_ignore(DefenseVsPosition, rows)
+        total += len(rows)
+        current_app.logger.info(f"Rebuilt {len(rows)} DefenseVsPosition rows for {position}")
+
+    db.session.commit()
+    return total
@@ -0,0 +1,266 @@
+# ffa_flask_app/app/features.py
+
+import pandas as pd
+
+from app import db
+from app.models import Player, PlayerGame, Game, DefenseVsPosition, PlayerRollingStat
+from app.roster_index import get_roster_index
+
+# Stats used both as rolling-average features and as training targets
+STATS = [
+    'rush_attempts', 'rush_yards', 'rush_tds', 'targets',
+    'receptions', 'rec_yards', 'rec_tds',
+    'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int'
+]
+
+# Rolling defensive averages stored on DefenseVsPosition
+DEFENSE_AVG_COLUMNS = [f"avg_{stat}" for stat in STATS]
+
+# How the top opposing performer of a position in a game is picked
+POS_VS_TEAM_SORT_KEYS = {
+    "QB": ['pass_yards', 'pass_attempts'],
+    "RB": ['rush_yards', 'rush_attempts'],
+    "WR": ['rec_yards', 'receptions'],
+}
+
+ROLLING_WINDOW = 8
+
+# Windows precomputed on PlayerRollingStat (avg3_<stat>, avg8_<stat>)
+SNAPSHOT_WINDOWS = (3, 8)
+
+
+def load_position_games(position, game_ids=None, player_ids=None):
+    """
+    Bulk load every PlayerGame (with its Game) for a position in one query,
+    regardless of how many games are in the database. Optionally only some games' or players'.
+    """
+    stat_columns = [getattr(PlayerGame, stat) for stat in STATS]
+    player_game_rows = (
+        db.session.query(
+            PlayerGame.id,
+            PlayerGame.player_id,
+            PlayerGame.game_id,
+            Game.date,
+            Game.home_team_id,
+            Game.away_team_id,
+            *stat_columns
+        )
+        .join(Game, PlayerGame.game_id == Game.id)
+        .join(Player, PlayerGame.player_id == Player.id)
+        .filter(Player.position == position)
+    )
+    if game_ids is not None:
+        player_game_rows = player_game_rows.filter(PlayerGame.game_id.in_(game_ids))
+    if player_ids is not None:
+        player_game_rows = player_game_rows.filter(PlayerGame.player_id.in_(player_ids))
+    return pd.DataFrame(
+        player_game_rows.all(),
+        columns=['id', 'player_id', 'game_id', 'date', 'home_team_id', 'away_team_id', *STATS]
+    )
+
+
+def load_defense_frame(position, team_ids=None):
+    """
+    Every team's (or some teams') rolling averages allowed to a position, one row per game (see app/defense_stats.py).
+    Columns: defense_team_id, game_id, date, defense_<stat>.
+    """
+    rows = (
+        db.session.query(
+            DefenseVsPosition.team_id,
+            DefenseVsPosition.game_id,
+            DefenseVsPosition.date,
+            *[getattr(DefenseVsPosition, column) for column in DEFENSE_AVG_COLUMNS]
+        )
+        .filter(DefenseVsPosition.position == position)
+    )
+    if team_ids is not None:
+        rows = rows.filter(DefenseVsPosition.team_id.in_(team_ids))
+    return pd.DataFrame(
+        rows.all(),
+        columns=['defense_team_id', 'game_id', 'date', *[f"defense_{stat}" for stat in STATS]]
+    )
+
+
+def load_player_rolling_frame(position, window=ROLLING_WINDOW, player_ids=None):
+    """
+    Every player's (or some players') stored rolling averages after each game (see app/rolling_stats.py).
+    Columns: player_id, date, player_<stat>.
+    """
+    if window not in SNAPSHOT_WINDOWS:
+        raise ValueError(f"No stored snapshots for a {window}-game window")
+
+    rows = (
+        db.session.query(
+            PlayerRollingStat.player_id,
+            PlayerRollingStat.date,
+            *[getattr(PlayerRollingStat, f"avg{window}_{stat}") for stat in STATS]
+        )
+        .join(Player, PlayerRollingStat.player_id == Player.id)
+        .filter(Player.position == position)
+    )
+    if player_ids is not None:
+        rows = rows.filter(PlayerRollingStat.player_id.in_(player_ids))
+    return pd.DataFrame(rows.all(), columns=['player_id', 'date', *[f"player_{stat}" for stat in STATS]])
+
+
+def select_target_rows(player_games_df, position):
+    """Top two performances of the position in every game (mirrors load_historical_data)."""
+    if position == "QB":
+        metric = player_games_df['pass_yards']
+    elif position in ["RB", "WR"]:
+        metric = player_games_df['rush_yards'] + player_games_df['rec_yards']
+    else:
+        metric = pd.Series(0, index=player_games_df.index)
+
+    ranked = player_games_df.assign(total_yards=metric).dropna(subset=['total_yards'])
+    ranked = ranked.sort_values(['game_id', 'total_yards'], ascending=[True, False], kind='stable')
+    ranked['rank'] = ranked.groupby('game_id').cumcount() + 1
+    return ranked[ranked['rank'] <= 2]
+
+
+def resolve_teams_on_date(rows_df, roster_index):
+    """Attach the team each player was on at the date of the game (drops rows with no spell)."""
+    rows_df = rows_df[rows_df['date'].notna()]
+    teams = roster_index.teams_of(rows_df['player_id'].tolist(), rows_df['date'].tolist())
+    resolved = rows_df.assign(team_id=pd.Series(teams, index=rows_df.index, dtype='float'))
+    return resolved.dropna(subset=['team_id']).astype({'team_id': int})
+
+
+def _merge_asof_before(candidates_df, history_df, left_by, right_by):
+    """For every candidate, pick the history row of its group with the latest date strictly before it."""
+    history_df = history_df.dropna(subset=['date']).assign(date=lambda df: pd.to_datetime(df['date']))
+    history_df = history_df.sort_values('date', kind='stable')
+    candidates_df = candidates_df.assign(_asof_date=pd.to_datetime(candidates_df['date']))
+    candidates_df = candidates_df.sort_values('_asof_date', kind='stable')
+
+    merged = pd.merge_asof(
+        candidates_df,
+        history_df,
+        left_on='_asof_date',
+        right_on='date',
+        left_by=left_by,
+        right_by=right_by,
+        allow_exact_matches=False,
+        suffixes=('', '_history')
+    )
+    return merged.drop(columns=['_asof_date', 'date_history'], errors='ignore')
+
+
+def trailing_player_averages(player_games_df, window=ROLLING_WINDOW):
+    """
+    Each player's average over their last `window` games, after every game they played,
+    computed from raw stat lines (same shape as load_player_rolling_frame).
+    """
+    ordered = player_games_df.sort_values(['player_id', 'date'], kind='stable')
+    history = ordered.groupby('player_id')[STATS].rolling(window=window).mean()
+    history = history.reset_index(level=0, drop=True).add_prefix('player_')
+    history['player_id'] = ordered['player_id']
+    history['date'] = ordered['date']
+    return history
+
+
+def compute_asof_features(player_history_df, candidates_df, position, defense_df):
+    """
+    Player and defense rolling averages "as of" arbitrary (player, game) rows, including games
+    that have not been played yet: the player's averages after their last game and the opponent's
+    DefenseVsPosition averages after its last game, both strictly before the candidate's date.
+
+    player_history_df comes from load_player_rolling_frame or trailing_player_averages.
+    candidates_df needs player_id, opponent_team_id and date columns; every other column is kept.
+    """
+    if position not in POS_VS_TEAM_SORT_KEYS:
+        raise ValueError(f"Unsupported position: {position}. Supported positions are QB, RB, WR.")
+
+    defense_history = defense_df.drop(columns=['game_id'])
+
+    features = _merge_asof_before(candidates_df, player_history_df, 'player_id', 'player_id')
+    features = _merge_asof_before(features, defense_history, 'opponent_team_id', 'defense_team_id')
+    return features.drop(columns=['defense_team_id']).reset_index(drop=True)
+
+
+def compute_training_features(player_games_df, roster_index, position, defense_df,
+                              player_history_df=None, window=ROLLING_WINDOW):
+    """
+    Build the training dataset from bulk-loaded frames in one pass:
+    the top performances of every game, the player's point-in-time rolling averages
+    and the opponent's point-in-time rolling averages against the position.
+    Player averages are computed from player_games_df unless player_history_df is given;
+    players' teams come from roster_index (a RosterIndex).
+    """
+    if player_history_df is None:
+        player_history_df = trailing_player_averages(player_games_df, window)
+
+    targets = select_target_rows(player_games_df, position)
+    targets = resolve_teams_on_date(targets, roster_index)
+
+    targets['opponent_team_id'] = targets['home_team_id'].where(
+        targets['team_id'] == targets['away_team_id'], targets['away_team_id']
+    )
+
+    dataset = (
+        compute_asof_features(player_history_df, targets, position, defense_df)
+        .sort_values(['game_id', 'rank'], kind='stable')
+        .reset_index(drop=True)
+    )
+
+    columns = (
+        ['game_id', 'player_id', 'team_id', 'opponent_team_id']
+        + [f"player_{stat}" for stat in STATS]
+        + [f"defense_{stat}" for stat in STATS]
+        + STATS
+    )
+    return dataset[columns]
+
+
+class DatabaseSource:
+    """
+    Where build_feature_dataset reads its inputs from: the live database (the default).
+    app/snapshot.py has a SnapshotSource with the same methods that needs no database.
+    With game_ids, only the rows of those games are built and only what they need is loaded: their
+    box scores and the history of the players and defenses in them (see app/incremental.py).
+    """
+
+    def __init__(self, game_ids=None):
+        self.game_ids = list(game_ids) if game_ids is not None else None
+        self._position_games = {}
+
+    def position_games(self, position):
+        if position not in self._position_games:
+            self._position_games[position] = load_position_games(position, game_ids=self.game_ids)
+        return self._position_games[position]
+
+    def defense_frame(self, position):
+        if self.game_ids is None:
+            return load_defense_frame(position)
+        games = self.position_games(position)
+        team_ids = set(games['home_team_id']) | set(games['away_team_id'])
+        return load_defense_frame(position, team_ids=[int(team_id) for team_id in team_ids])
+
+    def player_history(self, position, window):
+        """Stored PlayerRollingStat snapshots, or None to compute them from the stat lines."""
+        if self.game_ids is None:
+            return load_player_rolling_frame(position, window) if window in SNAPSHOT_WINDOWS else None
+
+        player_ids = [int(player_id) for player_id in self.position_games(position)['player_id'].unique()]
+        if window in SNAPSHOT_WINDOWS:
+            return load_player_rolling_frame(position, window, player_ids=player_ids)
+        # The players' earlier games are needed too, not only the new ones
+        return trailing_player_averages(load_position_games(position, player_ids=player_ids), window)
+
+    def roster_index(self):
+        return get_roster_index()
+
+
+def build_feature_dataset(position, window=ROLLING_WINDOW, source=None):
+    """
+    Load everything for a position once and compute the training dataset.
+    Inputs come from `source` (the database by default); with the database, player averages
+    come from the stored PlayerRollingStat snapshots when the window has them.
+    """
+    source = source or DatabaseSource()
+    player_games_df = source.position_games(position)
+    defense_df = source.defense_frame(position)
+    player_history_df = source.player_history(position, window)
+    return compute_training_features(
+        player_games_df, source.roster_index(), position, defense_df, player_history_df, window
+    )
@@ -0,0 +1,160 @@
+# ffa_flask_app/app/incremental.py
+
+import copy
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sklearn.metrics import mean_squared_error
+
+from app.features import DatabaseSource, build_feature_dataset
+from app.model_registry import build_artifact, current_data_version, feature_set_key, processed_games
+from app.modeling import (
+    MULTI_OUTPUT, PROJECTABLE_POSITIONS, get_feature_columns, get_model_registry, get_target_stats, predict_frame
+)
+from app.training import DEFAULT_SEED, train_positions
+
+UPDATED, RETRAINED, CURRENT = 'updated', 'retrained', 'current'
+
+UpdateResult = namedtuple('UpdateResult', ['position', 'action', 'new_rows', 'seconds', 'detail'])
+
+
+def relative_error(artifact, rows):
+    """
+    The models' MSE on rows, per stat divided by the test MSE of their last full training and
+    averaged over the stats: 1.0 is as accurate as when trained, 1.5 is 50% worse.
+    """
+    predictions = predict_frame(artifact, rows)
+    ratios = [
+        mean_squared_error(rows[stat], predictions[stat]) / max(artifact["metrics"][stat], 1e-9)
+        for stat in artifact["target_stats"]
+    ]
+    return float(np.mean(ratios))
+
+
+def add_trees(artifact, rows, extra_trees):
+    """
+    Copies of an artifact's forests with extra_trees more trees each, fitted on rows only
+    (warm start keeps the existing trees as they are). Returns {stat: model} like the artifact.
+    """
+    target_stats = artifact["target_stats"]
+    X = rows[artifact["feature_columns"]]
+
+    def grow(model, y):
+        model = copy.deepcopy(model)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model
+
+    if artifact["mode"] == MULTI_OUTPUT:
+        model = grow(artifact["models"][target_stats[0]], rows[target_stats])
+        return {stat: model for stat in target_stats}
+    return {stat: grow(artifact["models"][stat], rows[stat]) for stat in target_stats}
+
+
+def _tree_count(artifact):
+    return max(len(model.estimators_) for model in artifact["models"].values())
+
+
+def update_position(position, mode=None, seed=DEFAULT_SEED):
+    """
+    Bring a position's models up to date with the games processed since they were trained:
+    build features for those games only, append them to the stored training set and add trees
+    fitted on them (plus a sample of older rows) to the existing forests. Falls back to a full
+    retrain when there is nothing to update from, when the games aren't newer than the training
+    set, when the current models are much less accurate on the new games (MODEL_MAX_DRIFT), when
+    the update makes them less accurate on held-out new rows (MODEL_UPDATE_TOLERANCE) or when a
+    forest would grow past MODEL_MAX_TREES. Must be called inside an app context.
+    """
+    start = time.perf_counter()
+    config = current_app.config
+    mode = mode or config["MODEL_TRAINING_MODE"]
+    registry = get_model_registry()
+    target_stats = get_target_stats(position)
+    feature_columns = get_feature_columns(target_stats)
+    feature_set = feature_set_key(feature_columns, target_stats, mode)
+    data_version = current_data_version()
+
+    def retrain(reason, new_rows=0):
+        current_app.logger.info(f"{position}: full retrain, {reason}")
+        train_positions([position], mode=mode, workers=1, seed=seed, force=True, log=current_app.logger.info)
+        return UpdateResult(position, RETRAINED, new_rows, time.perf_counter() - start, reason)
+
+    artifact = registry.latest(position, feature_set)
+    training_set = registry.load_training_set(position, feature_set)
+    if artifact is None or training_set is None:
+        return retrain("no stored models or training set")
+    if artifact["data_version"] == data_version:
+        return UpdateResult(position, CURRENT, 0, time.perf_counter() - start, "already up to date")
+    if training_set["data_version"] != artifact["data_version"]:
+        return retrain("the stored training set doesn't match the models")
+
+    games = processed_games()
+    new_games = {game_id: date for game_id, date in games.items()
+                 if game_id not in training_set["game_ids"] and date is not None}
+    if not new_games:
+        return retrain("the data changed without new games")
+    if training_set["last_date"] is not None and min(new_games.values()) < training_set["last_date"]:
+        # Earlier games shift the rolling averages of every later row (same-day games never see each other)
+        return retrain("new games are older than the training set")
+
+    new_rows = build_feature_dataset(position, source=DatabaseSource(game_ids=new_games))
+    old_rows = training_set["rows"]
+    rows = (
+        pd.concat([old_rows, new_rows], ignore_index=True)
+        .drop_duplicates(['game_id', 'player_id'], keep='last')
+        .sort_values('game_id', kind='stable')
+        .reset_index(drop=True)
+    )
+    last_date = max(new_games.values())
+    covered_games = training_set["game_ids"] | set(new_games)
+
+    if new_rows.empty:
+        artifact = {**artifact, "data_version": data_version}
+        registry.save(position, feature_set, data_version, artifact)
+        registry.save_training_set(position, feature_set, data_version, covered_games, last_date, rows)
+        return UpdateResult(position, CURRENT, 0, time.perf_counter() - start, "no new training rows")
+
+    extra_trees = config["MODEL_UPDATE_TREES"]
+    if _tree_count(artifact) + extra_trees > config["MODEL_MAX_TREES"]:
+        return retrain(f"forests would grow past {config['MODEL_MAX_TREES']} trees", len(new_rows))
+
+    drift = relative_error(artifact, new_rows)
+    if drift > config["MODEL_MAX_DRIFT"]:
+        return retrain(f"error on the new games is {drift:.2f}x the trained error", len(new_rows))
+
+    # A fifth of the new rows checks the update; the rest (and a sample of older rows, so the
+    # new trees don't only know this week) is what the new trees are fitted on
+    rng = np.random.default_rng(seed + len(rows))
+    holdout_mask = rng.random(len(new_rows)) < 0.2
+    holdout, fit_rows = new_rows[holdout_mask], new_rows[~holdout_mask]
+    replay = old_rows.sample(n=min(len(old_rows), len(fit_rows) * config["MODEL_UPDATE_REPLAY"]),
+                             random_state=seed + len(rows))
+    models = add_trees(artifact, pd.concat([fit_rows, replay], ignore_index=True), extra_trees)
+
+    updated = build_artifact(
+        position, feature_columns, target_stats, data_version, models, mode,
+        seed=seed, metrics=artifact["metrics"],
+        updates=artifact.get("updates", 0) + 1,
+        base_data_version=artifact.get("base_data_version", artifact["data_version"]),  # Of the last full training
+    )
+    before = after = None
+    if not holdout.empty:
+        before, after = relative_error(artifact, holdout), relative_error(updated, holdout)
+        if after > before * (1 + config["MODEL_UPDATE_TOLERANCE"]):
+            return retrain(f"the update raised the held-out error from {before:.2f} to {after:.2f}", len(new_rows))
+
+    registry.save(position, feature_set, data_version, updated)
+    registry.save_training_set(position, feature_set, data_version, covered_games, last_date, rows)
+    detail = f"{len(new_games)} games, {_tree_count(updated)} trees, error on new games {drift:.2f}x"
+    if after is not None:
+        detail += f", held out {before:.2f} -> {after:.2f}"
+    return UpdateResult(position, UPDATED, len(new_rows), time.perf_counter() - start, detail)
+
+
+def update_positions(positions=None, mode=None, seed=DEFAULT_SEED):
+    """Incrementally update the models of several positions (see update_position). Returns the UpdateResults."""
+    return [update_position(position, mode=mode, seed=seed) for position in positions or PROJECTABLE_POSITIONS]
@@ -0,0 +1,125 @@
+# ffa_flask_app/app/ingest.py
+
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.models import Player, PlayerTeam, PlayerGame, Game, advisory_lock, insert_ignore
+from app.defense_stats import record_game_defense
+from app.rolling_stats import record_game_rolling_stats
+from app.data_version import bump_data_version, bump_roster_version
+from app.response_cache import invalidate_response_cache
+from app.features import STATS
+
+# Box score columns stored on PlayerGame
+PLAYER_GAME_STATS = [
+    'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int',
+    'rush_attempts', 'rush_yards', 'rush_tds', 'longest_rush',
+    'targets', 'receptions', 'rec_yards', 'rec_tds', 'longest_rec'
+]
+
+# Advisory lock namespaces of the derived rows: a team's DefenseVsPosition averages, a player's snapshots
+DEFENSE_LOCKS, ROLLING_LOCKS = 1, 2
+
+
+def ingest_player_stats(aggregated_stats, game_id, game_date, mark_processed=True, commit=True):
+    """
+    Write one game's aggregated box score with a fixed number of set-based statements:
+    resolve known players in one query, insert new players and their roster spells,
+    insert the missing PlayerGame rows, update the DefenseVsPosition rows of both teams and
+    the players' PlayerRollingStat snapshots, (optionally) flag the game as processed and bump the
+    data version. On Postgres the game's teams, then its players, are locked (a statement per
+    namespace) before their derived rows are recomputed, so workers ingesting games of the same
+    teams don't race.
+
+    aggregated_stats maps player_id -> {'team_id', 'name', 'position', <PLAYER_GAME_STATS>}.
+    Nothing is committed when commit=False, so several games can share one transaction.
+    """
+    try:
+        player_ids = list(aggregated_stats.keys())
+
+        known_positions = dict(
+            db.session.query(Player.id, Player.position)
+            .filter(Player.id.in_(player_ids))
+            .all()
+        ) if player_ids else {}
+
+        new_players = [
+            {'id': player_id, 'name': stats['name'], 'position': stats['position']}
+            for player_id, stats in aggregated_stats.items()
+            if player_id not in known_positions
+        ]
+        new_player_teams = [
+            {'player_id': player_id, 'team_id': stats['team_id'], 'start_date': game_date, 'end_date': None}
+            for player_id, stats in aggregated_stats.items()
+            if player_id not in known_positions and stats['team_id'] and game_date
+        ]
+
+        existing_player_games = {
+            player_id for (player_id,) in
+            db.session.query(PlayerGame.player_id).filter(PlayerGame.game_id == game_id).all()
+        }
+        new_player_games = [
+            {'player_id': player_id, 'game_id': game_id, 'team_id': stats['team_id'],
+             **{stat: stats[stat] for stat in PLAYER_GAME_STATS}}
+            for player_id, stats in aggregated_stats.items()
+            if player_id not in existing_player_games
+        ]
+
+        insert_ignore(Player, new_players)
+        if new_player_teams:
+            bump_roster_version()
+        insert_ignore(PlayerTeam, new_player_teams)
+        insert_ignore(PlayerGame, new_player_games)
+
+        # The derived rows are recomputed from the rows this transaction can see: lock both teams
+        # and every player first, so concurrent workers take turns and each sees the others' games
+        game = db.session.get(Game, game_id)
+        if game is not None:
+            advisory_lock(DEFENSE_LOCKS, [game.home_team_id, game.away_team_id])
+        advisory_lock(ROLLING_LOCKS, player_ids)
+
+        # Keep the defense-vs-position table current, using the box score's team for every player
+        record_game_defense(game_id, [
+            {
+                'player_id': player_id,
+                'team_id': stats['team_id'],
+                'position': known_positions.get(player_id, stats['position']),
+                **{stat: stats[stat] for stat in STATS},
+            }
+            for player_id, stats in aggregated_stats.items()
+        ])
+        record_game_rolling_stats(game_id, player_ids)
+
+        if mark_processed:
+            db.session.execute(update(Game).where(Game.id == game_id).values(stats_processed=True))
+        bump_data_version()
+
+        if commit:
+            db.session.commit()
+            invalidate_response_cache('players')
+
+        current_app.logger.info(
+            f"Ingested game {game_id}: {len(new_players)} new players, "
+            f"{len(new_player_games)} new player games"
+        )
+        return len(new_player_games)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to ingest player stats for game {game_id}: {e}")
+        raise
+
+
+def ingest_player_stats_batch(games, mark_processed=True):
+    """
+    Ingest several games in a single transaction.
+    games is an iterable of (aggregated_stats, game_id, game_date) tuples.
+    """
+    total = 0
+    for aggregated_stats, game_id, game_date in games:
+        total += ingest_player_stats(
+            aggregated_stats, game_id, game_date, mark_processed=mark_processed, commit=False
+        )
+    db.session.commit()
+    invalidate_response_cache('players')
+    return total
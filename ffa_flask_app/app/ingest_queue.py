@@ -0,0 +1,192 @@
+# ffa_flask_app/app/ingest_queue.py
+
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import and_, case, func, or_, select, update
+
+from app import db
+from app.models import Game, IngestJob, insert_ignore
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _update_jobs(*criteria):
+    return update(IngestJob).where(*criteria).execution_options(synchronize_session=False)
+
+
+def enqueue_unprocessed_games():
+    """
+    Add a pending job for every played, unprocessed game that doesn't have one yet (scheduled games
+    have no scores and no box score to fetch), and close the open jobs
+    of games that were processed some other way (e.g. a replay). Returns the number queued. Does not commit.
+    """
+    processed_games = select(Game.id).where(Game.stats_processed.is_(True))
+    db.session.execute(
+        _update_jobs(IngestJob.status.in_([PENDING, FAILED]), IngestJob.game_id.in_(processed_games))
+        .values(status=DONE, updated_at=_now())
+    )
+
+    games = db.session.execute(
+        select(Game.id, Game.date)
+        .outerjoin(IngestJob, IngestJob.game_id == Game.id)
+        .filter(Game.stats_processed.is_(False), Game.home_team_score.isnot(None), IngestJob.game_id.is_(None))
+    ).all()
+    now = _now()
+    insert_ignore(IngestJob, [
+        {'game_id': game_id, 'game_date': game_date, 'status': PENDING, 'attempts': 0, 'updated_at': now}
+        for game_id, game_date in games
+    ])
+    return len(games)
+
+
+def _claimable(now):
+    return or_(IngestJob.status == PENDING,
+               and_(IngestJob.status == LEASED, IngestJob.lease_expires_at < now))
+
+
+def claim_jobs(worker_id, size, lease_seconds, max_attempts):
+    """
+    Lease up to `size` claimable jobs (pending, or leased by a worker whose lease expired), oldest
+    game first, and commit. The UPDATE re-checks that each job is still claimable, so concurrent
+    workers always get disjoint sets: whoever updates a row first owns it under its new lease
+    token. Jobs whose lease expired `max_attempts` times are marked failed instead.
+    Returns (lease_token, [(game_id, game_date)]), with an empty list when nothing is left.
+    """
+    now = _now()
+    db.session.execute(
+        _update_jobs(IngestJob.status == LEASED, IngestJob.lease_expires_at < now,
+                     IngestJob.attempts >= max_attempts)
+        .values(status=FAILED, lease_token=None, last_error='lease expired on every attempt', updated_at=now)
+    )
+
+    # Postgres skips rows another worker is claiming right now; SQLite serializes writers anyway
+    game_ids = db.session.execute(
+        select(IngestJob.game_id)
+        .where(_claimable(now), IngestJob.attempts < max_attempts)
+        .order_by(IngestJob.game_date, IngestJob.game_id)
+        .limit(size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    token = uuid.uuid4().hex
+    if game_ids:
+        db.session.execute(
+            _update_jobs(IngestJob.game_id.in_(game_ids), _claimable(now))
+            .values(status=LEASED, worker_id=worker_id, lease_token=token,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds), heartbeat_at=now,
+                    attempts=IngestJob.attempts + 1, updated_at=now)
+        )
+    db.session.commit()
+
+    claimed = db.session.execute(
+        select(IngestJob.game_id, IngestJob.game_date)
+        .where(IngestJob.lease_token == token)
+        .order_by(IngestJob.game_date, IngestJob.game_id)
+    ).all() if game_ids else []
+    return token, [tuple(row) for row in claimed]
+
+
+def renew_lease(token, lease_seconds):
+    """Extend the lease of a claim's unfinished jobs and commit. Returns how many are still held."""
+    now = _now()
+    result = db.session.execute(
+        _update_jobs(IngestJob.lease_token == token, IngestJob.status == LEASED)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), heartbeat_at=now, updated_at=now)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def complete_job(game_id, token):
+    """
+    Mark a leased job done inside the caller's transaction (the one writing the game's stats).
+    Returns False if the lease was lost to another worker, in which case the caller must roll back.
+    """
+    result = db.session.execute(
+        _update_jobs(IngestJob.game_id == game_id, IngestJob.lease_token == token, IngestJob.status == LEASED)
+        .values(status=DONE, lease_token=None, lease_expires_at=None, last_error=None, updated_at=_now())
+    )
+    return result.rowcount == 1
+
+
+def fail_job(game_id, token, error, max_attempts):
+    """Give a job back to the queue after an error, or mark it failed after max_attempts. Commits."""
+    db.session.execute(
+        _update_jobs(IngestJob.game_id == game_id, IngestJob.lease_token == token, IngestJob.status == LEASED)
+        .values(status=case((IngestJob.attempts >= max_attempts, FAILED), else_=PENDING),
+                lease_token=None, lease_expires_at=None, last_error=str(error)[:500], updated_at=_now())
+    )
+    db.session.commit()
+
+
+def release_jobs(token):
+    """Return a claim's unfinished jobs to the queue right away (on shutdown), without using up an attempt. Commits."""
+    result = db.session.execute(
+        _update_jobs(IngestJob.lease_token == token, IngestJob.status == LEASED)
+        .values(status=PENDING, lease_token=None, lease_expires_at=None,
+                attempts=IngestJob.attempts - 1, updated_at=_now())
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def requeue_failed_jobs():
+    """Give every failed job a fresh set of attempts. Commits."""
+    result = db.session.execute(
+        _update_jobs(IngestJob.status == FAILED).values(status=PENDING, attempts=0, updated_at=_now())
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def queue_status():
+    """Job counts by status, plus leases that expired without being finished (crashed workers)."""
+    counts = dict.fromkeys([PENDING, LEASED, DONE, FAILED], 0)
+    counts.update(db.session.execute(select(IngestJob.status, func.count()).group_by(IngestJob.status)).all())
+    counts['expired_leases'] = db.session.execute(
+        select(func.count()).select_from(IngestJob)
+        .where(IngestJob.status == LEASED, IngestJob.lease_expires_at < _now())
+    ).scalar()
+    return counts
+
+
+class LeaseHeartbeat:
+    """
+    Renews a claim's lease from a background thread (with its own app context and session) every
+    third of the lease, while the claimed games are fetched and ingested:
+        with LeaseHeartbeat(app, token, lease_seconds): ...
+    A job whose lease is lost anyway (e.g. the process was paused past it) is caught by complete_job.
+    """
+
+    def __init__(self, app, token, lease_seconds):
+        self.app = app
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{token[:8]}", daemon=True)
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop.wait(self.lease_seconds / 3):
+                try:
+                    if renew_lease(self.token, self.lease_seconds) == 0:
+                        return  # Every job is finished (or taken over)
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.warning(f"Could not renew lease {self.token}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -0,0 +1,264 @@
+# ffa_flask_app/app/metrics.py
+
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+# SQL statements run by the current request or batch job (None outside of both)
+_current_tally = ContextVar("sql_tally", default=None)
+_listening = False
+
+
+class QueryTally:
+    """SQL statements and time spent in them for one request or job."""
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.by_statement = Counter()  # To point at the query repeated by an N+1 loop
+
+    def most_repeated(self):
+        if not self.by_statement:
+            return None, 0
+        return self.by_statement.most_common(1)[0]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}  # labels -> [bucket counts..., count, sum]
+
+    def observe(self, labels, value):
+        series = self.series.setdefault(labels, [0] * len(self.buckets) + [0, 0.0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def samples(self, name):
+        for labels, series in sorted(self.series.items()):
+            for bound, count in zip(self.buckets, series):
+                yield f"{name}_bucket", labels + (("le", _format_value(bound)),), count
+            yield f"{name}_bucket", labels + (("le", "+Inf"),), series[-2]
+            yield f"{name}_count", labels, series[-2]
+            yield f"{name}_sum", labels, series[-1]
+
+
+class Scalar:
+    """Counter or gauge value per label set."""
+
+    def __init__(self):
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def set(self, labels, value):
+        self.series[labels] = value
+
+    def samples(self, name):
+        for labels, value in sorted(self.series.items()):
+            yield name, labels, value
+
+
+class MetricsRegistry:
+    """
+    Request latency, per-request SQL statements and batch job metrics of this process, rendered in
+    the Prometheus text format. Each worker process of a multi-process server keeps its own.
+    """
+
+    METRICS = {
+        "ffa_http_request_duration_seconds": ("histogram", "Request latency by endpoint", LATENCY_BUCKETS),
+        "ffa_http_request_sql_statements": ("histogram", "SQL statements per request", STATEMENT_BUCKETS),
+        "ffa_http_request_sql_seconds": ("histogram", "Time spent in SQL per request", LATENCY_BUCKETS),
+        "ffa_http_query_budget_exceeded_total": ("counter", "Requests over the SQL statement budget", None),
+        "ffa_job_runs_total": ("counter", "Batch job runs by outcome", None),
+        "ffa_job_last_duration_seconds": ("gauge", "Duration of the job's last run", None),
+        "ffa_job_last_sql_statements": ("gauge", "SQL statements of the job's last run", None),
+        "ffa_job_last_sql_seconds": ("gauge", "Time spent in SQL by the job's last run", None),
+        "ffa_job_last_success_timestamp_seconds": ("gauge", "Unix time the job last succeeded", None),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {
+            name: Histogram(buckets) if kind == "histogram" else Scalar()
+            for name, (kind, _, buckets) in self.METRICS.items()
+        }
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._metrics[name].observe(tuple(labels.items()), value)
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self._metrics[name].inc(tuple(labels.items()), amount)
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self._metrics[name].set(tuple(labels.items()), value)
+
+    def render(self, prefix=None, job=None):
+        """Prometheus text exposition (format 0.0.4) of every metric, or of those starting with prefix / of one job."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, _) in self.METRICS.items():
+                if prefix and not name.startswith(prefix):
+                    continue
+                samples = [sample for sample in self._metrics[name].samples(name)
+                           if job is None or ("job", job) in sample[1]]
+                if not samples:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for sample, labels, value in samples:
+                    lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_tally.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tally = _current_tally.get()
+    if tally is None or not conn.info.get("query_start"):
+        return
+    tally.statements += 1
+    tally.seconds += time.perf_counter() - conn.info["query_start"].pop()
+    tally.by_statement[statement] += 1
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute, drop its start time
+    conn = context.connection
+    if _current_tally.get() is not None and conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def listen_for_queries():
+    """Count every statement of every engine (the app's and those of pool workers) once per process."""
+    global _listening
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listening = True
+
+
+def get_metrics():
+    """The metrics registry created with the app (see create_app)."""
+    return current_app.extensions["metrics"]
+
+
+def init_request_metrics(app):
+    """
+    Time every request and count its SQL statements. Requests running more than QUERY_BUDGET
+    statements are logged with the statement they repeated most (usually an N+1 loop) and counted
+    in ffa_http_query_budget_exceeded_total.
+    """
+    listen_for_queries()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_tally = QueryTally()
+        g.metrics_token = _current_tally.set(g.metrics_tally)
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_tally' not in g:
+            return response
+        endpoint = request.endpoint or "unmatched"  # The route, never the raw path (ids would explode the series)
+        tally = g.metrics_tally
+        metrics = get_metrics()
+        metrics.observe("ffa_http_request_duration_seconds",
+                        {"method": request.method, "endpoint": endpoint, "status": str(response.status_code)},
+                        time.perf_counter() - g.metrics_start)
+        metrics.observe("ffa_http_request_sql_statements", {"endpoint": endpoint}, tally.statements)
+        metrics.observe("ffa_http_request_sql_seconds", {"endpoint": endpoint}, tally.seconds)
+
+        budget = current_app.config["QUERY_BUDGET"]
+        if budget and tally.statements > budget:
+            metrics.inc("ffa_http_query_budget_exceeded_total", {"endpoint": endpoint})
+            statement, repeats = tally.most_repeated()
+            current_app.logger.warning(
+                f"{request.method} {request.full_path.rstrip('?')} ran {tally.statements} SQL statements "
+                f"(budget {budget}, {tally.seconds * 1000:.1f}ms); repeated {repeats}x: {' '.join(statement.split())[:200]}"
+            )
+        return response
+
+    @app.teardown_request
+    def stop_request_metrics(exc):
+        if 'metrics_token' in g:
+            _current_tally.reset(g.pop('metrics_token'))
+
+
+def write_textfile(directory, job, text):
+    """Atomically write a job's metrics as <job>.prom, for node_exporter's textfile collector."""
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{job}-", suffix=".prom.tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, os.path.join(directory, f"{job}.prom"))
+
+
+@contextmanager
+def timed_job(job):
+    """
+    Time a batch job and count its SQL statements, e.g. `with app.app_context(), timed_job("import_data"):`.
+    Logs a summary line, records the run in the metrics registry and, when METRICS_TEXTFILE_DIR is
+    set, writes the job's metrics there so a short-lived script can still be scraped.
+    Yields the QueryTally, which is live while the job runs.
+    """
+    listen_for_queries()
+    tally = QueryTally()
+    token = _current_tally.set(tally)
+    start = time.perf_counter()
+    status = "failure"
+    try:
+        yield tally
+        status = "success"
+    finally:
+        _current_tally.reset(token)
+        elapsed = time.perf_counter() - start
+        labels = {"job": job}
+        metrics = get_metrics()
+        metrics.inc("ffa_job_runs_total", {"job": job, "status": status})
+        metrics.set("ffa_job_last_duration_seconds", labels, elapsed)
+        metrics.set("ffa_job_last_sql_statements", labels, tally.statements)
+        metrics.set("ffa_job_last_sql_seconds", labels, tally.seconds)
+        if status == "success":
+            metrics.set("ffa_job_last_success_timestamp_seconds", labels, time.time())
+
+        current_app.logger.info(f"Job {job} {status} in {elapsed:.2f}s, "
+                                f"{tally.statements} SQL statements ({tally.seconds:.2f}s)")
+        textfile_dir = current_app.config.get("METRICS_TEXTFILE_DIR")
+        if textfile_dir:
+            write_textfile(textfile_dir, job, metrics.render(prefix="ffa_job_", job=job))
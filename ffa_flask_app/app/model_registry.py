@@ -0,0 +1,173 @@
+# ffa_flask_app/app/model_registry.py
+
+import glob
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import joblib
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import Game, PlayerGame
+
+
+def current_data_version():
+    """
+    Identifies the PlayerGame data a model was trained on: the highest id and the row count.
+    Both only change when games are ingested (or rows deleted), so a match means nothing new.
+    """
+    max_id, row_count = db.session.query(func.max(PlayerGame.id), func.count(PlayerGame.id)).one()
+    return f"{max_id or 0}-{row_count}"
+
+
+def processed_games():
+    """game id -> date of every game whose stats are ingested: what a training set built now covers."""
+    return dict(db.session.query(Game.id, Game.date).filter(Game.stats_processed.is_(True)).all())
+
+
+def _dump_atomic(value, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(value, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def feature_set_key(feature_columns, target_stats, variant=""):
+    """Short, stable name for a combination of feature columns, target stats and training variant."""
+    signature = ",".join(feature_columns) + "|" + ",".join(target_stats) + "|" + variant
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+
+
+def build_artifact(position, feature_columns, target_stats, data_version, models, variant="", **details):
+    """The dict stored for one set of trained models; details adds extra keys (e.g. metrics)."""
+    return {
+        "position": position,
+        "mode": variant or None,
+        "feature_columns": list(feature_columns),
+        "target_stats": list(target_stats),
+        "data_version": data_version,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "models": models,
+        **details,
+    }
+
+
+class ModelRegistry:
+    """
+    Trained models serialized to disk, one artifact per (position, feature set, data version):
+
+        <directory>/<position>/<feature_set>/<data_version>.joblib
+
+    The rows the models were trained on are kept next to them (training_set.pkl), so incremental
+    updates (app/incremental.py) only build features for new games. The last artifact loaded or
+    saved for each position and feature set is also kept in memory, so repeated predictions in
+    one process don't touch the disk at all.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._loaded = {}  # (position, feature_set) -> (path, artifact)
+
+    def path(self, position, feature_set, data_version):
+        return os.path.join(self.directory, position, feature_set, f"{data_version}.joblib")
+
+    def _cached(self, position, feature_set, path):
+        path_and_artifact = self._loaded.get((position, feature_set))
+        if path_and_artifact is not None and path_and_artifact[0] == path:
+            return path_and_artifact[1]
+        return None
+
+    def load(self, position, feature_set, data_version):
+        """Return the stored artifact dict, or None if these models were never trained."""
+        path = self.path(position, feature_set, data_version)
+        artifact = self._cached(position, feature_set, path)
+        if artifact is not None:
+            return artifact
+        try:
+            artifact = joblib.load(path)
+        except FileNotFoundError:
+            return None
+        self._loaded[(position, feature_set)] = (path, artifact)
+        return artifact
+
+    def latest(self, position, feature_set):
+        """
+        The newest stored artifact for a position and feature set, whatever its data version.
+        Another process saving a newer version deletes the older files, so a file that vanishes
+        between listing and loading just means looking again.
+        """
+        while True:
+            modified = {}
+            for path in glob.glob(os.path.join(self.directory, position, feature_set, "*.joblib")):
+                try:
+                    modified[path] = os.path.getmtime(path)
+                except FileNotFoundError:
+                    pass
+            if not modified:
+                return None
+            path = max(modified, key=modified.get)
+            artifact = self._cached(position, feature_set, path)
+            if artifact is not None:
+                return artifact
+            try:
+                artifact = joblib.load(path)
+            except FileNotFoundError:
+                continue
+            self._loaded[(position, feature_set)] = (path, artifact)
+            return artifact
+
+    def save(self, position, feature_set, data_version, artifact):
+        """Write an artifact atomically and remove artifacts built from older data versions."""
+        path = self.path(position, feature_set, data_version)
+        _dump_atomic(artifact, path)
+
+        for old_path in glob.glob(os.path.join(os.path.dirname(path), "*.joblib")):
+            if old_path != path:
+                try:
+                    os.unlink(old_path)
+                except FileNotFoundError:  # Removed by another process's save
+                    pass
+
+        self._loaded[(position, feature_set)] = (path, artifact)
+        return path
+
+    def training_set_path(self, position, feature_set):
+        return os.path.join(self.directory, position, feature_set, "training_set.pkl")
+
+    def load_training_set(self, position, feature_set):
+        """
+        The stored training set: {"data_version", "game_ids" (every game it covers), "last_date",
+        "rows" (the feature dataset)}, or None.
+        """
+        path = self.training_set_path(position, feature_set)
+        return joblib.load(path) if os.path.exists(path) else None
+
+    def save_training_set(self, position, feature_set, data_version, game_ids, last_date, rows):
+        """Store the rows models were trained on and the games they cover (up to last_date)."""
+        training_set = {"data_version": data_version, "game_ids": set(game_ids), "last_date": last_date, "rows": rows}
+        _dump_atomic(training_set, self.training_set_path(position, feature_set))
+        return training_set
+
+    def get_or_train(self, position, feature_columns, target_stats, train_fn, data_version=None, variant=""):
+        """
+        Return the artifact for the current data version, training it with
+        train_fn() -> {stat: model} only when no artifact exists yet.
+        variant separates artifacts trained differently on the same features (e.g. training mode).
+        """
+        feature_set = feature_set_key(feature_columns, target_stats, variant)
+        data_version = data_version or current_data_version()
+
+        artifact = self.load(position, feature_set, data_version)
+        if artifact is not None:
+            return artifact
+
+        artifact = build_artifact(position, feature_columns, target_stats, data_version, train_fn(), variant)
+        self.save(position, feature_set, data_version, artifact)
+        return artifact
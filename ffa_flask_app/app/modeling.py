@@ -0,0 +1,92 @@
+# ffa_flask_app/app/modeling.py
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from app.model_registry import feature_set_key
+
+# Training modes: one joint model for all target stats, or one model per stat
+MULTI_OUTPUT = "multi_output"
+PER_STAT = "per_stat"
+
+# Positions we can build opponent features for (see app/features.py)
+PROJECTABLE_POSITIONS = ["QB", "RB", "WR"]
+
+
+def get_target_stats(position):
+    """Stats predicted for a position."""
+    if position in ['RB', 'WR', 'TE']:
+        return ['rush_attempts', 'rush_yards', 'rush_tds', 'targets', 'receptions', 'rec_yards', 'rec_tds']
+    elif position == 'QB':
+        return ['rush_attempts', 'rush_yards', 'rush_tds',
+                'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int']
+    raise ValueError(f"Unsupported position: {position}")
+
+
+def get_feature_columns(target_stats):
+    """Feature columns will only include rolling averages (player_ and defense_ prefixes)."""
+    return [f"player_{col}" for col in target_stats] + [f"defense_{col}" for col in target_stats]
+
+
+def fit_random_forest(training_df, target_stats, feature_columns, random_state=42, n_jobs=None):
+    """
+    Fit a Random Forest on an 80/20 split of the training rows: a single-stat model when given one
+    stat, one model predicting them jointly otherwise. The split and the trees are seeded with
+    random_state, so the same data always gives the same model wherever it is fitted.
+    Returns (model, {stat: test MSE}).
+    """
+    X = training_df[feature_columns]
+    y = training_df[target_stats[0]] if len(target_stats) == 1 else training_df[target_stats]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+
+    model = RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+
+    mse = mean_squared_error(y_test, model.predict(X_test), multioutput='raw_values')
+    return model, {stat: float(value) for stat, value in zip(target_stats, np.atleast_1d(mse))}
+
+
+def get_model_registry():
+    """The ModelRegistry created with the app (see create_app)."""
+    return current_app.extensions["model_registry"]
+
+
+def load_cached_models(position, mode=None, registry=None):
+    """
+    Most recent stored artifact for a position without ever training.
+    Returns None when no models have been trained yet.
+    """
+    mode = mode or current_app.config["MODEL_TRAINING_MODE"]
+    registry = registry or get_model_registry()
+    target_stats = get_target_stats(position)
+    feature_set = feature_set_key(get_feature_columns(target_stats), target_stats, mode)
+    return registry.latest(position, feature_set)
+
+
+def predict_frame(artifact, features_df):
+    """
+    Predict every target stat of an artifact for many rows at once.
+    One predict call for a multi-output artifact, one per stat otherwise.
+    """
+    X = features_df[artifact["feature_columns"]]
+    target_stats = artifact["target_stats"]
+
+    if artifact["mode"] == MULTI_OUTPUT:
+        model = artifact["models"][target_stats[0]]
+        return pd.DataFrame(model.predict(X), columns=target_stats, index=features_df.index)
+
+    return pd.DataFrame(
+        {stat: artifact["models"][stat].predict(X) for stat in target_stats},
+        index=features_df.index
+    )
+
+
+def predict_stats(artifact, combined_features):
+    """Predict every target stat of an artifact for one row of features (a Series)."""
+    row = combined_features[artifact["feature_columns"]].to_frame().T.astype(float)
+    return predict_frame(artifact, row).iloc[0].to_dict()
@@ -1,5 +1,44 @@
 from app import db
 from flask import current_app
+from sqlalchemy import insert, text
+
+
+def insert_ignore(model, rows):
+    """
+    Insert many rows in one statement, skipping rows that violate a unique key.
+    Uses ON CONFLICT DO NOTHING on Postgres and SQLite, a plain insert elsewhere.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model.__table__).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(model.__table__).on_conflict_do_nothing()
+    else:
+        stmt = insert(model.__table__)
+
+    db.session.execute(stmt, rows)
+
+
+def advisory_lock(namespace, keys):
+    """
+    Lock each key of a namespace until the transaction ends, in one statement taking them in
+    sorted order, so transactions locking overlapping keys wait for each other instead of
+    deadlocking. Uses Postgres advisory locks; SQLite lets a single transaction write at a time,
+    so there is nothing to do there.
+    """
+    if not keys or db.session.get_bind().dialect.name != "postgresql":
+        return
+    db.session.execute(
+        text("SELECT pg_advisory_xact_lock(:namespace, lock_key)"
+             " FROM unnest(CAST(:keys AS integer[])) AS lock_key ORDER BY lock_key"),
+        {'namespace': namespace, 'keys': sorted({int(key) for key in keys})},
+    )
+
 
 class Player(db.Model):
     __tablename__ = 'players'
@@ -48,6 +87,11 @@ def add_player(name, position, team_id, start_date=None, id=None):
 
 class PlayerTeam(db.Model):
     __tablename__ = 'player_teams'
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'team_id', 'start_date', name='uq_player_teams_player_team_start'),
+        # Which team was a player on at a date (get_player_team_on_date, feature building)
+        db.Index('ix_player_teams_player_dates', 'player_id', 'start_date', 'end_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
@@ -84,7 +128,11 @@ def add_player_team(player_id, team_id, start_date, end_date=None):
             start_date=start_date,
             end_date=end_date
         )
+        # Spell writes move the roster counters (the roster index catches up on them) and the data version
+        from app.data_version import bump_data_version, bump_roster_version
+        bump_roster_version()
         db.session.add(new_player_team)
+        bump_data_version()
         db.session.commit()
         current_app.logger.info(f"Successfully added PlayerTeam entry: Player ID {player_id}, Team ID {team_id}")
         return new_player_team
@@ -124,6 +172,17 @@ def add_team(name, division, id=None):
     
 class Game(db.Model):
     __tablename__ = 'games'
+    __table_args__ = (
+        db.UniqueConstraint('home_team_id', 'away_team_id', 'date', name='uq_games_home_away_date'),
+        db.Index('ix_games_away_team_date', 'away_team_id', 'date'),
+        db.Index('ix_games_date', 'date'),
+        # Only the games still waiting for box scores (import queue)
+        db.Index(
+            'ix_games_unprocessed_date', 'date',
+            postgresql_where=db.text('stats_processed = false'),
+            sqlite_where=db.text('stats_processed = 0'),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     home_team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
@@ -190,10 +249,15 @@ def add_game(home_team_id, away_team_id, spread=None, over_under=None, home_team
 
 class PlayerGame(db.Model):
     __tablename__ = 'player_games'
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'game_id', name='uq_player_games_player_game'),
+        db.Index('ix_player_games_game_id', 'game_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
     game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=True)  # Team in the box score (null for older rows)
 
     pass_attempts = db.Column(db.Integer, default=0)
     pass_completions = db.Column(db.Integer, default=0)
@@ -259,3 +323,252 @@ def add_player_game(player_id, game_id, pass_attempts=0, pass_completions=0, pas
             db.session.rollback()
             current_app.logger.error(f"Error adding player game: {e}")
             return None
+
+
+class DefenseVsPosition(db.Model):
+    '''
+    The best performance by an opposing player of a position against a team in one game,
+    plus the team's rolling averages allowed to that position over its last 8 games (this one included).
+    Maintained incrementally by app/defense_stats.py as box scores are ingested.
+    '''
+    __tablename__ = 'defense_vs_position'
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'position', 'game_id', name='uq_defense_vs_position_team_position_game'),
+        db.Index('ix_defense_vs_position_team_position_date', 'team_id', 'position', 'date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)  # The defense
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    position = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)  # Top opposing performer
+
+    # Top opposing performer's stat line
+    rush_attempts = db.Column(db.Integer, default=0)
+    rush_yards = db.Column(db.Integer, default=0)
+    rush_tds = db.Column(db.Integer, default=0)
+    targets = db.Column(db.Integer, default=0)
+    receptions = db.Column(db.Integer, default=0)
+    rec_yards = db.Column(db.Integer, default=0)
+    rec_tds = db.Column(db.Integer, default=0)
+    pass_attempts = db.Column(db.Integer, default=0)
+    pass_completions = db.Column(db.Integer, default=0)
+    pass_yards = db.Column(db.Integer, default=0)
+    pass_tds = db.Column(db.Integer, default=0)
+    pass_int = db.Column(db.Integer, default=0)
+
+    # Rolling averages allowed over the last 8 games (null until 8 games exist)
+    avg_rush_attempts = db.Column(db.Float, nullable=True)
+    avg_rush_yards = db.Column(db.Float, nullable=True)
+    avg_rush_tds = db.Column(db.Float, nullable=True)
+    avg_targets = db.Column(db.Float, nullable=True)
+    avg_receptions = db.Column(db.Float, nullable=True)
+    avg_rec_yards = db.Column(db.Float, nullable=True)
+    avg_rec_tds = db.Column(db.Float, nullable=True)
+    avg_pass_attempts = db.Column(db.Float, nullable=True)
+    avg_pass_completions = db.Column(db.Float, nullable=True)
+    avg_pass_yards = db.Column(db.Float, nullable=True)
+    avg_pass_tds = db.Column(db.Float, nullable=True)
+    avg_pass_int = db.Column(db.Float, nullable=True)
+
+    # Relationships
+    team = db.relationship('Team')
+    game = db.relationship('Game')
+    player = db.relationship('Player')
+
+    def __repr__(self):
+        return f'<DefenseVsPosition Team ID: {self.team_id}, Position: {self.position}, Game ID: {self.game_id}>'
+
+
+class PlayerRollingStat(db.Model):
+    '''
+    A player's rolling averages over their last 3 and 8 games, as of the end of one game (that game included).
+    Maintained incrementally by app/rolling_stats.py as box scores are ingested.
+    '''
+    __tablename__ = 'player_rolling_stats'
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'game_id', name='uq_player_rolling_stats_player_game'),
+        db.Index('ix_player_rolling_stats_player_date', 'player_id', 'date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+
+    # 3-game averages (null until the player has 3 games)
+    avg3_rush_attempts = db.Column(db.Float, nullable=True)
+    avg3_rush_yards = db.Column(db.Float, nullable=True)
+    avg3_rush_tds = db.Column(db.Float, nullable=True)
+    avg3_targets = db.Column(db.Float, nullable=True)
+    avg3_receptions = db.Column(db.Float, nullable=True)
+    avg3_rec_yards = db.Column(db.Float, nullable=True)
+    avg3_rec_tds = db.Column(db.Float, nullable=True)
+    avg3_pass_attempts = db.Column(db.Float, nullable=True)
+    avg3_pass_completions = db.Column(db.Float, nullable=True)
+    avg3_pass_yards = db.Column(db.Float, nullable=True)
+    avg3_pass_tds = db.Column(db.Float, nullable=True)
+    avg3_pass_int = db.Column(db.Float, nullable=True)
+
+    # 8-game averages (null until the player has 8 games)
+    avg8_rush_attempts = db.Column(db.Float, nullable=True)
+    avg8_rush_yards = db.Column(db.Float, nullable=True)
+    avg8_rush_tds = db.Column(db.Float, nullable=True)
+    avg8_targets = db.Column(db.Float, nullable=True)
+    avg8_receptions = db.Column(db.Float, nullable=True)
+    avg8_rec_yards = db.Column(db.Float, nullable=True)
+    avg8_rec_tds = db.Column(db.Float, nullable=True)
+    avg8_pass_attempts = db.Column(db.Float, nullable=True)
+    avg8_pass_completions = db.Column(db.Float, nullable=True)
+    avg8_pass_yards = db.Column(db.Float, nullable=True)
+    avg8_pass_tds = db.Column(db.Float, nullable=True)
+    avg8_pass_int = db.Column(db.Float, nullable=True)
+
+    # Relationships
+    player = db.relationship('Player')
+    game = db.relationship('Game')
+
+    def __repr__(self):
+        return f'<PlayerRollingStat Player ID: {self.player_id}, Game ID: {self.game_id}>'
+
+
+class TeamSeasonStat(db.Model):
+    '''
+    A team's record and scoring in one season, aggregated from Game scores.
+    Refreshed by app/team_stats.py whenever games are imported.
+    '''
+    __tablename__ = 'team_season_stats'
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'season', name='uq_team_season_stats_team_season'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    season = db.Column(db.Integer, nullable=False)
+
+    games = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    ties = db.Column(db.Integer, nullable=False, default=0)
+    points_for = db.Column(db.Integer, nullable=False, default=0)
+    points_against = db.Column(db.Integer, nullable=False, default=0)
+    points_per_game = db.Column(db.Float, nullable=True)
+    points_against_per_game = db.Column(db.Float, nullable=True)
+
+    # Relationships
+    team = db.relationship('Team')
+
+    def __repr__(self):
+        return f'<TeamSeasonStat Team ID: {self.team_id}, Season: {self.season}, {self.wins}-{self.losses}-{self.ties}>'
+
+
+class DataVersion(db.Model):
+    '''
+    Counter bumped in the same transaction as every import that changes players, teams, games
+    or stats (see app/data_version.py). Read endpoints derive their ETags from it. Two more rows
+    count the PlayerTeam writes the roster index catches up on.
+    '''
+    __tablename__ = 'data_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f'<DataVersion {self.version} at {self.updated_at}>'
+
+
+class IngestJob(db.Model):
+    '''
+    One game's box-score ingest in the work queue (see app/ingest_queue.py). Workers lease batches
+    of pending jobs and keep the lease alive with heartbeats; a job is marked done in the same
+    transaction that writes its game's stats, and goes back to the queue if its lease expires.
+    '''
+    __tablename__ = 'ingest_jobs'
+    __table_args__ = (
+        db.Index('ix_ingest_jobs_status_date', 'status', 'game_date'),
+        db.Index('ix_ingest_jobs_lease_token', 'lease_token'),
+    )
+
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), primary_key=True)
+    game_date = db.Column(db.Date, nullable=True)  # Jobs are claimed oldest game first
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, leased, done or failed
+
+    worker_id = db.Column(db.String(100), nullable=True)
+    lease_token = db.Column(db.String(32), nullable=True)  # Identifies one claim, see claim_jobs
+    lease_expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    heartbeat_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    # Relationships
+    game = db.relationship('Game')
+
+    def __repr__(self):
+        return f'<IngestJob Game ID: {self.game_id}, {self.status}, attempt {self.attempts}>'
+
+
+class ApiUsage(db.Model):
+    '''
+    api-sports requests made with our key per UTC day (the daily quota resets at midnight UTC) and
+    in the current minute, shared by every process that calls the API (see app/api_quota.py).
+    '''
+    __tablename__ = 'api_usage'
+
+    day = db.Column(db.Date, primary_key=True)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    daily_limit = db.Column(db.Integer, nullable=True)  # As reported by the API
+    remaining = db.Column(db.Integer, nullable=True)    # As reported by the API after the last request
+
+    minute_started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    minute_requests = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f'<ApiUsage {self.day}: {self.requests} requests>'
+
+
+class Projection(db.Model):
+    '''
+    A player's projected stats for one game by one version of the models (see app/projection_store.py).
+    Filled for the upcoming week after each ingest, so the projections endpoint only reads rows.
+    Stats the player's position isn't projected on are null.
+    '''
+    __tablename__ = 'projections'
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'game_id', 'model_version', name='uq_projections_player_game_model'),
+        db.Index('ix_projections_game_id', 'game_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    model_version = db.Column(db.String(64), nullable=False)  # <feature set>-<data version> of the artifact
+    position = db.Column(db.String(10), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    opponent_team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+
+    rush_attempts = db.Column(db.Float, nullable=True)
+    rush_yards = db.Column(db.Float, nullable=True)
+    rush_tds = db.Column(db.Float, nullable=True)
+    targets = db.Column(db.Float, nullable=True)
+    receptions = db.Column(db.Float, nullable=True)
+    rec_yards = db.Column(db.Float, nullable=True)
+    rec_tds = db.Column(db.Float, nullable=True)
+    pass_attempts = db.Column(db.Float, nullable=True)
+    pass_completions = db.Column(db.Float, nullable=True)
+    pass_yards = db.Column(db.Float, nullable=True)
+    pass_tds = db.Column(db.Float, nullable=True)
+    pass_int = db.Column(db.Float, nullable=True)
+
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    # Relationships
+    player = db.relationship('Player')
+    game = db.relationship('Game')
+
+    def __repr__(self):
+        return f'<Projection Player ID: {self.player_id}, Game ID: {self.game_id}, {self.model_version}>'
@@ -0,0 +1,94 @@
+# ffa_flask_app/app/players.py
+
+from sqlalchemy import and_, select
+
+from app import db
+from app.models import Player, PlayerTeam, Team
+
+# Fields a player listing can return (?fields=); team is the current team's name
+PLAYER_FIELDS = ['id', 'name', 'position', 'team_id', 'team']
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+
+def parse_fields(fields_arg):
+    """Requested fields from a comma separated ?fields= value (every field when empty)."""
+    if not fields_arg:
+        return PLAYER_FIELDS
+    fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PLAYER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def players_query(position=None, team_id=None, after_id=None, limit=None, player_id=None):
+    """
+    Players ordered by id with their current team (the PlayerTeam spell with no end_date),
+    in a single statement. The filters and the keyset page (id > after_id, limit) apply
+    to players, so a player with several open spells still counts once.
+    """
+    players = select(Player.id, Player.name, Player.position)
+    if player_id is not None:
+        players = players.filter(Player.id == player_id)
+    if position:
+        players = players.filter(Player.position == position)
+    if team_id is not None:
+        players = players.filter(
+            select(PlayerTeam.id)
+            .filter(PlayerTeam.player_id == Player.id, PlayerTeam.team_id == team_id,
+                    PlayerTeam.end_date.is_(None))
+            .exists()
+        )
+    if after_id is not None:
+        players = players.filter(Player.id > after_id)
+    players = players.order_by(Player.id.asc())
+    if limit:
+        players = players.limit(limit)
+    players = players.subquery()
+
+    current_spell = and_(PlayerTeam.player_id == players.c.id, PlayerTeam.end_date.is_(None))
+    if team_id is not None:
+        current_spell = and_(current_spell, PlayerTeam.team_id == team_id)
+
+    return (
+        select(players.c.id, players.c.name, players.c.position,
+               PlayerTeam.team_id, Team.name.label('team'))
+        .outerjoin(PlayerTeam, current_spell)
+        .outerjoin(Team, Team.id == PlayerTeam.team_id)
+        .order_by(players.c.id.asc(), PlayerTeam.start_date.desc())
+    )
+
+
+def unique_players(rows, fields=PLAYER_FIELDS):
+    """One dict per player from rows ordered by id, keeping each player's latest open spell."""
+    last_id = None
+    for row in rows:
+        if row.id == last_id:
+            continue
+        last_id = row.id
+        yield {field: getattr(row, field) for field in fields}
+
+
+def get_players_page(position=None, team_id=None, after_id=None, limit=DEFAULT_PAGE_SIZE, fields=PLAYER_FIELDS):
+    """
+    One keyset page of players, plus the after_id of the next page (None on the last page).
+    One extra player is fetched to know whether another page exists.
+    """
+    rows = db.session.execute(players_query(position, team_id, after_id, limit=limit + 1)).all()
+    page = list(unique_players(rows))
+    next_after_id = page[limit - 1]['id'] if len(page) > limit else None
+    return [{field: player[field] for field in fields} for player in page[:limit]], next_after_id
+
+
+def get_player(player_id, fields=PLAYER_FIELDS):
+    """A single player with their current team, or None."""
+    rows = db.session.execute(players_query(player_id=player_id)).all()
+    return next(unique_players(rows, fields), None)
+
+
+def iter_players(position=None, team_id=None, after_id=None, fields=PLAYER_FIELDS):
+    """Every matching player, fetched from the database in batches so memory stays flat."""
+    stmt = players_query(position, team_id, after_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    yield from unique_players(db.session.execute(stmt), fields)
@@ -0,0 +1,151 @@
+# ffa_flask_app/app/projection_store.py
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import and_, delete, distinct, func
+
+from app import db
+from app.features import STATS
+from app.incremental import update_positions
+from app.model_registry import feature_set_key
+from app.modeling import PROJECTABLE_POSITIONS, load_cached_models
+from app.models import Game, Player, Projection, insert_ignore
+from app.projections import (
+    PROJECTION_COLUMNS, load_week_candidates, predict_candidates, projected_points, rank_projections,
+    season_of, season_week_range
+)
+from app.scoring import STANDARD
+
+
+def model_version(artifact):
+    """The models behind a projection: their feature set and the data version they were trained on."""
+    feature_set = feature_set_key(artifact["feature_columns"], artifact["target_stats"], artifact["mode"] or "")
+    return f"{feature_set}-{artifact['data_version']}"
+
+
+def upcoming_week():
+    """
+    First and last date of the next week to project: the week (as season_week_range counts them)
+    of the first unprocessed game on or after the last processed one. (None, None) when nothing
+    is scheduled after it.
+    """
+    last_processed = db.session.query(func.max(Game.date)).filter(Game.stats_processed.is_(True)).scalar()
+    query = db.session.query(func.min(Game.date)).filter(Game.stats_processed.is_(False))
+    if last_processed is not None:
+        query = query.filter(Game.date >= last_processed)
+    next_game = query.scalar()
+    if next_game is None:
+        return None, None
+
+    season = season_of(next_game)
+    week_one, _ = season_week_range(season, 1)
+    return season_week_range(season, (next_game - week_one).days // 7 + 1)
+
+
+def store_projections(start_date, end_date, positions=None, skip_processed=False):
+    """
+    Project every rostered player with a game between start_date and end_date with the latest
+    stored models and write the rows to the projections table. Each position's projections of
+    those games are replaced, whatever model version made them. With skip_processed, games whose
+    stats are in already keep their last projections (to compare them with the actual stats).
+    Positions without trained models are skipped. Commits; returns the number of rows stored.
+    """
+    positions = positions or PROJECTABLE_POSITIONS
+    candidates = load_week_candidates(start_date, end_date, positions)
+    if skip_processed:
+        processed = {game_id for (game_id,) in db.session.query(Game.id).filter(
+            Game.date >= start_date, Game.date <= end_date, Game.stats_processed.is_(True))}
+        candidates = candidates[~candidates['game_id'].isin(processed)]
+    game_ids = [int(game_id) for game_id in candidates['game_id'].unique()]
+    now = datetime.now(timezone.utc)
+
+    stored = 0
+    for position in positions:
+        artifact = load_cached_models(position)
+        if artifact is None:
+            current_app.logger.warning(f"No trained models for position {position}, not projecting it")
+            continue
+
+        predicted = predict_candidates(candidates, position, artifact)
+        version = model_version(artifact)
+        db.session.execute(
+            delete(Projection)
+            .where(Projection.game_id.in_(game_ids), Projection.position == position)
+            .execution_options(synchronize_session=False)
+        )
+        rows = predicted.reindex(columns=['player_id', 'game_id', 'position', 'team_id', 'opponent_team_id', *STATS])
+        # Stats the position isn't projected on are stored as NULL
+        rows = rows.astype(object).where(rows.notna(), None).to_dict(orient='records')
+        insert_ignore(Projection, [{**row, 'model_version': version, 'created_at': now} for row in rows])
+        stored += len(rows)
+        current_app.logger.info(f"Stored {len(rows)} {position} projections ({version}) "
+                                f"for games from {start_date} to {end_date}")
+
+    db.session.commit()
+    return stored
+
+
+def refresh_upcoming_projections(update_models=True):
+    """
+    The post-ingest job: bring the trained models up to date with the games just processed
+    (incrementally, see app/incremental.py; positions never trained are left alone), then store
+    projections for the rest of the upcoming week (its games already played keep theirs).
+    Returns the number of projections stored.
+    """
+    start_date, end_date = upcoming_week()
+    if start_date is None:
+        current_app.logger.info("No upcoming games to project")
+        return 0
+
+    if update_models:
+        trained = [position for position in PROJECTABLE_POSITIONS if load_cached_models(position) is not None]
+        for result in update_positions(trained) if trained else []:
+            current_app.logger.info(f"{result.position} models {result.action}: {result.detail}")
+    return store_projections(start_date, end_date, skip_processed=True)
+
+
+def load_stored_projections(start_date, end_date, position=None, limit=50, rules=STANDARD):
+    """
+    Ranked projections of the games between start_date and end_date, read from the projections
+    table and scored with rules (same records as project_week, plus model_version).
+    None unless every game in the range has stored projections of every requested position,
+    so a partly stored week is projected live instead.
+    """
+    positions = [position] if position else PROJECTABLE_POSITIONS
+    in_range = and_(Game.date >= start_date, Game.date <= end_date)
+    game_count = db.session.query(func.count(Game.id)).filter(in_range).scalar()
+    covered = dict(
+        db.session.query(Projection.position, func.count(distinct(Projection.game_id)))
+        .join(Game, Projection.game_id == Game.id)
+        .filter(in_range, Projection.position.in_(positions))
+        .group_by(Projection.position)
+        .all()
+    )
+    if not game_count or any(covered.get(name, 0) < game_count for name in positions):
+        return None
+
+    query = (
+        db.session.query(Projection.player_id, Player.name, Projection.position, Projection.team_id,
+                         Projection.opponent_team_id, Projection.game_id, Game.date, Projection.model_version,
+                         *[getattr(Projection, stat) for stat in STATS])
+        .join(Game, Projection.game_id == Game.id)
+        .join(Player, Projection.player_id == Player.id)
+        .filter(in_range)
+    )
+    if position:
+        query = query.filter(Projection.position == position)
+    stored = pd.DataFrame(query.all(), columns=[*PROJECTION_COLUMNS, 'model_version', *STATS])
+    if stored.empty:
+        return None
+
+    projections = [
+        {stat: round(value, 2) for stat, value in row.items() if pd.notna(value)}
+        for row in stored[STATS].to_dict(orient='records')
+    ]
+    projected = stored[[*PROJECTION_COLUMNS, 'model_version']].assign(
+        projections=projections,
+        projected_points=projected_points(stored[STATS], rules).round(2),
+    )
+    return rank_projections(projected, limit)
@@ -0,0 +1,148 @@
+# ffa_flask_app/app/projections.py
+
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy.sql import func
+
+from app import db
+from app.models import Player, Game
+from app.roster_index import get_roster_index
+from app.features import load_player_rolling_frame, load_defense_frame, compute_asof_features
+from app.modeling import PROJECTABLE_POSITIONS, load_cached_models, predict_frame
+from app.scoring import STANDARD
+
+
+class ModelsNotTrainedError(Exception):
+    """Raised when projections are requested for a position with no stored models."""
+
+
+def season_of(game_date):
+    """NFL season a date belongs to: games in January/February count toward the previous year."""
+    return game_date.year if game_date.month >= 3 else game_date.year - 1
+
+
+def season_week_range(season, week):
+    """
+    First and last date of a week of a season. Week 1 starts on the date of the season's
+    first game (the Thursday opener) and every week spans seven days from there.
+    """
+    first_game_date = (
+        db.session.query(func.min(Game.date))
+        .filter(Game.date >= date(season, 3, 1), Game.date < date(season + 1, 3, 1))
+        .scalar()
+    )
+    if first_game_date is None:
+        return None, None
+
+    start = first_game_date + timedelta(weeks=week - 1)
+    return start, start + timedelta(days=6)
+
+
+def load_week_candidates(start_date, end_date, positions, roster_index=None):
+    """
+    Every rostered player of the given positions with a game between start_date and end_date,
+    one row per (player, game). Rosters on each game date come from the roster index, so only
+    the week's games and the candidates' names and positions are queried.
+    """
+    roster_index = roster_index or get_roster_index()
+    games = (
+        db.session.query(Game.id, Game.date, Game.home_team_id, Game.away_team_id)
+        .filter(Game.date >= start_date, Game.date <= end_date)
+        .all()
+    )
+
+    rows = []
+    for game_id, game_date, home_team_id, away_team_id in games:
+        for team_id, opponent_team_id in ((home_team_id, away_team_id), (away_team_id, home_team_id)):
+            for player_id in roster_index.players_on(team_id, game_date):
+                # A player with overlapping spells only plays for the latest one
+                if roster_index.team_of(player_id, game_date) == team_id:
+                    rows.append((player_id, team_id, opponent_team_id, game_id, game_date))
+    candidates = pd.DataFrame(rows, columns=['player_id', 'team_id', 'opponent_team_id', 'game_id', 'date'])
+
+    players = pd.DataFrame(
+        db.session.query(Player.id, Player.name, Player.position)
+        .filter(Player.position.in_(positions))
+        .filter(Player.id.in_(candidates['player_id'].unique().tolist()))
+        .all(),
+        columns=['player_id', 'name', 'position']
+    )
+    candidates = candidates.merge(players, on='player_id', how='inner')
+    return candidates.drop_duplicates(subset=['player_id', 'game_id'])
+
+
+def projected_points(projections_df, rules=STANDARD):
+    """Fantasy points for every row of projected stats (stats a position doesn't project count as 0)."""
+    return rules.score(projections_df)
+
+
+PROJECTION_COLUMNS = ['player_id', 'name', 'position', 'team_id', 'opponent_team_id', 'game_id', 'date']
+
+
+def predict_candidates(candidates_df, position, artifact):
+    """
+    Build features for every candidate of one position and predict them with one predict per model.
+    Returns PROJECTION_COLUMNS and one column per target stat.
+    """
+    candidates_df = candidates_df[candidates_df['position'] == position]
+    if candidates_df.empty:
+        return candidates_df
+
+    # Precomputed snapshots: no raw stat lines are read while projecting
+    player_history_df = load_player_rolling_frame(position)
+    defense_df = load_defense_frame(position)
+    features = compute_asof_features(player_history_df, candidates_df, position, defense_df)
+
+    # Players without any history can't be projected
+    features = features.dropna(subset=artifact["feature_columns"], how='all')
+    if features.empty:
+        return features
+
+    return features[PROJECTION_COLUMNS].join(predict_frame(artifact, features))
+
+
+def project_position(candidates_df, position, artifact, rules=STANDARD):
+    """Projected stats and fantasy points of every candidate of one position."""
+    predicted = predict_candidates(candidates_df, position, artifact)
+    if predicted.empty:
+        return predicted
+
+    predictions = predicted[artifact["target_stats"]]
+    projected = predicted[PROJECTION_COLUMNS].assign(projections=predictions.round(2).to_dict(orient='records'))
+    return projected.assign(projected_points=projected_points(predictions, rules).round(2))
+
+
+def project_week(season, week, position=None, limit=50, rules=STANDARD):
+    """
+    Ranked projections for every rostered player with a game in a week of a season, by fantasy points under rules.
+    Raises ModelsNotTrainedError when a requested position has no stored models.
+    """
+    positions = [position] if position else PROJECTABLE_POSITIONS
+    start_date, end_date = season_week_range(season, week)
+    if start_date is None:
+        return []
+
+    artifacts = {}
+    for pos in positions:
+        artifacts[pos] = load_cached_models(pos)
+        if artifacts[pos] is None:
+            raise ModelsNotTrainedError(f"No trained models for position {pos}")
+
+    candidates = load_week_candidates(start_date, end_date, positions)
+    projected = [project_position(candidates, pos, artifacts[pos], rules) for pos in positions]
+    projected = [df for df in projected if not df.empty]
+    if not projected:
+        return []
+
+    return rank_projections(pd.concat(projected, ignore_index=True), limit)
+
+
+def rank_projections(projected_df, limit=50):
+    """Projections ordered by fantasy points (the top `limit`), as JSON-ready records."""
+    ranked = projected_df.sort_values('projected_points', ascending=False, kind='stable')
+    if limit:
+        ranked = ranked.head(limit)
+
+    ranked = ranked.assign(date=pd.to_datetime(ranked['date']).dt.strftime("%Y-%m-%d"))
+    return ranked.to_dict(orient='records')
@@ -0,0 +1,133 @@
+# ffa_flask_app/app/raw_cache.py
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+
+class RawResponseCache:
+    """
+    On-disk store of raw api-sports json responses.
+    Each response is gzipped under a name derived from a hash of its endpoint and params,
+    so the same request always maps to the same file, in one directory per endpoint:
+
+        <directory>/<endpoint, e.g. games-statistics-players>/<key[:2]>/<key>.json.gz
+
+    The file also records the endpoint and params, which lets replay walk every stored response
+    of an endpoint without opening the others. Files of the older layout without the endpoint
+    directory (<directory>/<key[:2]>/<key>.json.gz) are still read, and moved on the first walk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def normalize_params(params):
+        # {"id": 5} and {"id": "5"} are the same request
+        return {str(name): str(value) for name, value in sorted((params or {}).items())}
+
+    @classmethod
+    def key(cls, endpoint, params):
+        canonical = json.dumps(
+            {"endpoint": endpoint, "params": cls.normalize_params(params)},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def endpoint_directory(self, endpoint):
+        return os.path.join(self.directory, endpoint.strip("/").replace("/", "-"))
+
+    def path(self, endpoint, key):
+        return os.path.join(self.endpoint_directory(endpoint), key[:2], f"{key}.json.gz")
+
+    def legacy_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    def contains(self, endpoint, params):
+        key = self.key(endpoint, params)
+        return os.path.exists(self.path(endpoint, key)) or os.path.exists(self.legacy_path(key))
+
+    @staticmethod
+    def _read(path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get(self, endpoint, params):
+        """Return the stored json for a request, or None on a miss."""
+        key = self.key(endpoint, params)
+        for path in (self.path(endpoint, key), self.legacy_path(key)):
+            try:
+                return self._read(path)["data"]
+            except FileNotFoundError:
+                continue
+        return None
+
+    def put(self, endpoint, params, data):
+        """Store a response. Written to a temp file first so readers never see a partial entry."""
+        key = self.key(endpoint, params)
+        path = self.path(endpoint, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {"endpoint": endpoint, "params": self.normalize_params(params), "data": data}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return key
+
+    def _legacy_directories(self):
+        # Endpoint directories are named after endpoints, never two hex digits like key prefixes
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+                and os.path.isdir(os.path.join(self.directory, name))]
+
+    def migrate_legacy_entries(self):
+        """Move files of the older layout into their endpoint's directory (each is opened once). Returns how many."""
+        moved = 0
+        for legacy_directory in self._legacy_directories():
+            for name in sorted(os.listdir(legacy_directory)):
+                if not name.endswith(".json.gz"):
+                    continue
+                legacy_path = os.path.join(legacy_directory, name)
+                try:
+                    path = self.path(self._read(legacy_path)["endpoint"], name[:-len(".json.gz")])
+                    if os.path.exists(path):
+                        os.unlink(legacy_path)  # Fetched again since, the older copy is stale
+                        continue
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(legacy_path, path)
+                except FileNotFoundError:
+                    continue  # Moved by another process meanwhile
+                moved += 1
+            try:
+                os.rmdir(legacy_directory)
+            except OSError:
+                pass  # Not empty (e.g. a temp file)
+        return moved
+
+    def entries(self, endpoint=None):
+        """
+        Yield (endpoint, params, data) for every stored response, optionally for one endpoint.
+        Only that endpoint's directory is walked, so other endpoints' files are never opened.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        self.migrate_legacy_entries()
+        if endpoint is not None:
+            roots = [self.endpoint_directory(endpoint)]
+        else:
+            roots = [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))]
+        for top in roots:
+            for root, _, files in os.walk(top):
+                for name in sorted(files):
+                    if not name.endswith(".json.gz"):
+                        continue
+                    entry = self._read(os.path.join(root, name))
+                    yield entry["endpoint"], entry["params"], entry["data"]
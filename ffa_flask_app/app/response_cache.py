@@ -0,0 +1,244 @@
+# ffa_flask_app/app/response_cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, make_response
+
+from app.data_version import get_data_version
+
+
+class CacheStats:
+    """Hit/miss/eviction counters shared by every backend (per process)."""
+
+    FIELDS = ("hits", "misses", "stores", "evictions", "expirations", "invalidations")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = round(counts["hits"] / lookups, 4) if lookups else None
+        return counts
+
+
+class LocalResponseCache:
+    """
+    In-process LRU cache with a per-entry TTL. Entries carry tags so every entry
+    derived from some data (e.g. "players") can be dropped at once.
+    Also stands in for a shared backend (same interface) where no server is available.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}                # tag -> keys
+
+    def _drop(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            if entry[0] <= self.clock():
+                self._drop(key)
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+            self.stats.incr("hits")
+            return entry[2]
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (self.clock() + ttl, tuple(tags), value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self.stats.incr("stores")
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats.incr("evictions")
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the tags; returns how many were dropped."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            self.stats.incr("invalidations", len(keys))
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def info(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"backend": "local", "entries": size, "max_entries": self.max_entries,
+                "default_ttl": self.default_ttl, **self.stats.snapshot()}
+
+
+class RedisResponseCache:
+    """
+    Shared cache kept in Redis, so every web worker sees the same entries and an import in
+    another process can invalidate them. Tags are Redis sets of the keys carrying them.
+    `client` is anything with the redis-py get/set/sadd/smembers/expire/delete methods.
+    """
+
+    def __init__(self, client, default_ttl=300, prefix="ffa:response:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_url(cls, url, default_ttl=300):
+        import redis  # Only needed when RESPONSE_CACHE_BACKEND is "redis"
+        return cls(redis.Redis.from_url(url), default_ttl=default_ttl)
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.incr("misses")
+            return None
+        self.stats.incr("hits")
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+        for tag in tags:
+            self.client.sadd(self._tag_key(tag), self.prefix + key)
+            self.client.expire(self._tag_key(tag), ttl)
+        self.stats.incr("stores")
+
+    def invalidate_tags(self, tags):
+        keys = set()
+        for tag in tags:
+            keys |= set(self.client.smembers(self._tag_key(tag)))
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(*[self._tag_key(tag) for tag in tags])
+        self.stats.incr("invalidations", len(keys))
+        return len(keys)
+
+    def clear(self):
+        pass  # Entries expire on their own; use invalidate_tags for targeted drops
+
+    def info(self):
+        return {"backend": "redis", "default_ttl": self.default_ttl, **self.stats.snapshot()}
+
+
+class NullResponseCache(LocalResponseCache):
+    """Caching turned off: nothing is ever stored."""
+
+    def __init__(self):
+        super().__init__(max_entries=0, default_ttl=0)
+
+    def set(self, key, value, ttl=None, tags=()):
+        pass
+
+    def info(self):
+        return {"backend": "none", **self.stats.snapshot()}
+
+
+def create_response_cache(config):
+    backend = config["RESPONSE_CACHE_BACKEND"]
+    if backend == "local":
+        return LocalResponseCache(config["RESPONSE_CACHE_MAX_ENTRIES"], config["RESPONSE_CACHE_TTL"])
+    if backend == "redis":
+        return RedisResponseCache.from_url(config["RESPONSE_CACHE_URL"], config["RESPONSE_CACHE_TTL"])
+    if backend == "none":
+        return NullResponseCache()
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {backend}")
+
+
+def get_response_cache():
+    """The response cache created with the app (see create_app)."""
+    return current_app.extensions["response_cache"]
+
+
+def invalidate_response_cache(*tags):
+    """Drop cached responses built from data that just changed. Call after committing."""
+    dropped = get_response_cache().invalidate_tags(tags)
+    current_app.logger.debug(f"Invalidated {dropped} cached responses tagged {tags}")
+    return dropped
+
+
+def _request_key():
+    """Route, sorted query args, negotiated format and data version."""
+    version = g.data_version[0] if 'data_version' in g else get_data_version()[0]
+    args = "&".join(f"{name}={value}" for name, value in sorted(request.args.items(multi=True)))
+    accept = request.accept_mimetypes.best or ""
+    return f"v{version}:{request.endpoint}:{request.path}?{args}:{accept}"
+
+
+def cached_response(tags, ttl=None):
+    """
+    Cache a GET view's successful, non-streamed responses under its route and query args.
+    The key includes the data version, so a bump from another process also retires old entries;
+    tags let imports drop them right away (see invalidate_response_cache).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            key = _request_key()
+
+            cached = cache.get(key)
+            if cached is not None:
+                response = make_response(cached["body"], cached["status"])
+                response.headers["Content-Type"] = cached["content_type"]
+                response.headers["X-Cache"] = "HIT"
+                for name, value in cached["headers"].items():
+                    response.headers[name] = value
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, {
+                    "status": response.status_code,
+                    "content_type": response.content_type,
+                    "body": response.get_data(as_text=True),
+                    # View-specific headers worth replaying (pagination cursors)
+                    "headers": {name: response.headers[name] for name in ("Link", "X-Next-After-Id")
+                                if name in response.headers},
+                }, ttl=ttl, tags=tags)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
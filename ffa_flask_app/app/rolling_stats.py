@@ -0,0 +1,93 @@
+# ffa_flask_app/app/rolling_stats.py
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import func, select, union_all
+
+from app import db
+from app.models import Game, PlayerGame, PlayerRollingStat, insert_ignore
+from app.features import STATS, SNAPSHOT_WINDOWS
+
+
+def load_player_game_history(player_ids=None, since=None, prior_games=0):
+    """
+    Every dated stat line (of the given players, or of everyone) with its game date. With since,
+    only the lines from that date on plus each player's last prior_games lines before it, which is
+    all their trailing windows from that date need.
+    """
+    stats = [getattr(PlayerGame, stat) for stat in STATS]
+    query = (
+        select(PlayerGame.player_id, PlayerGame.game_id, Game.date, *stats)
+        .join(Game, PlayerGame.game_id == Game.id)
+        .where(Game.date.isnot(None))
+    )
+    if player_ids is not None:
+        query = query.where(PlayerGame.player_id.in_(player_ids))
+    if since is not None:
+        recency = func.row_number().over(partition_by=PlayerGame.player_id,
+                                         order_by=(Game.date.desc(), PlayerGame.game_id.desc()))
+        earlier = query.where(Game.date < since).add_columns(recency.label('recency')).subquery()
+        query = union_all(
+            query.where(Game.date >= since),
+            select(*[earlier.c[name] for name in ['player_id', 'game_id', 'date', *STATS]])
+            .where(earlier.c.recency <= prior_games),
+        )
+    return pd.DataFrame(db.session.execute(query).all(), columns=['player_id', 'game_id', 'date', *STATS])
+
+
+def compute_rolling_snapshots(history_df):
+    """3- and 8-game trailing averages of every player after each of their games."""
+    ordered = history_df.sort_values(['player_id', 'date'], kind='stable')
+    ordered = ordered.assign(**{stat: ordered[stat].fillna(0) for stat in STATS})
+
+    snapshots = ordered[['player_id', 'game_id', 'date']].copy()
+    for window in SNAPSHOT_WINDOWS:
+        averages = (
+            ordered.groupby('player_id')[STATS]
+            .rolling(window=window).mean()
+            .reset_index(level=0, drop=True)
+        )
+        for stat in STATS:
+            snapshots[f"avg{window}_{stat}"] = averages[stat]
+    return snapshots
+
+
+def _snapshot_rows(snapshots_df):
+    # NaN (not enough games yet) is stored as NULL
+    snapshots_df = snapshots_df.astype(object).where(snapshots_df.notna(), None)
+    return snapshots_df.to_dict(orient='records')
+
+
+def record_game_rolling_stats(game_id, player_ids):
+    """
+    Refresh the snapshots of the players in a game that was just ingested, from that game's date
+    onward (later snapshots shift too if an older game arrives late). Only the games the windows
+    need before that date are read. Does not commit.
+    """
+    game = db.session.get(Game, game_id)
+    if not game or not game.date or not player_ids:
+        return 0
+
+    history = load_player_game_history(player_ids, since=game.date, prior_games=max(SNAPSHOT_WINDOWS) - 1)
+    snapshots = compute_rolling_snapshots(history)
+    snapshots = snapshots[snapshots['date'] >= game.date]
+
+    (PlayerRollingStat.query
+     .filter(PlayerRollingStat.player_id.in_(player_ids), PlayerRollingStat.date >= game.date)
+     .delete(synchronize_session=False))
+    insert_ignore(PlayerRollingStat, _snapshot_rows(snapshots))
+    return len(snapshots)
+
+
+def rebuild_player_rolling_stats(batch_size=5000):
+    """Recompute every snapshot from PlayerGame history."""
+    PlayerRollingStat.query.delete(synchronize_session=False)
+
+    snapshots = compute_rolling_snapshots(load_player_game_history())
+    rows = _snapshot_rows(snapshots)
+    for start in range(0, len(rows), batch_size):
+        insert_ignore(PlayerRollingStat, rows[start:start + batch_size])
+
+    db.session.commit()
+    current_app.logger.info(f"Rebuilt {len(rows)} PlayerRollingStat rows")
+    return len(rows)
@@ -0,0 +1,185 @@
+# ffa_flask_app/app/roster_index.py
+
+import threading
+from bisect import bisect_right, insort
+from collections import Counter
+from datetime import date
+from operator import itemgetter
+
+from flask import current_app, g
+
+from app import db
+from app.data_version import get_roster_version
+from app.models import PlayerTeam
+
+OPEN_END = date.max  # end_date of a spell that hasn't ended
+_start = itemgetter(0)
+
+
+class _Timeline:
+    """
+    The spells of one team flattened into consecutive segments, each holding the players
+    active over it, so "who was on the team on date D" is a single bisect.
+    """
+
+    def __init__(self, spells):
+        # Roster changes when a spell starts, and the day after one ends
+        starts = sorted((start, player_id) for start, _, player_id in spells)
+        stops = sorted((date.fromordinal(end.toordinal() + 1), player_id)
+                       for _, end, player_id in spells if end != OPEN_END)
+        boundaries = sorted({start for start, _ in starts} | {stop for stop, _ in stops})
+
+        self.dates, self.rosters = [], []
+        active = Counter()
+        start_pos = stop_pos = 0
+        for boundary in boundaries:
+            while stop_pos < len(stops) and stops[stop_pos][0] <= boundary:
+                active[stops[stop_pos][1]] -= 1
+                stop_pos += 1
+            while start_pos < len(starts) and starts[start_pos][0] <= boundary:
+                active[starts[start_pos][1]] += 1
+                start_pos += 1
+            self.dates.append(boundary)
+            self.rosters.append(tuple(sorted(player_id for player_id, count in active.items() if count > 0)))
+
+    def roster_on(self, on_date):
+        position = bisect_right(self.dates, on_date) - 1
+        return self.rosters[position] if position >= 0 else ()
+
+
+class RosterIndex:
+    """
+    Every PlayerTeam spell held in memory, answering "team of player P on date D" and
+    "players on team T on date D" with a bisect instead of a range query per lookup.
+
+    Spells are kept per player as (start, end, team_id) tuples sorted by start. Each team's
+    spells are flattened into a timeline of rosters, rebuilt lazily after spells are added.
+    When spells overlap (e.g. an open spell that was never closed), the latest start wins,
+    like resolve_teams_on_date always did.
+    """
+
+    def __init__(self):
+        self._players = {}    # player_id -> [(start, end, team_id)] sorted by start
+        self._teams = {}      # team_id -> [(start, end, player_id)]
+        self._timelines = {}  # team_id -> _Timeline, dropped when the team's spells change
+        self._lock = threading.RLock()
+        self.version = None  # (spells, rewrites) roster counters the spells were loaded at
+        self.max_id = 0       # Highest PlayerTeam id loaded
+
+    @staticmethod
+    def current_version():
+        """
+        PlayerTeam's (spells, rewrites) counters (see bump_roster_version): every write adding
+        spells bumps the first, closing, moving or deleting them also bumps the second.
+        """
+        return get_roster_version()
+
+    def _load_rows(self):
+        """Add the PlayerTeam rows with ids past the highest loaded one."""
+        rows = (db.session.query(PlayerTeam.id, PlayerTeam.player_id, PlayerTeam.team_id,
+                                 PlayerTeam.start_date, PlayerTeam.end_date)
+                .filter(PlayerTeam.id > self.max_id)
+                .all())
+        if rows:
+            self.max_id = max(row[0] for row in rows)
+        return self.add(row[1:] for row in rows)
+
+    @classmethod
+    def load(cls):
+        """Build the index from every PlayerTeam row (two queries)."""
+        index = cls()
+        index.version = cls.current_version()
+        index._load_rows()
+        return index
+
+    def add(self, spells):
+        """
+        Add (player_id, team_id, start_date, end_date) spells, e.g. right after inserting them.
+        Spells already in the index are skipped.
+        """
+        added = 0
+        with self._lock:
+            for player_id, team_id, start_date, end_date in spells:
+                if start_date is None:
+                    continue
+                end_date = end_date or OPEN_END
+                player_spells = self._players.setdefault(player_id, [])
+                if (start_date, end_date, team_id) in player_spells:
+                    continue
+                insort(player_spells, (start_date, end_date, team_id), key=_start)
+                self._teams.setdefault(team_id, []).append((start_date, end_date, player_id))
+                self._timelines.pop(team_id, None)
+                added += 1
+        return added
+
+    def refresh(self):
+        """
+        Catch up with the database: when spells were only added since the last load, the rows
+        past the highest loaded id are added; when spells were closed, moved or deleted (which
+        ids can't tell), every spell is reloaded. Returns the number of spells loaded, 0 when
+        nothing changed.
+        """
+        version = self.current_version()
+        with self._lock:
+            if version == self.version:
+                return 0
+
+            # Before the first write the counters' rows don't exist yet, nor their row lock
+            if self.version is None or version[1] != self.version[1] or self.version[0] == 0:
+                self._players, self._teams, self._timelines, self.max_id = {}, {}, {}, 0
+            loaded = self._load_rows()
+            self.version = version
+            return loaded
+
+    def team_of(self, player_id, on_date):
+        """Team the player was on at a date, or None."""
+        spells = self._players.get(player_id)
+        if not spells:
+            return None
+        position = bisect_right(spells, on_date, key=_start) - 1
+        # Walk back past spells that started earlier but had already ended
+        while position >= 0:
+            _, end_date, team_id = spells[position]
+            if end_date >= on_date:
+                return team_id
+            position -= 1
+        return None
+
+    def spells_of(self, player_id):
+        """The player's (start_date, end_date, team_id) spells sorted by start; end_date None while open."""
+        return [(start, None if end == OPEN_END else end, team_id)
+                for start, end, team_id in self._players.get(player_id, [])]
+
+    def teams_of(self, player_ids, dates):
+        """team_of for many (player, date) pairs at once; None where there's no spell."""
+        return [self.team_of(player_id, on_date) for player_id, on_date in zip(player_ids, dates)]
+
+    def players_on(self, team_id, on_date):
+        """Ids of the players on a team at a date, sorted."""
+        timeline = self._timelines.get(team_id)
+        if timeline is None:
+            with self._lock:
+                timeline = self._timelines.get(team_id)
+                if timeline is None:
+                    timeline = _Timeline(self._teams.get(team_id, []))
+                    self._timelines[team_id] = timeline
+        return list(timeline.roster_on(on_date))
+
+    def __len__(self):
+        return sum(len(spells) for spells in self._players.values())
+
+
+def get_roster_index():
+    """
+    The app's shared RosterIndex: loaded on first use, then checked against the roster counters
+    once per request or job (once per app context), so spells written by imports in other
+    processes show up and lookups in a loop cost nothing. bump_roster_version() clears the check,
+    so a job that writes spells sees them on its next call.
+    """
+    index = current_app.extensions.get("roster_index")
+    if index is None:
+        index = current_app.extensions["roster_index"] = RosterIndex.load()
+    elif not g.get("roster_index_checked"):
+        index.refresh()
+    g.roster_index_checked = True
+    return index
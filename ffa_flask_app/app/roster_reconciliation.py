@@ -0,0 +1,270 @@
+# ffa_flask_app/app/roster_reconciliation.py
+
+from datetime import timedelta
+
+import pandas as pd
+from flask import current_app
+from sqlalchemy import and_, bindparam, exists, or_, select, update, delete
+
+from app import db
+from app.data_version import bump_roster_version
+from app.models import Game, Player, PlayerGame, PlayerTeam, Team, insert_ignore
+
+BOX_SCORE_ENDPOINT = "/games/statistics/players"
+REPORT_COLUMNS = ['player_id', 'name', 'game_id', 'date', 'home_team', 'away_team', 'box_score_team', 'reason']
+
+
+def box_score_teams(data):
+    """player_id -> team_id from a raw /games/statistics/players response (first team a player is listed under)."""
+    teams = {}
+    for team_data in data.get('response', []):
+        team_id = team_data['team']['id']
+        for group in team_data.get('groups', []):
+            for player_data in group.get('players', []):
+                teams.setdefault(player_data['player']['id'], team_id)
+    return teams
+
+
+def backfill_box_score_teams(cache):
+    """
+    Fill PlayerGame.team_id for rows ingested before it was stored, from the cached box scores.
+    One executemany UPDATE; rows that already have a team are left alone. Does not commit.
+    """
+    rows = [
+        {'b_player_id': player_id, 'b_game_id': int(params['id']), 'b_team_id': team_id}
+        for _, params, data in cache.entries(BOX_SCORE_ENDPOINT)
+        for player_id, team_id in box_score_teams(data).items()
+    ]
+    if not rows:
+        return 0
+
+    player_games = PlayerGame.__table__
+    result = db.session.execute(
+        update(player_games)
+        .where(player_games.c.player_id == bindparam('b_player_id'),
+               player_games.c.game_id == bindparam('b_game_id'),
+               player_games.c.team_id.is_(None))
+        .values(team_id=bindparam('b_team_id')),
+        rows,
+    )
+    current_app.logger.info(f"Backfilled the box-score team of {result.rowcount} player games")
+    return result.rowcount
+
+
+def covering_spell():
+    """EXISTS a PlayerTeam spell of the box score's player, for either team of the game, on the game's date."""
+    return exists().where(
+        PlayerTeam.player_id == PlayerGame.player_id,
+        or_(PlayerTeam.team_id == Game.home_team_id, PlayerTeam.team_id == Game.away_team_id),
+        PlayerTeam.start_date <= Game.date,
+        or_(PlayerTeam.end_date.is_(None), PlayerTeam.end_date >= Game.date),
+    )
+
+
+def uncovered_player_games_query():
+    """(player_id, game_id) of every dated box score no spell covers, as a single anti-join."""
+    return (select(PlayerGame.player_id, PlayerGame.game_id)
+            .join(Game, PlayerGame.game_id == Game.id)
+            .filter(Game.date.isnot(None), ~covering_spell()))
+
+
+def load_affected_games():
+    """
+    Every dated game of the players with at least one uncovered box score (covered games are needed
+    too, to tell where spells start and end), oldest first per player.
+    Columns: player_id, game_id, date, home_team_id, away_team_id, box_team_id, uncovered.
+    """
+    affected_players = (uncovered_player_games_query()
+                        .with_only_columns(PlayerGame.player_id)
+                        .distinct()
+                        .correlate(None))
+    rows = db.session.execute(
+        select(PlayerGame.player_id, PlayerGame.game_id, Game.date, Game.home_team_id, Game.away_team_id,
+               PlayerGame.team_id.label('box_team_id'), (~covering_spell()).label('uncovered'))
+        .join(Game, PlayerGame.game_id == Game.id)
+        .filter(Game.date.isnot(None), PlayerGame.player_id.in_(affected_players))
+        .order_by(PlayerGame.player_id, Game.date, PlayerGame.game_id)
+    ).all()
+    return pd.DataFrame(rows, columns=['player_id', 'game_id', 'date', 'home_team_id', 'away_team_id',
+                                       'box_team_id', 'uncovered'])
+
+
+def resolve_game_teams(games_df, roster_index):
+    """
+    The team of every row of load_affected_games, in order of trust: the box-score team, the spell
+    team on the date, then the player's previous or next known team, when exactly one of those
+    played in the game. Returns (resolved rows with team_id, ambiguous rows with a reason).
+    """
+    def in_game(teams):
+        return (teams == games_df['home_team_id']) | (teams == games_df['away_team_id'])
+
+    box = games_df['box_team_id'].astype('float')
+    spell = pd.Series(roster_index.teams_of(games_df['player_id'].tolist(), games_df['date'].tolist()),
+                      index=games_df.index, dtype='float')
+    team = box.where(in_game(box)).fillna(spell.where(in_game(spell)))
+
+    by_player = team.groupby(games_df['player_id'])
+    previous, following = by_player.ffill(), by_player.bfill()
+    previous_played, following_played = in_game(previous), in_game(following)
+    neighbour = previous.where(previous_played & (~following_played | (previous == following)),
+                               following.where(following_played & ~previous_played))
+    team = team.fillna(neighbour)
+
+    unresolved = team.isna()
+    reason = pd.Series('no box-score team and no known team played in the game', index=games_df.index)
+    reason = reason.mask(previous_played & following_played, 'played between the two teams it moved between')
+    reason = reason.mask(box.notna() & ~in_game(box), 'box-score team did not play in the game')
+
+    resolved = games_df[~unresolved].assign(team_id=team[~unresolved].astype(int))
+    ambiguous = games_df[unresolved & games_df['uncovered']].assign(reason=reason[unresolved])
+    return resolved, ambiguous
+
+
+def plan_spells(resolved_df, roster_index):
+    """
+    The spells each affected player should have: one per run of consecutive games with the same
+    team. A run keeps the start of an existing spell of its team that covers its first game (and
+    starts after the previous run), ends the day before the next run or kept spell starts, and
+    the last run keeps the end of the spell covering its last game. Existing spells no box score
+    contradicts (e.g. a signing with no games yet, or a stint without box scores) are kept as they are.
+    Returns player_id -> [(start_date, end_date, team_id)].
+    """
+    player_ids = resolved_df['player_id']
+    new_run = (resolved_df['team_id'] != resolved_df.groupby('player_id')['team_id'].shift()) | (
+        player_ids != player_ids.shift())
+    runs = (resolved_df.groupby(new_run.cumsum())
+            .agg(player_id=('player_id', 'first'), team_id=('team_id', 'first'),
+                 first_date=('date', 'min'), last_date=('date', 'max')))
+    games_by_player = {
+        player_id: list(zip(games['date'], games['team_id']))
+        for player_id, games in resolved_df.groupby('player_id', sort=False)
+    }
+
+    plans = {}
+    for player_id, player_runs in runs.groupby('player_id', sort=False):
+        existing = roster_index.spells_of(player_id)
+        games = games_by_player[player_id]
+
+        def covering(team_id, on_date):
+            return [spell for spell in existing if spell[2] == team_id and spell[0] <= on_date
+                    and (spell[1] is None or spell[1] >= on_date)]
+
+        def contradicted(spell):
+            start, end, team_id = spell
+            return any(start <= on_date and (end is None or on_date <= end) and team != team_id
+                       for on_date, team in games)
+
+        kept = [spell for spell in existing if not contradicted(spell)]
+
+        runs_list = list(player_runs.itertuples(index=False))
+        starts = []
+        for position, run in enumerate(runs_list):
+            previous_game = runs_list[position - 1].last_date if position else None
+            reused = [spell[0] for spell in covering(run.team_id, run.first_date)
+                      if previous_game is None or spell[0] > previous_game]
+            starts.append(min([run.first_date] + reused))
+
+        spells = []
+        for position, run in enumerate(runs_list):
+            following = [spell[0] for spell in kept if spell[2] != run.team_id and spell[0] > run.last_date]
+            if position + 1 < len(runs_list):
+                end = min([starts[position + 1]] + following) - timedelta(days=1)
+            else:
+                covers = covering(run.team_id, run.last_date)
+                end = None if not covers or any(spell[1] is None for spell in covers) else max(spell[1] for spell in covers)
+                if following:
+                    next_start = min(following) - timedelta(days=1)
+                    end = next_start if end is None else min(end, next_start)
+            spells.append((starts[position], end, int(run.team_id)))
+
+        planned = {(team_id, start) for start, _, team_id in spells}
+        plans[player_id] = spells + [spell for spell in kept if (spell[2], spell[0]) not in planned]
+    return plans
+
+
+def diff_spells(plans, roster_index):
+    """
+    Compare planned spells with the current ones, matched on (team, start date); only spells the
+    plan dropped (those a box score contradicts) are deleted.
+    Returns (spells to insert, (spell, new end date) pairs to update, spells to delete).
+    """
+    to_insert, to_update, to_delete = [], [], []
+    for player_id, planned in plans.items():
+        current = {(team_id, start): end for start, end, team_id in roster_index.spells_of(player_id)}
+        wanted = {(team_id, start): end for start, end, team_id in planned}
+        for (team_id, start), end in wanted.items():
+            if (team_id, start) not in current:
+                to_insert.append((player_id, team_id, start, end))
+            elif current[(team_id, start)] != end:
+                to_update.append(((player_id, team_id, start), end))
+        to_delete.extend((player_id, team_id, start) for team_id, start in current if (team_id, start) not in wanted)
+    return to_insert, to_update, to_delete
+
+
+def apply_spell_changes(to_insert, to_update, to_delete):
+    """Write the diff with one statement per kind of change. Does not commit."""
+    if to_insert or to_update or to_delete:
+        bump_roster_version(rewrite=bool(to_update or to_delete))
+    player_teams = PlayerTeam.__table__
+    match_spell = and_(player_teams.c.player_id == bindparam('b_player_id'),
+                       player_teams.c.team_id == bindparam('b_team_id'),
+                       player_teams.c.start_date == bindparam('b_start_date'))
+    if to_delete:
+        db.session.execute(
+            delete(player_teams).where(match_spell),
+            [{'b_player_id': p, 'b_team_id': t, 'b_start_date': s} for p, t, s in to_delete],
+        )
+    if to_update:
+        db.session.execute(
+            update(player_teams).where(match_spell).values(end_date=bindparam('b_end_date')),
+            [{'b_player_id': p, 'b_team_id': t, 'b_start_date': s, 'b_end_date': end}
+             for (p, t, s), end in to_update],
+        )
+    insert_ignore(PlayerTeam, [
+        {'player_id': p, 'team_id': t, 'start_date': s, 'end_date': end} for p, t, s, end in to_insert
+    ])
+
+
+def ambiguity_report(ambiguous_df):
+    """Ambiguous box scores with player and team names, for manual review."""
+    if ambiguous_df.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    names = dict(db.session.query(Player.id, Player.name)
+                 .filter(Player.id.in_(ambiguous_df['player_id'].unique().tolist())).all())
+    teams = dict(db.session.query(Team.id, Team.name).all())
+    return pd.DataFrame({
+        'player_id': ambiguous_df['player_id'],
+        'name': ambiguous_df['player_id'].map(names),
+        'game_id': ambiguous_df['game_id'],
+        'date': ambiguous_df['date'],
+        'home_team': ambiguous_df['home_team_id'].map(teams),
+        'away_team': ambiguous_df['away_team_id'].map(teams),
+        'box_score_team': ambiguous_df['box_team_id'].map(teams),
+        'reason': ambiguous_df['reason'],
+    })[REPORT_COLUMNS]
+
+
+def reconcile_rosters(roster_index, dry_run=False):
+    """
+    Make every box score covered by a spell of a team in its game, inferring teams from the
+    box scores: one anti-join finds the affected players, their spells are re-planned as runs of
+    games with the same team and written back in bulk. Does not commit.
+    Returns (summary dict, ambiguity report DataFrame).
+    """
+    games_df = load_affected_games()
+    summary = {'players': int(games_df['player_id'].nunique()) if not games_df.empty else 0,
+               'uncovered_games': int(games_df['uncovered'].sum()) if not games_df.empty else 0,
+               'opened': 0, 'updated': 0, 'removed': 0, 'ambiguous': 0}
+    if games_df.empty:
+        return summary, ambiguity_report(games_df)
+
+    resolved, ambiguous = resolve_game_teams(games_df, roster_index)
+    to_insert, to_update, to_delete = diff_spells(plan_spells(resolved, roster_index), roster_index)
+    summary.update(opened=len(to_insert), updated=len(to_update), removed=len(to_delete), ambiguous=len(ambiguous))
+
+    if not dry_run:
+        apply_spell_changes(to_insert, to_update, to_delete)
+        roster_index.add(to_insert)  # Updates and deletes are picked up by refresh()
+
+    current_app.logger.info(f"Roster reconciliation{' (dry run)' if dry_run else ''}: {summary}")
+    return summary, ambiguity_report(ambiguous)
@@ -3,9 +3,17 @@
 
 from .players import players_bp
 from .teams import teams_bp  # Import additional blueprints here
+from .projections import projections_bp
+from .fantasy import fantasy_bp
+from .cache import cache_bp
+from .metrics import metrics_bp
 
 # Create a list of all blueprints to simplify registration
 all_blueprints = [
     (players_bp, '/api/players'),  # Blueprint with URL prefix
     (teams_bp, '/api/teams'),      # Additional blueprints and their prefixes
+    (projections_bp, '/api/projections'),
+    (fantasy_bp, '/api/fantasy'),
+    (cache_bp, '/api/cache'),
+    (metrics_bp, ''),              # Internal: /metrics for Prometheus
 ]
@@ -0,0 +1,12 @@
+# ffa_flask_app/app/routes/cache.py
+
+from flask import Blueprint, jsonify
+from app.response_cache import get_response_cache
+
+# Create a Blueprint for response cache routes
+cache_bp = Blueprint('cache', __name__)
+
+# Route to get the response cache's size and hit/miss counters
+@cache_bp.route('/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(get_response_cache().info()), 200
@@ -0,0 +1,61 @@
+# ffa_flask_app/app/routes/fantasy.py
+
+from flask import Blueprint, jsonify, current_app, request
+from app.data_version import add_conditional_get
+from app.response_cache import cached_response
+from app.scoring import parse_scoring, player_season_totals, season_leaderboard
+
+# Create a Blueprint for fantasy scoring routes
+fantasy_bp = Blueprint('fantasy', __name__)
+
+# 304 Not Modified until the next import bumps the data version
+add_conditional_get(fantasy_bp)
+
+
+def request_scoring():
+    """Scoring rules of the request (?scoring=ppr&weights=pass_tds:6&bonuses=rush_yards>=100:3)."""
+    return parse_scoring(request.args.get('scoring'), request.args.get('weights'), request.args.get('bonuses'))
+
+
+# Route to rank every player of a season by fantasy points
+# Totals are derived from player stats, so every ingest drops them with the 'players' tag
+@fantasy_bp.route('/leaderboard', methods=['GET'])
+@cached_response(tags=('players',))
+def get_leaderboard():
+    season = request.args.get('season', type=int)
+    position = request.args.get('position', type=str)
+    limit = request.args.get('limit', default=50, type=int)
+
+    if season is None:
+        return jsonify({"error": "season is required"}), 400
+    try:
+        rules = request_scoring()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        leaders = season_leaderboard(season, rules, position=position.upper() if position else None, limit=limit)
+        return jsonify({"season": season, "scoring": rules.describe(), "players": leaders}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error ranking season {season}: {e}")
+        return jsonify({"error": "An error occurred while ranking the season"}), 500
+
+
+# Route to get a player's fantasy points per season
+@fantasy_bp.route('/players/<int:player_id>', methods=['GET'])
+@cached_response(tags=('players',))
+def get_player_points(player_id):
+    try:
+        rules = request_scoring()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        totals = player_season_totals(player_id, rules)
+        if totals is None:
+            current_app.logger.warning(f"No stat lines for player with ID: {player_id}")
+            return jsonify({"error": "No games found for this player"}), 404
+        return jsonify({**totals, "scoring": rules.describe()}), 200
+    except Exception as e:
+        current_app.logger.error(f"Error scoring player with ID {player_id}: {e}")
+        return jsonify({"error": "An error occurred while scoring the player"}), 500
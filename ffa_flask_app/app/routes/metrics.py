@@ -0,0 +1,36 @@
+# ffa_flask_app/app/routes/metrics.py
+
+import hmac
+import ipaddress
+
+from flask import Blueprint, Response, abort, current_app, request
+from app.metrics import get_metrics
+
+# Create a Blueprint for the internal metrics route
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _is_allowed(remote_addr):
+    """
+    With METRICS_TOKEN set, only requests carrying it as a bearer token; otherwise requests from
+    METRICS_ALLOWED_NETWORKS (behind a reverse proxy that needs PROXY_FIX_HOPS, or every request
+    looks like it comes from the proxy).
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        return hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+    try:
+        address = ipaddress.ip_address(remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network.strip(), strict=False)
+               for network in current_app.config["METRICS_ALLOWED_NETWORKS"] if network.strip())
+
+
+# Route to scrape request latency and SQL statement metrics (Prometheus text format)
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics_text():
+    if not _is_allowed(request.remote_addr):
+        abort(404)  # Internal only, don't advertise it
+    return Response(get_metrics().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,41 +1,78 @@
 # ffa_flask_app/app/routes/players.py
 
-from flask import Blueprint, jsonify, current_app
-from app.models import Player
+import json
+from urllib.parse import urlencode
+
+from flask import Blueprint, Response, jsonify, current_app, request, stream_with_context
+from app.data_version import add_conditional_get
+from app.response_cache import cached_response
+from app.players import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, parse_fields, get_players_page, get_player, iter_players
+)
 
 # Create a Blueprint for player routes
 players_bp = Blueprint('players', __name__)
 
-# Route to get all players
+JSON_LINES_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_json_lines():
+    return (request.args.get('format') == 'jsonl'
+            or request.accept_mimetypes.best == JSON_LINES_MIMETYPE)
+
+
+def negotiated_format():
+    return 'jsonl' if wants_json_lines() else 'json'
+
+
+# 304 Not Modified until the next import bumps the data version; JSON and JSON lines get their own ETags
+add_conditional_get(players_bp, representation=negotiated_format)
+
+
+# Route to list players, one keyset page at a time (or every player as a JSON-lines stream)
 @players_bp.route('/', methods=['GET'])
+@cached_response(tags=('players',))
 def get_all_players():
-    players = Player.query.all()
-    players_data = [
-        {
-            "id": player.id,
-            "name": player.name,
-            "position": player.position,
-            "team": player.team,  # Display the team name
-            "fantasy_points": player.fantasy_points
-        }
-        for player in players
-    ]
-    return jsonify(players_data)
+    position = request.args.get('position', type=str)
+    team_id = request.args.get('team_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+
+    try:
+        fields = parse_fields(request.args.get('fields', type=str))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    position = position.upper() if position else None
+
+    if wants_json_lines():
+        # Full dump: rows are streamed as they're read, so memory stays flat
+        lines = (json.dumps(player) + "\n" for player in iter_players(position, team_id, after_id, fields))
+        return Response(stream_with_context(lines), mimetype=JSON_LINES_MIMETYPE)
+
+    try:
+        players_data, next_after_id = get_players_page(position, team_id, after_id, limit, fields)
+    except Exception as e:
+        current_app.logger.error(f"Error listing players after ID {after_id}: {e}")
+        return jsonify({"error": "An error occurred while fetching players"}), 500
+
+    response = jsonify(players_data)
+    if next_after_id is not None:
+        # The body stays a plain list; the cursor for the next page travels in headers
+        response.headers['X-Next-After-Id'] = str(next_after_id)
+        args = {**request.args.to_dict(), 'after_id': next_after_id, 'limit': limit}
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
 
 # Route to get a specific player by ID
 @players_bp.route('/<int:player_id>', methods=['GET'])
+@cached_response(tags=('players',))
 def get_player_by_id(player_id):
     current_app.logger.debug(f"Received request to fetch player with ID: {player_id}")
     try:
-        player = Player.query.get(player_id)
-        if player:
-            player_data = {
-                "id": player.id,
-                "name": player.name,
-                "position": player.position,
-                "team": player.team,  # Display the team name
-                "fantasy_points": player.fantasy_points
-            }
+        player_data = get_player(player_id)
+        if player_data:
             current_app.logger.info(f"Player with ID {player_id} retrieved successfully.")
             return jsonify(player_data), 200
         else:
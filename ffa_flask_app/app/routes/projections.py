@@ -0,0 +1,51 @@
+# ffa_flask_app/app/routes/projections.py
+
+from flask import Blueprint, jsonify, current_app, request
+from app.modeling import PROJECTABLE_POSITIONS
+from app.projections import project_week, season_week_range, ModelsNotTrainedError
+from app.projection_store import load_stored_projections
+from app.scoring import parse_scoring
+
+# Create a Blueprint for projection routes
+projections_bp = Blueprint('projections', __name__)
+
+# Route to get the ranked projections of a week
+@projections_bp.route('/', methods=['GET'])
+def get_week_projections():
+    season = request.args.get('season', type=int)
+    week = request.args.get('week', type=int)
+    position = request.args.get('position', type=str)
+    limit = request.args.get('limit', default=50, type=int)
+
+    if season is None or week is None or week < 1:
+        return jsonify({"error": "season and week are required"}), 400
+
+    if position:
+        position = position.upper()
+        if position not in PROJECTABLE_POSITIONS:
+            return jsonify({"error": f"Unsupported position: {position}"}), 400
+    try:
+        rules = parse_scoring(request.args.get('scoring'), request.args.get('weights'), request.args.get('bonuses'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    current_app.logger.debug(f"Received request for projections: season {season}, week {week}, position {position}")
+    try:
+        # Weeks projected after ingest are a plain read; any other week is projected on the spot
+        start_date, end_date = season_week_range(season, week)
+        projections = None
+        if start_date is not None:
+            projections = load_stored_projections(start_date, end_date, position=position, limit=limit, rules=rules)
+        source = 'stored'
+        if projections is None:
+            projections = project_week(season, week, position=position, limit=limit, rules=rules)
+            source = 'live'
+        response = jsonify(projections)
+        response.headers['X-Projections-Source'] = source
+        return response, 200
+    except ModelsNotTrainedError as e:
+        current_app.logger.warning(f"Projections unavailable: {e}")
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        current_app.logger.error(f"Error projecting season {season} week {week}: {e}")
+        return jsonify({"error": "An error occurred while projecting the week"}), 500
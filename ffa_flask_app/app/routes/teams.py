@@ -1,36 +1,69 @@
 # ffa_flask_app/app/routes/teams.py
 
-from flask import Blueprint, jsonify, current_app
-from app.models import Team
+from flask import Blueprint, jsonify, current_app, request
+from sqlalchemy import and_, func, select
+from app import db
+from app.models import Team, TeamSeasonStat
+from app.data_version import add_conditional_get
+from app.response_cache import cached_response
 
 # Create a Blueprint for team routes
 teams_bp = Blueprint('teams', __name__)
 
+# 304 Not Modified until the next import bumps the data version
+add_conditional_get(teams_bp)
+
+SEASON_FIELDS = ['season', 'games', 'wins', 'losses', 'ties', 'points_for', 'points_against',
+                 'points_per_game', 'points_against_per_game']
+
+
+def season_record(row):
+    return {field: getattr(row, field) for field in SEASON_FIELDS}
+
+
 # Define team-related routes
+@teams_bp.route('/', methods=['GET'])
 @teams_bp.route('/teams', methods=['GET'])
+@cached_response(tags=('teams',))
 def get_teams():
-    teams = Team.query.all()
+    # Every team with its record for one season (the latest one by default), in a single read
+    season = request.args.get('season', type=int)
+    if season is None:
+        season = select(func.max(TeamSeasonStat.season)).scalar_subquery()
+
+    rows = db.session.execute(
+        select(Team.id, Team.name, Team.division, *[getattr(TeamSeasonStat, field) for field in SEASON_FIELDS])
+        .outerjoin(TeamSeasonStat, and_(TeamSeasonStat.team_id == Team.id, TeamSeasonStat.season == season))
+        .order_by(Team.id)
+    ).all()
     team_data = [
         {
-            "name": team.name,
-            "division": team.division,
-            "wins": team.wins,
-            "losses": team.losses
+            "id": row.id,
+            "name": row.name,
+            "division": row.division,
+            **season_record(row)
         }
-        for team in teams
+        for row in rows
     ]
     return jsonify(team_data)
 
+@teams_bp.route('/<int:team_id>', methods=['GET'])
 @teams_bp.route('/teams/<int:team_id>', methods=['GET'])
+@cached_response(tags=('teams',))
 def get_team_by_id(team_id):
     current_app.logger.debug(f"Received request to fetch team with ID: {team_id}")
     try:
-        team = Team.query.get(team_id)
+        team = db.session.get(Team, team_id)
         if team:
+            seasons = (TeamSeasonStat.query
+                       .filter_by(team_id=team_id)
+                       .order_by(TeamSeasonStat.season.asc())
+                       .all())
             team_data = {
                 "id": team.id,
                 "name": team.name,
-                "city": team.city
+                "division": team.division,
+                "seasons": [season_record(season) for season in seasons]
             }
             current_app.logger.info(f"Team with ID {team_id} retrieved successfully.")
             return jsonify(team_data), 200
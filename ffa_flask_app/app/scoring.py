@@ -0,0 +1,161 @@
+# ffa_flask_app/app/scoring.py
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from app import db
+from app.features import STATS
+from app.models import Game, Player, PlayerGame
+
+
+class ScoringRules:
+    """
+    A league's fantasy scoring: points per unit of each stat, plus bonuses for reaching a
+    threshold in a single game, as (stat, threshold, points) (e.g. 3 points for 100+ rushing yards).
+    score() turns whole frames of stat lines or projections into points in one pass.
+    """
+
+    def __init__(self, name, weights, bonuses=()):
+        unknown = ({*weights} | {stat for stat, _, _ in bonuses}) - set(STATS)
+        if unknown:
+            raise ValueError(f"Unknown stats in scoring rules: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.weights = dict(weights)
+        self.bonuses = tuple(bonuses)
+        self.stats = [stat for stat in STATS if stat in self.weights or any(b[0] == stat for b in self.bonuses)]
+
+    def customized(self, weights=None, bonuses=None):
+        """These rules with some weights changed and bonuses added (a league's own scoring)."""
+        return ScoringRules("custom", {**self.weights, **(weights or {})}, self.bonuses + tuple(bonuses or ()))
+
+    def score(self, stats_df):
+        """Fantasy points of every row; stats missing from the frame (or NaN) count as 0."""
+        values = stats_df.reindex(columns=self.stats).fillna(0).to_numpy(dtype=float)
+        points = values @ np.array([self.weights.get(stat, 0.0) for stat in self.stats], dtype=float)
+        for stat, threshold, bonus in self.bonuses:
+            points += (values[:, self.stats.index(stat)] >= threshold) * bonus
+        return pd.Series(points, index=stats_df.index)
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'weights': self.weights,
+            'bonuses': [{'stat': stat, 'threshold': threshold, 'points': points}
+                        for stat, threshold, points in self.bonuses],
+        }
+
+
+STANDARD = ScoringRules("standard", {
+    'pass_yards': 0.04,
+    'pass_tds': 4,
+    'pass_int': -2,
+    'rush_yards': 0.1,
+    'rush_tds': 6,
+    'rec_yards': 0.1,
+    'rec_tds': 6,
+})
+HALF_PPR = ScoringRules("half_ppr", {**STANDARD.weights, 'receptions': 0.5})
+PPR = ScoringRules("ppr", {**STANDARD.weights, 'receptions': 1})
+
+SCORING_PRESETS = {rules.name: rules for rules in (STANDARD, HALF_PPR, PPR)}
+
+
+def _parse_number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def parse_scoring(name=None, weights=None, bonuses=None):
+    """
+    Scoring rules from request arguments: a preset name (FANTASY_SCORING by default), optionally
+    customized with weights like "receptions:1,pass_tds:6" and bonuses like "rush_yards>=100:3".
+    Raises ValueError on anything it can't read.
+    """
+    name = (name or current_app.config["FANTASY_SCORING"]).lower()
+    if name not in SCORING_PRESETS:
+        raise ValueError(f"Unknown scoring: {name}. Choose one of {', '.join(SCORING_PRESETS)}.")
+    rules = SCORING_PRESETS[name]
+    if not weights and not bonuses:
+        return rules
+
+    try:
+        custom_weights = {}
+        for item in filter(None, (weights or "").split(",")):
+            stat, weight = item.split(":")
+            custom_weights[stat.strip()] = _parse_number(weight)
+        custom_bonuses = []
+        for item in filter(None, (bonuses or "").split(",")):
+            condition, points = item.split(":")
+            stat, threshold = condition.split(">=")
+            custom_bonuses.append((stat.strip(), _parse_number(threshold), _parse_number(points)))
+    except ValueError:
+        raise ValueError("weights must look like receptions:1,pass_tds:6 and bonuses like rush_yards>=100:3")
+    return rules.customized(custom_weights, custom_bonuses)
+
+
+def load_stat_lines(season=None, player_id=None, position=None):
+    """
+    PlayerGame stat lines with the player's name, position and the game's date and season, in one
+    query: of a season, of a player, or both.
+    """
+    query = (
+        db.session.query(PlayerGame.player_id, Player.name, Player.position, PlayerGame.game_id, Game.date,
+                         *[getattr(PlayerGame, stat) for stat in STATS])
+        .join(Game, PlayerGame.game_id == Game.id)
+        .join(Player, PlayerGame.player_id == Player.id)
+    )
+    if season is not None:
+        query = query.filter(Game.date >= date(season, 3, 1), Game.date < date(season + 1, 3, 1))
+    if player_id is not None:
+        query = query.filter(PlayerGame.player_id == player_id)
+    if position is not None:
+        query = query.filter(Player.position == position)
+
+    lines = pd.DataFrame(query.all(), columns=['player_id', 'name', 'position', 'game_id', 'date', *STATS])
+    lines = lines[lines['date'].notna()]
+    dates = pd.to_datetime(lines['date'])
+    # Same as projections.season_of, for every row at once
+    return lines.assign(season=dates.dt.year - (dates.dt.month < 3))
+
+
+def _totals(lines, keys, rules):
+    totals = (
+        lines.assign(points=rules.score(lines))
+        .groupby(keys, sort=False)
+        .agg(games=('points', 'size'), points=('points', 'sum'), **{stat: (stat, 'sum') for stat in rules.stats})
+        .reset_index()
+    )
+    totals['points_per_game'] = totals['points'] / totals['games']
+    return totals.round({'points': 2, 'points_per_game': 2})
+
+
+def season_leaderboard(season, rules, position=None, limit=50):
+    """Every player of a season ranked by fantasy points, scored and totalled in one pass over its stat lines."""
+    lines = load_stat_lines(season=season, position=position)
+    if lines.empty:
+        return []
+    ranked = _totals(lines, ['player_id', 'name', 'position'], rules).sort_values(
+        ['points', 'player_id'], ascending=[False, True], kind='stable'
+    )
+    if limit:
+        ranked = ranked.head(limit)
+    return ranked.assign(rank=range(1, len(ranked) + 1)).to_dict(orient='records')
+
+
+def player_season_totals(player_id, rules):
+    """A player's fantasy points per season, or None if they have no stat lines."""
+    lines = load_stat_lines(player_id=player_id)
+    if lines.empty:
+        return None
+    seasons = _totals(lines, ['season'], rules).sort_values('season')
+    return {
+        'player_id': player_id,
+        'name': lines['name'].iloc[0],
+        'position': lines['position'].iloc[0],
+        'seasons': seasons.to_dict(orient='records'),
+        'points': round(float(seasons['points'].sum()), 2),
+        'games': int(seasons['games'].sum()),
+    }
@@ -0,0 +1,224 @@
+# ffa_flask_app/app/snapshot.py
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, time, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Boolean, Date, Float, Integer, String, Time
+
+from app import db
+from app.models import Game, Player, PlayerGame, PlayerTeam
+from app.model_registry import current_data_version
+from app.roster_index import RosterIndex
+from app.features import STATS, resolve_teams_on_date
+from app.defense_stats import defense_averages_frame
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MODELS = [Game, PlayerGame, Player, PlayerTeam]
+
+_EPOCH = date(1970, 1, 1)
+_INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def _narrowest_int_dtype(values, nullable):
+    """Smallest signed dtype holding every value, keeping its minimum free as the null marker if needed."""
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if low > info.min if nullable else low >= info.min:
+            if high <= info.max:
+                return dtype
+    return np.int64
+
+
+def _encode_column(column, values):
+    """
+    A column's values as a numpy array plus its manifest entry. Integers get the narrowest dtype
+    (nulls stored as the dtype's minimum), dates are int32 days since 1970-01-01, times int32
+    seconds since midnight, floats float32 with NaN for null and strings fixed-width unicode.
+    """
+    nullable = any(value is None for value in values)
+    present = [value for value in values if value is not None]
+    column_type = column.type
+
+    if isinstance(column_type, Boolean):
+        return np.array([bool(value) for value in values], dtype=np.bool_), {"kind": "bool"}
+    if isinstance(column_type, Date):
+        kind, present = "date", [(value - _EPOCH).days for value in present]
+        values = [None if value is None else (value - _EPOCH).days for value in values]
+    elif isinstance(column_type, Time):
+        kind, present = "time", [value.hour * 3600 + value.minute * 60 + value.second for value in present]
+        values = [None if value is None else value.hour * 3600 + value.minute * 60 + value.second
+                  for value in values]
+    elif isinstance(column_type, Integer):
+        kind = "int"
+    elif isinstance(column_type, Float):
+        return (np.array([np.nan if value is None else value for value in values], dtype=np.float32),
+                {"kind": "float"})
+    elif isinstance(column_type, String):
+        return np.array(["" if value is None else value for value in values], dtype=np.str_), {"kind": "str"}
+    else:
+        raise TypeError(f"Can't snapshot column {column.name} of type {column_type}")
+
+    dtype = _narrowest_int_dtype(present, nullable)
+    null = int(np.iinfo(dtype).min) if nullable else None
+    array = np.array([null if value is None else value for value in values], dtype=dtype)
+    return array, {"kind": kind, "null": null}
+
+
+def _write_table(model, directory):
+    columns = list(model.__table__.columns)
+    rows = db.session.execute(db.select(*columns).order_by(model.id)).all()
+
+    os.makedirs(directory)
+    manifest_columns = {}
+    for position, column in enumerate(columns):
+        array, entry = _encode_column(column, [row[position] for row in rows])
+        np.save(os.path.join(directory, f"{column.name}.npy"), array, allow_pickle=False)
+        manifest_columns[column.name] = {"dtype": array.dtype.str, **entry}
+    return {"rows": len(rows), "columns": manifest_columns}
+
+
+def export_snapshot(directory):
+    """
+    Write Game, PlayerGame, Player and PlayerTeam to `directory` as one .npy file per column plus
+    a manifest.json (row counts, dtypes, null markers and the data version). The snapshot is built
+    in a temporary directory next to the target and swapped in at the end, so readers never see a
+    half-written one. Returns the manifest.
+    """
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".snapshot-")
+    try:
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "data_version": current_data_version(),
+            "tables": {
+                model.__tablename__: _write_table(model, os.path.join(tmp_dir, model.__tablename__))
+                for model in SNAPSHOT_MODELS
+            },
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_dir = None
+        if os.path.exists(directory):
+            old_dir = tempfile.mkdtemp(dir=parent, prefix=".snapshot-old-")
+            os.replace(directory, os.path.join(old_dir, "snapshot"))
+        os.replace(tmp_dir, directory)
+        if old_dir:
+            shutil.rmtree(old_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+class Snapshot:
+    """
+    A snapshot written by export_snapshot. Columns are memory-mapped, so opening it and picking
+    a few columns costs only what is actually read.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest["format"] != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest['format']} in {directory}")
+
+    @property
+    def data_version(self):
+        return self.manifest["data_version"]
+
+    def array(self, table, column):
+        """The raw, memory-mapped array of one column (nulls still encoded)."""
+        return np.load(os.path.join(self.directory, table, f"{column}.npy"), mmap_mode="r", allow_pickle=False)
+
+    def column(self, table, column):
+        """
+        One column decoded like a database read would give it: integers as int64 (so arithmetic
+        on them can't overflow the narrow stored dtype), dates as datetime.date objects, None for
+        null dates/times and NaN for null numbers (as a float column).
+        """
+        entry = self.manifest["tables"][table]["columns"][column]
+        array = self.array(table, column)
+        kind, null = entry["kind"], entry.get("null")
+
+        if kind in ("bool", "float", "str"):
+            return np.asarray(array)
+        missing = array == null if null is not None else np.zeros(len(array), dtype=bool)
+
+        if kind == "int":
+            if missing.any():
+                return np.where(missing, np.nan, array.astype(np.float64))
+            return array.astype(np.int64)
+
+        if kind == "date":
+            decoded = np.where(missing, 0, array).astype("datetime64[D]").astype(object)
+        else:
+            decoded = np.array([time(value // 3600, value % 3600 // 60, value % 60)
+                                for value in np.where(missing, 0, array).tolist()], dtype=object)
+        decoded[missing] = None
+        return decoded
+
+    def table(self, table, columns=None):
+        """A table (or some of its columns) as a DataFrame."""
+        columns = columns or list(self.manifest["tables"][table]["columns"])
+        return pd.DataFrame({column: self.column(table, column) for column in columns})
+
+
+class SnapshotSource:
+    """
+    build_feature_dataset inputs read from a snapshot instead of the database (see features.DatabaseSource).
+    The derived inputs are computed in memory the way the rebuild scripts compute them: defense
+    averages with defense_averages_frame and player averages from the stat lines.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot if isinstance(snapshot, Snapshot) else Snapshot(snapshot)
+        self._roster_index = None
+        self._position_games = {}
+
+    def position_games(self, position):
+        """Same frame as features.load_position_games."""
+        if position not in self._position_games:
+            players = self.snapshot.table('players', ['id', 'position'])
+            player_ids = players.loc[players['position'] == position, 'id']
+
+            player_games = self.snapshot.table('player_games', ['id', 'player_id', 'game_id', *STATS])
+            player_games = player_games[player_games['player_id'].isin(player_ids)]
+            games = self.snapshot.table('games', ['id', 'date', 'home_team_id', 'away_team_id'])
+            merged = player_games.merge(games.rename(columns={'id': 'game_id'}), on='game_id')
+            self._position_games[position] = merged[
+                ['id', 'player_id', 'game_id', 'date', 'home_team_id', 'away_team_id', *STATS]
+            ].reset_index(drop=True)
+        return self._position_games[position]
+
+    def defense_frame(self, position):
+        """Same frame as features.load_defense_frame, from the rebuilt DefenseVsPosition rows."""
+        resolved = resolve_teams_on_date(self.position_games(position), self.roster_index())
+        top_df = defense_averages_frame(resolved, position)
+        return pd.DataFrame({
+            'defense_team_id': top_df['defense_team_id'].to_numpy(),
+            'game_id': top_df['game_id'].to_numpy(),
+            'date': top_df['date'].to_numpy(),
+            **{f"defense_{stat}": top_df[f"avg_{stat}"].to_numpy() for stat in STATS},
+        })
+
+    def player_history(self, position, window):
+        return None  # compute_training_features derives them from the stat lines
+
+    def roster_index(self):
+        if self._roster_index is None:
+            spells = self.snapshot.table('player_teams', ['player_id', 'team_id', 'start_date', 'end_date'])
+            self._roster_index = RosterIndex()
+            self._roster_index.add(spells.itertuples(index=False, name=None))
+        return self._roster_index
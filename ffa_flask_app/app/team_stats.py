@@ -0,0 +1,87 @@
+# ffa_flask_app/app/team_stats.py
+
+from flask import current_app
+from sqlalchemy import case, extract, func, select, union_all
+
+from app import db
+from app.models import Game, TeamSeasonStat, insert_ignore
+
+
+def season_expression(date_column):
+    """SQL version of projections.season_of: January/February games count toward the previous year."""
+    year = extract('year', date_column)
+    return case((extract('month', date_column) >= 3, year), else_=year - 1)
+
+
+def team_season_aggregates_query(seasons=None):
+    """
+    Games, wins, losses, ties and points for/against of every team in every season, in one grouped
+    statement over Game: the home and away sides of each scored game are unioned into one
+    (team, season, points for, points against) row each, then grouped.
+    """
+    season = season_expression(Game.date)
+    scored = (Game.date.isnot(None), Game.home_team_score.isnot(None), Game.away_team_score.isnot(None))
+
+    sides = union_all(
+        select(Game.home_team_id.label('team_id'), season.label('season'),
+               Game.home_team_score.label('points_for'), Game.away_team_score.label('points_against'))
+        .filter(*scored),
+        select(Game.away_team_id.label('team_id'), season.label('season'),
+               Game.away_team_score.label('points_for'), Game.home_team_score.label('points_against'))
+        .filter(*scored),
+    ).subquery()
+
+    query = (
+        select(
+            sides.c.team_id,
+            sides.c.season,
+            func.count().label('games'),
+            func.sum(case((sides.c.points_for > sides.c.points_against, 1), else_=0)).label('wins'),
+            func.sum(case((sides.c.points_for < sides.c.points_against, 1), else_=0)).label('losses'),
+            func.sum(case((sides.c.points_for == sides.c.points_against, 1), else_=0)).label('ties'),
+            func.sum(sides.c.points_for).label('points_for'),
+            func.sum(sides.c.points_against).label('points_against'),
+        )
+        .group_by(sides.c.team_id, sides.c.season)
+    )
+    if seasons is not None:
+        query = query.filter(sides.c.season.in_(seasons))
+    return query
+
+
+def refresh_team_season_stats(seasons=None):
+    """
+    Recompute TeamSeasonStat for the given seasons (every season when None) from Game scores.
+    Does not commit, so the refresh lands in the same transaction as the imported games.
+    """
+    rows = [
+        {
+            'team_id': row.team_id,
+            'season': int(row.season),
+            'games': row.games,
+            'wins': row.wins,
+            'losses': row.losses,
+            'ties': row.ties,
+            'points_for': row.points_for,
+            'points_against': row.points_against,
+            'points_per_game': round(row.points_for / row.games, 2),
+            'points_against_per_game': round(row.points_against / row.games, 2),
+        }
+        for row in db.session.execute(team_season_aggregates_query(seasons))
+    ]
+
+    stale = TeamSeasonStat.query
+    if seasons is not None:
+        stale = stale.filter(TeamSeasonStat.season.in_(seasons))
+    stale.delete(synchronize_session=False)
+    insert_ignore(TeamSeasonStat, rows)
+
+    current_app.logger.info(f"Refreshed {len(rows)} TeamSeasonStat rows")
+    return len(rows)
+
+
+def rebuild_team_season_stats():
+    """Recompute every season and commit."""
+    count = refresh_team_season_stats()
+    db.session.commit()
+    return count
@@ -0,0 +1,165 @@
+# ffa_flask_app/app/training.py
+
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+
+from flask import current_app
+
+from app.features import build_feature_dataset
+from app.model_registry import build_artifact, current_data_version, feature_set_key, processed_games
+from app.snapshot import Snapshot, SnapshotSource
+from app.modeling import (
+    MULTI_OUTPUT, PER_STAT, PROJECTABLE_POSITIONS,
+    fit_random_forest, get_feature_columns, get_model_registry, get_target_stats
+)
+
+DEFAULT_SEED = 42
+
+# One model to fit: every target stat of a position jointly (MULTI_OUTPUT) or a single stat (PER_STAT)
+TrainingJob = namedtuple('TrainingJob', ['position', 'target_stats', 'feature_columns', 'seed'])
+JobTiming = namedtuple('JobTiming', ['position', 'step', 'rows', 'seconds'])
+
+_worker_app = None  # App of a pool worker process, see _init_worker
+
+
+def _init_worker():
+    """Give each worker process its own app (and database engine) instead of a forked copy."""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app()
+
+
+def _build_dataset(position, snapshot_dir=None):
+    start = time.perf_counter()
+    source = SnapshotSource(snapshot_dir) if snapshot_dir else None
+    with _worker_app.app_context() if _worker_app is not None else nullcontext():
+        dataset = build_feature_dataset(position, source=source)
+    return 'dataset', position, dataset, time.perf_counter() - start
+
+
+def _fit(job, dataset):
+    start = time.perf_counter()
+    # One core per job, the pool already keeps every core busy
+    model, mse = fit_random_forest(dataset, list(job.target_stats), job.feature_columns,
+                                   random_state=job.seed, n_jobs=1)
+    return 'fit', job, (model, mse, len(dataset)), time.perf_counter() - start
+
+
+class _InlineExecutor:
+    """Runs submitted calls right away in this process (workers=1): no pickling, easier to debug."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def plan_jobs(position, mode, seed=DEFAULT_SEED):
+    """The fit jobs of a position. Every job gets the same explicit seed, so results don't depend on scheduling."""
+    target_stats = get_target_stats(position)
+    feature_columns = get_feature_columns(target_stats)
+    if mode == MULTI_OUTPUT:
+        return [TrainingJob(position, tuple(target_stats), feature_columns, seed)]
+    if mode == PER_STAT:
+        return [TrainingJob(position, (stat,), feature_columns, seed) for stat in target_stats]
+    raise ValueError(f"Unknown training mode: {mode}")
+
+
+def train_positions(positions=None, mode=None, workers=None, seed=DEFAULT_SEED, force=False, snapshot_dir=None,
+                    log=print):
+    """
+    Build the training datasets and fit the models of several positions concurrently in a process
+    pool: each position's dataset is built by one worker, and its fit jobs (one per stat in PER_STAT
+    mode) are queued as soon as it is ready. Each position's artifact is saved atomically by the
+    registry once all its jobs are done; positions already trained on the current data version
+    are skipped unless force is set. With snapshot_dir the datasets are built from a snapshot
+    (see app/snapshot.py) and the models are tagged with its data version, so no database is used.
+    Datasets built from the database are stored with the models for incremental updates (app/incremental.py).
+    Must be called inside an app context. Returns the JobTimings.
+    """
+    mode = mode or current_app.config["MODEL_TRAINING_MODE"]
+    positions = positions or PROJECTABLE_POSITIONS
+    workers = workers or os.cpu_count() or 1
+    registry = get_model_registry()
+    data_version = Snapshot(snapshot_dir).data_version if snapshot_dir else current_data_version()
+    # Read before the datasets are built: a game ingested meanwhile is picked up again by the next update
+    covered_games = None if snapshot_dir else processed_games()
+
+    unsupported = [position for position in positions if position not in PROJECTABLE_POSITIONS]
+    if unsupported:
+        raise ValueError(f"Unsupported positions: {', '.join(unsupported)}. "
+                         f"Supported positions are {', '.join(PROJECTABLE_POSITIONS)}.")
+
+    jobs = {}
+    for position in positions:
+        position_jobs = plan_jobs(position, mode, seed)
+        feature_set = feature_set_key(position_jobs[0].feature_columns, get_target_stats(position), mode)
+        if not force and registry.load(position, feature_set, data_version) is not None:
+            log(f"{position}: models for data version {data_version} already trained, skipping")
+            continue
+        jobs[position] = position_jobs
+
+    timings = []
+    fitted = {position: {} for position in jobs}
+    if workers > 1 and jobs:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = _InlineExecutor()
+
+    with executor:
+        pending = {executor.submit(_build_dataset, position, snapshot_dir) for position in jobs}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, subject, result, seconds = future.result()
+
+                if kind == 'dataset':
+                    position, dataset = subject, result
+                    timings.append(JobTiming(position, 'dataset', len(dataset), seconds))
+                    log(f"{position}: built {len(dataset)} training rows in {seconds:.2f}s")
+                    if dataset.empty:
+                        log(f"{position}: no training rows, skipping")
+                        del fitted[position]
+                        continue
+                    if covered_games is not None:
+                        registry.save_training_set(
+                            position, feature_set_key(jobs[position][0].feature_columns, get_target_stats(position), mode),
+                            data_version, covered_games, max(covered_games.values(), default=None), dataset
+                        )
+                    pending |= {executor.submit(_fit, job, dataset) for job in jobs[position]}
+                    continue
+
+                job, (model, mse, rows) = subject, result
+                step = ','.join(job.target_stats) if mode == PER_STAT else 'all stats'
+                timings.append(JobTiming(job.position, f"fit {step}", rows, seconds))
+                log(f"{job.position}: fitted {step} in {seconds:.2f}s "
+                    f"(MSE {', '.join(f'{stat} {value:.2f}' for stat, value in mse.items())})")
+
+                fitted[job.position].update({stat: (model, mse[stat]) for stat in job.target_stats})
+                if len(fitted[job.position]) == len(get_target_stats(job.position)):
+                    _save_position(registry, job.position, mode, seed, data_version, fitted.pop(job.position))
+
+    return timings
+
+
+def _save_position(registry, position, mode, seed, data_version, fitted):
+    target_stats = get_target_stats(position)
+    feature_columns = get_feature_columns(target_stats)
+    artifact = build_artifact(
+        position, feature_columns, target_stats, data_version,
+        {stat: fitted[stat][0] for stat in target_stats}, mode,
+        seed=seed, metrics={stat: fitted[stat][1] for stat in target_stats},
+    )
+    path = registry.save(position, feature_set_key(feature_columns, target_stats, mode), data_version, artifact)
+    current_app.logger.info(f"Saved {position} models to {path}")
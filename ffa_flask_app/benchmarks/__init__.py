@@ -0,0 +1 @@
+# ffa_flask_app/benchmarks/__init__.py
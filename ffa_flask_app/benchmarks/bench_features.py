@@ -0,0 +1,87 @@
+# ffa_flask_app/benchmarks/bench_features.py
+'''
+Compares the row-by-row build_training_dataset_iterative with the vectorized
+feature engine in app/features.py on whatever database DATABASE_URL points at.
+
+Usage (from the ffa_flask_app directory):
+    python -m benchmarks.bench_features --position RB --repeat 3
+    python -m benchmarks.bench_features --position RB --skip-loop --snapshot snapshots/latest
+'''
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from app.features import STATS, build_feature_dataset
+from app.snapshot import SnapshotSource
+from predict_player_performance import app, build_training_dataset, build_training_dataset_iterative
+
+
+def time_call(func, *args, repeat=1):
+    """Run func `repeat` times, returning the best wall time and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # The iterative builder prints every row, keep that out of the timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare_datasets(loop_df, vectorized_df):
+    """Count feature values that differ between the two builders on the rows they share."""
+    key = ['game_id', 'player_id']
+    feature_columns = [f"player_{stat}" for stat in STATS] + [f"defense_{stat}" for stat in STATS]
+    merged = loop_df.merge(vectorized_df, on=key, suffixes=("_loop", "_vec"))
+
+    mismatched = 0
+    for col in feature_columns:
+        loop_values = merged[f"{col}_loop"].to_numpy(dtype=float)
+        vec_values = merged[f"{col}_vec"].to_numpy(dtype=float)
+        mismatched += int((~np.isclose(loop_values, vec_values, equal_nan=True)).sum())
+    return len(merged), mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training dataset builders")
+    parser.add_argument("--position", default="RB")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--skip-loop", action="store_true", help="Only time the vectorized builder")
+    parser.add_argument("--snapshot", help="Also time the vectorized builder reading this snapshot directory")
+    args = parser.parse_args()
+
+    with app.app_context():
+        vec_time, vectorized_df = time_call(build_training_dataset, args.position, repeat=args.repeat)
+        print(f"Vectorized builder: {len(vectorized_df)} rows in {vec_time:.3f}s")
+
+        if args.snapshot:
+            # A fresh source every run, so its cached frames don't flatter the timing
+            snapshot_time, snapshot_df = time_call(
+                lambda: build_feature_dataset(args.position, source=SnapshotSource(args.snapshot)),
+                repeat=args.repeat
+            )
+            print(f"Snapshot builder:   {len(snapshot_df)} rows in {snapshot_time:.3f}s")
+            compared, mismatched = compare_datasets(vectorized_df, snapshot_df)
+            print(f"Compared {compared} rows with the database builder, {mismatched} mismatched feature values")
+
+        if args.skip_loop:
+            return
+
+        loop_time, loop_df = time_call(build_training_dataset_iterative, args.position, repeat=args.repeat)
+        print(f"Iterative builder:  {len(loop_df)} rows in {loop_time:.3f}s")
+
+        if vec_time > 0:
+            print(f"Speedup: {loop_time / vec_time:.1f}x")
+
+        if not loop_df.empty:
+            compared, mismatched = compare_datasets(loop_df, vectorized_df)
+            print(f"Compared {compared} rows, {mismatched} mismatched feature values")
+
+
+if __name__ == "__main__":
+    main()
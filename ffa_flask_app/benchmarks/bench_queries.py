@@ -0,0 +1,206 @@
+# ffa_flask_app/benchmarks/bench_queries.py
+'''
+Times the hot lookups (and records their EXPLAIN plans) on whatever database
+DATABASE_URL points at, so runs before and after the index migration can be compared.
+
+Usage (from the ffa_flask_app directory):
+    flask db upgrade 5b2e9c4d81a7                      # schema without the hot lookup indexes
+    python -m benchmarks.bench_queries --seed --label before
+    flask db upgrade                                   # add the indexes
+    python -m benchmarks.bench_queries --label after
+    python -m benchmarks.bench_queries --compare query_bench_before.json query_bench_after.json
+'''
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import select, func
+
+from app import create_app, db
+from app.models import Player, PlayerTeam, Team, Game, PlayerGame, insert_ignore
+from app.ingest import PLAYER_GAME_STATS
+
+app = create_app()
+
+ROSTER = ["QB", "QB", "RB", "RB", "RB", "WR", "WR", "WR", "WR", "WR", "TE", "TE"]
+
+
+def seed_league(teams=32, seasons=3, players_per_team=len(ROSTER) * 4, seed=0):
+    """
+    Fill an empty database with a synthetic league: every team plays every week of
+    17-week seasons, and every player of both teams gets a box score line.
+    """
+    if db.session.query(Game.id).first():
+        print("Database already has games, skipping seed")
+        return
+
+    rng = random.Random(seed)
+    insert_ignore(Team, [{'id': t, 'name': f"T{t}", 'division': f"D{t % 8}"} for t in range(1, teams + 1)])
+
+    rosters = {t: [] for t in range(1, teams + 1)}
+    players, player_teams = [], []
+    for team_id in rosters:
+        for slot in range(players_per_team):
+            player_id = len(players) + 1
+            players.append({'id': player_id, 'name': f"P{player_id}", 'position': ROSTER[slot % len(ROSTER)]})
+            player_teams.append({'player_id': player_id, 'team_id': team_id,
+                                 'start_date': date(2000, 1, 1), 'end_date': None})
+            rosters[team_id].append(player_id)
+    insert_ignore(Player, players)
+    insert_ignore(PlayerTeam, player_teams)
+
+    games, player_games = [], []
+    for season in range(2024 - seasons, 2024):
+        week_date = date(season, 9, 8)
+        for week in range(17):
+            order = list(rosters)
+            rng.shuffle(order)
+            for home, away in zip(order[::2], order[1::2]):
+                game_id = len(games) + 1
+                games.append({'id': game_id, 'home_team_id': home, 'away_team_id': away, 'date': week_date,
+                              'home_team_score': rng.randint(0, 40), 'away_team_score': rng.randint(0, 40),
+                              # The most recent season is still waiting for box scores
+                              'stats_processed': season < 2023})
+                for player_id in rosters[home] + rosters[away]:
+                    player_games.append({'player_id': player_id, 'game_id': game_id,
+                                         **{stat: rng.randint(0, 30) for stat in PLAYER_GAME_STATS}})
+            week_date += timedelta(days=7)
+
+    insert_ignore(Game, games)
+    for start in range(0, len(player_games), 5000):
+        insert_ignore(PlayerGame, player_games[start:start + 5000])
+    db.session.commit()
+    print(f"Seeded {len(players)} players, {len(games)} games, {len(player_games)} player games")
+
+
+def hot_queries():
+    """
+    The lookups ingest, import and feature building run over and over, as
+    (name, statement builder) pairs. Each builder takes one sampled (player_id, game) pair.
+    """
+    return [
+        ("player_game_by_player_and_game", lambda player_id, game: (
+            select(PlayerGame).filter_by(player_id=player_id, game_id=game.id).limit(1))),
+        ("player_games_by_game", lambda player_id, game: (
+            select(PlayerGame.player_id).filter(PlayerGame.game_id == game.id))),
+        ("game_by_teams_and_date", lambda player_id, game: (
+            select(Game).filter_by(home_team_id=game.home_team_id, away_team_id=game.away_team_id,
+                                   date=game.date).limit(1))),
+        ("games_by_away_team_and_date", lambda player_id, game: (
+            select(Game.id).filter(Game.away_team_id == game.away_team_id, Game.date <= game.date))),
+        ("oldest_unprocessed_games", lambda player_id, game: (
+            select(Game.id, Game.date).filter_by(stats_processed=False).order_by(Game.date.asc()).limit(100))),
+        ("player_team_on_date", lambda player_id, game: (
+            select(PlayerTeam).filter(
+                PlayerTeam.player_id == player_id,
+                PlayerTeam.start_date <= game.date,
+                (PlayerTeam.end_date.is_(None) | (PlayerTeam.end_date >= game.date))
+            ).limit(1))),
+    ]
+
+
+def sample_parameters(count, seed=0):
+    """Random (player_id, game) pairs taken from existing box scores."""
+    total = db.session.query(func.count(PlayerGame.id)).scalar()
+    rng = random.Random(seed)
+    samples = []
+    for offset in sorted(rng.randrange(total) for _ in range(count)):
+        player_id, game_id = db.session.query(PlayerGame.player_id, PlayerGame.game_id) \
+            .order_by(PlayerGame.id).offset(offset).first()
+        samples.append((player_id, db.session.get(Game, game_id)))
+    return samples
+
+
+def explain(stmt):
+    """The database's plan for a statement, one line per entry."""
+    dialect = db.session.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        return [row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))]
+    if dialect.name == "postgresql":
+        return [row[0] for row in db.session.execute(db.text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))]
+    return [str(row) for row in db.session.execute(db.text(f"EXPLAIN {sql}"))]
+
+
+def time_query(build, samples, repeat):
+    timings = []
+    for _ in range(repeat):
+        for player_id, game in samples:
+            stmt = build(player_id, game)
+            start = time.perf_counter()
+            db.session.execute(stmt).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'calls': len(timings),
+        'mean_ms': round(statistics.mean(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'max_ms': round(max(timings), 4),
+    }
+
+
+def run(label, sample_count, repeat):
+    samples = sample_parameters(sample_count)
+    results = {
+        'label': label,
+        'dialect': db.session.get_bind().dialect.name,
+        'rows': {model.__tablename__: db.session.query(func.count(model.id)).scalar()
+                 for model in (Player, PlayerTeam, Game, PlayerGame)},
+        'queries': {},
+    }
+    for name, build in hot_queries():
+        stats = time_query(build, samples, repeat)
+        stats['plan'] = explain(build(*samples[0]))
+        results['queries'][name] = stats
+        print(f"{name:32s} {stats['median_ms']:9.3f} ms median  ({' | '.join(stats['plan'])[:90]})")
+    return results
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{'query':32s} {before['label']:>12s} {after['label']:>12s} {'speedup':>8s}")
+    for name, stats in before['queries'].items():
+        if name not in after['queries']:
+            continue
+        new = after['queries'][name]
+        speedup = stats['median_ms'] / new['median_ms'] if new['median_ms'] else float('inf')
+        print(f"{name:32s} {stats['median_ms']:10.3f}ms {new['median_ms']:10.3f}ms {speedup:7.1f}x")
+        print(f"    {before['label']}: {' | '.join(stats['plan'])[:110]}")
+        print(f"    {after['label']}: {' | '.join(new['plan'])[:110]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot lookup queries")
+    parser.add_argument("--label", default="run", help="Name of this run, e.g. before or after")
+    parser.add_argument("--output", help="Results file (default query_bench_<label>.json)")
+    parser.add_argument("--seed", action="store_true", help="Fill an empty database with a synthetic league first")
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=200, help="Parameter sets per query")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with app.app_context():
+        if args.seed:
+            seed_league(seasons=args.seasons)
+        results = run(args.label, args.samples, args.repeat)
+
+    output = args.output or f"query_bench_{args.label}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
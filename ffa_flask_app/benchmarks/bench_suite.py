@@ -0,0 +1,292 @@
+# ffa_flask_app/benchmarks/bench_suite.py
+'''
+End-to-end benchmark on synthetic leagues of several sizes, without a live database or API key.
+For every scale a fresh SQLite database is migrated and the league from synthetic_league.py is
+pushed through the real paths: the api-sports import (replayed from generated responses), roster
+reconciliation, training datasets, model fitting and prediction, and the Flask routes (cold and
+cached). Every timing is written to one JSON file so runs can be compared over time.
+
+Usage (from the ffa_flask_app directory):
+    python -m benchmarks.bench_suite --seasons 1 3 --label main
+    python -m benchmarks.bench_suite --compare bench_suite_main.json bench_suite_branch.json
+
+Each scale runs in its own process (the scripts create their app at import, from the environment).
+To benchmark another database, point DATABASE_URL at an empty one and run a single scale:
+    python -m benchmarks.bench_suite --scale-run --seasons 1 --workdir /tmp/bench --output part.json
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARK_DIR)
+
+
+class Stopwatch:
+    """Collects named wall times; `with watch("stage"):` times a block and keeps its stdout quiet."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+        self.stages[name] = round(time.perf_counter() - start, 4)
+        print(f"  {name:34s} {self.stages[name]:9.3f}s")
+
+    def best_of(self, name, func, repeat):
+        """Time func() `repeat` times and keep the fastest run; returns its last result."""
+        best, result = float("inf"), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = func()
+            best = min(best, time.perf_counter() - start)
+        self.stages[name] = round(best, 4)
+        print(f"  {name:34s} {best:9.3f}s")
+        return result
+
+
+def latency_summary(timings_ms):
+    timings_ms = sorted(timings_ms)
+    p95 = statistics.quantiles(timings_ms, n=20)[18] if len(timings_ms) > 1 else timings_ms[0]
+    return {'p50_ms': round(statistics.median(timings_ms), 3), 'p95_ms': round(p95, 3)}
+
+
+def time_routes(flask_app, cache, routes, requests):
+    """Per route: status and latency with an empty response cache (miss) and a warm one (hit)."""
+    client = flask_app.test_client()
+    results = {}
+    for name, url in routes:
+        misses, hits = [], []
+        status = None
+        for _ in range(requests):
+            cache.clear()
+            start = time.perf_counter()
+            response = client.get(url)
+            response.get_data()
+            misses.append((time.perf_counter() - start) * 1000)
+            status = response.status_code
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(url).get_data()
+            hits.append((time.perf_counter() - start) * 1000)
+        miss, hit = latency_summary(misses), latency_summary(hits)
+        results[name] = {'status': status, 'miss_p50_ms': miss['p50_ms'], 'miss_p95_ms': miss['p95_ms'],
+                         'hit_p50_ms': hit['p50_ms'], 'hit_p95_ms': hit['p95_ms']}
+        print(f"  GET {url:40s} {status}  miss {miss['p50_ms']:8.2f}ms  hit {hit['p50_ms']:8.2f}ms")
+    return results
+
+
+def run_scale(seasons, teams, seed, workdir, repeat, requests):
+    """Benchmark one league size against the database in DATABASE_URL (expected to be empty)."""
+    from flask_migrate import upgrade
+    from sqlalchemy import func
+
+    import import_data
+    import predict_player_performance as ppp
+    from app import db
+    from app.models import Game, Player, PlayerGame, PlayerTeam
+    from app.features import build_feature_dataset
+    from app.modeling import PROJECTABLE_POSITIONS, get_feature_columns, get_target_stats, predict_frame
+    from app.raw_cache import RawResponseCache
+    from app.response_cache import get_response_cache
+    from app.roster_index import get_roster_index
+    from app.roster_reconciliation import reconcile_rosters
+    from app.snapshot import SnapshotSource, export_snapshot
+    from app.training import train_positions
+    from benchmarks.synthetic_league import generate_league, write_api_payloads, write_database
+
+    app = ppp.app
+    watch = Stopwatch()
+    print(f"League of {seasons} season(s), {teams} teams:")
+
+    with app.app_context():
+        upgrade(directory=os.path.join(APP_DIR, "migrations"))
+
+        with watch("generate_league"):
+            league = generate_league(seasons, teams, seed=seed)
+        cache = RawResponseCache(os.path.join(workdir, "raw_responses"))
+        with watch("write_api_payloads"):
+            write_api_payloads(league, cache.directory)
+        write_database(league, teams_only=True)  # import_data expects the teams to exist
+
+    # The import path, exactly as import_data.py --replay runs it
+    with watch("import_games"):
+        import_data.replay_games_from_cache(cache)
+    with watch("ingest_box_scores"):
+        import_data.replay_box_scores_from_cache(cache)
+
+    with app.app_context():
+        with watch("reconcile_rosters"):
+            reconcile_rosters(get_roster_index())
+            db.session.commit()
+
+        rows = {model.__tablename__: db.session.query(func.count(model.id)).scalar()
+                for model in (Player, PlayerTeam, Game, PlayerGame)}
+
+        datasets = {}
+        for position in PROJECTABLE_POSITIONS:
+            datasets[position] = watch.best_of(f"build_training_dataset_{position}",
+                                               lambda: ppp.build_training_dataset(position), repeat)
+
+        with watch("export_snapshot"):
+            export_snapshot(os.path.join(workdir, "snapshot"))
+        watch.best_of("build_training_dataset_RB_snapshot",
+                      lambda: build_feature_dataset("RB", source=SnapshotSource(os.path.join(workdir, "snapshot"))),
+                      repeat)
+
+        training_df = datasets["RB"]
+        target_stats = get_target_stats("RB")
+        feature_columns = get_feature_columns(target_stats)
+        model = watch.best_of("train_model_RB_rush_yards",
+                              lambda: ppp.train_model(training_df, "rush_yards", feature_columns), 1)
+        watch.best_of("train_multi_output_model_RB",
+                      lambda: ppp.train_multi_output_model(training_df, target_stats, feature_columns), 1)
+
+        combined_features = training_df[feature_columns].iloc[0]
+        single = [0.0] * max(repeat * 10, 20)
+        for index in range(len(single)):
+            start = time.perf_counter()
+            ppp.predict_stat(model, combined_features, feature_columns)
+            single[index] = (time.perf_counter() - start) * 1000
+        watch.stages["predict_stat_p50_ms"] = latency_summary(single)['p50_ms']
+        print(f"  {'predict_stat_p50_ms':34s} {watch.stages['predict_stat_p50_ms']:9.3f}ms")
+
+        with watch("train_all_positions"):
+            train_positions(workers=1, force=True, log=lambda *_: None)
+        artifact = ppp.get_models("RB")
+        watch.best_of("predict_frame_RB_batch", lambda: predict_frame(artifact, training_df), repeat)
+
+        last_game = max(game['date'] for game in league.games)
+        season = last_game.year if last_game.month >= 3 else last_game.year - 1
+        player_id = db.session.query(func.min(Player.id)).scalar()
+        routes = [
+            ("players_page", "/api/players/?limit=100"),
+            ("players_jsonl", "/api/players/?format=jsonl"),
+            ("player", f"/api/players/{player_id}"),
+            ("teams", "/api/teams/"),
+            ("team", "/api/teams/1"),
+            ("projections_week", f"/api/projections/?season={season}&week=10"),
+        ]
+        route_results = time_routes(app, get_response_cache(), routes, requests)
+
+    return {'seasons': seasons, 'teams': teams, 'seed': seed, 'rows': rows,
+            'stages': watch.stages, 'routes': route_results}
+
+
+def run_suite(seasons_list, teams, seed, repeat, requests, keep):
+    """Run every scale in its own process on a fresh SQLite database; returns the results dict."""
+    results = {
+        'suite': 'bench_suite',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'scales': [],
+    }
+    for seasons in seasons_list:
+        workdir = tempfile.mkdtemp(prefix=f"ffa_bench_{seasons}s_")
+        part_path = os.path.join(workdir, "result.json")
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'league.db')}",
+            "RAW_RESPONSE_CACHE_DIR": os.path.join(workdir, "raw_responses"),
+            "MODEL_REGISTRY_DIR": os.path.join(workdir, "model_registry"),
+            "RESPONSE_CACHE_BACKEND": "local",
+            "FLASK_ENV": "production",
+        }
+        command = [sys.executable, "-m", "benchmarks.bench_suite", "--scale-run", "--seasons", str(seasons),
+                   "--teams", str(teams), "--seed", str(seed), "--repeat", str(repeat),
+                   "--requests", str(requests), "--workdir", workdir, "--output", part_path]
+        completed = subprocess.run(command, cwd=APP_DIR, env=env, stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr[-4000:])
+            raise RuntimeError(f"Benchmark of {seasons} season(s) failed, work directory kept at {workdir}")
+
+        with open(part_path) as f:
+            results['scales'].append(json.load(f))
+        if keep:
+            print(f"  (work directory kept at {workdir})")
+        else:
+            shutil.rmtree(workdir)
+    return results
+
+
+def _flatten(results):
+    metrics = {}
+    for scale in results['scales']:
+        prefix = f"{scale['seasons']}s"
+        for name, value in scale['stages'].items():
+            metrics[f"{prefix} {name}"] = value
+        for name, route in scale['routes'].items():
+            metrics[f"{prefix} GET {name} miss p50"] = route['miss_p50_ms']
+            metrics[f"{prefix} GET {name} hit p50"] = route['hit_p50_ms']
+    return metrics
+
+
+def compare(before_path, after_path):
+    """Print every metric of two results files side by side with the before/after ratio."""
+    with open(before_path) as f:
+        before = _flatten(json.load(f))
+    with open(after_path) as f:
+        after = _flatten(json.load(f))
+
+    print(f"{'metric':56s} {'before':>10s} {'after':>10s} {'ratio':>7s}")
+    for name, old in before.items():
+        if name not in after:
+            continue
+        new = after[name]
+        ratio = old / new if new else float('inf')
+        print(f"{name:56s} {old:10.3f} {new:10.3f} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark on synthetic leagues")
+    parser.add_argument("--seasons", type=int, nargs="+", default=[1, 3], help="League sizes to run")
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing (the fastest is kept)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per route and cache state")
+    parser.add_argument("--label", default="run", help="Name of this run")
+    parser.add_argument("--output", help="Results file (default bench_suite_<label>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep each scale's database and files")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two results files")
+    parser.add_argument("--scale-run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.scale_run:
+        os.makedirs(args.workdir, exist_ok=True)
+        result = run_scale(args.seasons[0], args.teams, args.seed, args.workdir, args.repeat, args.requests)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        return
+
+    results = run_suite(args.seasons, args.teams, args.seed, args.repeat, args.requests, args.keep)
+    results['label'] = args.label
+    output = args.output or f"bench_suite_{args.label}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ffa_flask_app/benchmarks/bench_training.py
+'''
+Compares training one Random Forest per target stat with a single multi-output
+Random Forest per position: fit time, per-stat MSE and prediction latency.
+
+Usage (from the ffa_flask_app directory):
+    python -m benchmarks.bench_training --position RB
+'''
+
+import argparse
+import contextlib
+import io
+import time
+
+from predict_player_performance import (
+    app, build_training_dataset, get_target_stats, get_feature_columns,
+    train_model, train_multi_output_model
+)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        result = func(*args, **kwargs)
+    return time.perf_counter() - start, result, output.getvalue()
+
+
+def prediction_latency(predict, X, repeat=20):
+    """Median wall time of predict(X) over `repeat` calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-stat vs multi-output training")
+    parser.add_argument("--position", default="RB")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows scored in the batch latency test")
+    args = parser.parse_args()
+
+    with app.app_context():
+        training_df = build_training_dataset(args.position)
+
+    target_stats = get_target_stats(args.position)
+    feature_columns = get_feature_columns(target_stats)
+    print(f"{len(training_df)} training rows, {len(feature_columns)} features, {len(target_stats)} target stats")
+
+    per_stat_time = 0.0
+    per_stat_models = {}
+    per_stat_report = ""
+    for stat in target_stats:
+        elapsed, per_stat_models[stat], output = timed(train_model, training_df, stat, feature_columns)
+        per_stat_time += elapsed
+        per_stat_report += output
+
+    multi_time, multi_model, multi_report = timed(
+        train_multi_output_model, training_df, target_stats, feature_columns
+    )
+
+    print(f"\nPer-stat forests fit:  {per_stat_time:.2f}s")
+    print(f"Multi-output fit:      {multi_time:.2f}s")
+    print("\nPer-stat MSE:\n" + per_stat_report)
+    print("Multi-output MSE:\n" + multi_report)
+
+    single_row = training_df[feature_columns].iloc[:1]
+    batch = training_df[feature_columns].iloc[:args.batch_size]
+
+    for label, X in [("1 row", single_row), (f"{len(batch)} rows", batch)]:
+        per_stat_latency = sum(prediction_latency(model.predict, X) for model in per_stat_models.values())
+        multi_latency = prediction_latency(multi_model.predict, X)
+        print(f"Predict {label}: per-stat {per_stat_latency * 1000:.1f}ms, multi-output {multi_latency * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
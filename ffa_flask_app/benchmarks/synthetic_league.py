@@ -0,0 +1,351 @@
+# ffa_flask_app/benchmarks/synthetic_league.py
+'''
+Generates a synthetic but realistic league: teams in divisions, 17-week seasons, depth charts
+with starters and backups, mid-season trades and box scores whose numbers look like the NFL's.
+The same league can be written straight into the database, or as the api-sports JSON responses
+import_data.py would fetch (into a raw response cache directory) so the real import path runs.
+
+Usage (from the ffa_flask_app directory, DATABASE_URL pointing at an empty, migrated database):
+    python -m benchmarks.synthetic_league --seasons 3 --database
+    python -m benchmarks.synthetic_league --seasons 3 --teams-only --payloads /tmp/raw_responses
+    RAW_RESPONSE_CACHE_DIR=/tmp/raw_responses python import_data.py --replay
+'''
+
+import argparse
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.raw_cache import RawResponseCache
+
+NFL_TEAMS = [
+    ("BUF", "AFC East"), ("MIA", "AFC East"), ("NE", "AFC East"), ("NYJ", "AFC East"),
+    ("BAL", "AFC North"), ("CIN", "AFC North"), ("CLE", "AFC North"), ("PIT", "AFC North"),
+    ("HOU", "AFC South"), ("IND", "AFC South"), ("JAX", "AFC South"), ("TEN", "AFC South"),
+    ("DEN", "AFC West"), ("KC", "AFC West"), ("LV", "AFC West"), ("LAC", "AFC West"),
+    ("DAL", "NFC East"), ("NYG", "NFC East"), ("PHI", "NFC East"), ("WAS", "NFC East"),
+    ("CHI", "NFC North"), ("DET", "NFC North"), ("GB", "NFC North"), ("MIN", "NFC North"),
+    ("ATL", "NFC South"), ("CAR", "NFC South"), ("NO", "NFC South"), ("TB", "NFC South"),
+    ("ARI", "NFC West"), ("LAR", "NFC West"), ("SF", "NFC West"), ("SEA", "NFC West"),
+]
+
+# Depth chart per team: ingest only ever assigns QB, RB and WR
+DEPTH_CHART = {"QB": 2, "RB": 3, "WR": 6}
+# Share of the team's carries and targets by depth (starter first)
+CARRY_SHARE = [0.62, 0.30, 0.08]
+TARGET_SHARE = {"RB": [0.10, 0.05, 0.0], "WR": [0.26, 0.21, 0.16, 0.09, 0.05, 0.03]}
+
+FIRST_NAMES = ["Josh", "Tyreek", "Justin", "Davante", "Saquon", "Derrick", "Cooper", "Jalen", "Amon-Ra",
+               "Breece", "Garrett", "Ja'Marr", "Christian", "Travis", "Stefon", "Deebo", "Jonathan", "Tee"]
+LAST_NAMES = ["Allen", "Hill", "Jefferson", "Adams", "Barkley", "Henry", "Kupp", "Hurts", "St. Brown",
+              "Hall", "Wilson", "Chase", "McCaffrey", "Kelce", "Diggs", "Samuel", "Taylor", "Higgins"]
+
+WEEKS = 17
+TRADE_WEEK = 8         # Trades happen after this week
+TRADE_RATE = 0.03      # Share of players moved at the deadline
+OFFSEASON_MOVE_RATE = 0.12
+KICKOFF_TIMES = [time(17, 0), time(20, 5), time(20, 25), time(0, 20)]
+
+
+class League:
+    """
+    One generated league. Rows are plain dicts keyed like the model columns
+    (teams, players, player_teams, games, player_games), box_scores maps game_id -> [(team_id, player_id, stats)].
+    """
+
+    def __init__(self):
+        self.teams, self.players, self.player_teams, self.games, self.player_games = [], [], [], [], []
+        self.box_scores = {}
+
+    def counts(self):
+        return {name: len(getattr(self, name)) for name in
+                ("teams", "players", "player_teams", "games", "player_games")}
+
+
+def _clip(value, low=0):
+    return max(low, int(round(value)))
+
+
+def _player_line(rng, position, depth, skill, team_carries, team_pass_attempts):
+    """One player's stat line; None when the player didn't record anything."""
+    line = dict.fromkeys([
+        'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int',
+        'rush_attempts', 'rush_yards', 'rush_tds', 'longest_rush',
+        'targets', 'receptions', 'rec_yards', 'rec_tds', 'longest_rec'
+    ], 0)
+
+    if position == "QB":
+        if depth > 0 and rng.random() > 0.06:  # Backups rarely play
+            return None
+        attempts = team_pass_attempts if depth == 0 else _clip(rng.gauss(12, 5), 1)
+        completions = sum(rng.random() < 0.63 + 0.05 * (skill - 1) for _ in range(attempts))
+        line.update(pass_attempts=attempts, pass_completions=completions,
+                    pass_yards=_clip(completions * rng.gauss(11.0 * skill, 1.5)),
+                    pass_tds=sum(rng.random() < 0.045 * skill for _ in range(attempts)),
+                    pass_int=sum(rng.random() < 0.024 for _ in range(attempts)),
+                    rush_attempts=_clip(rng.gauss(3.5, 2)))
+    else:
+        shares = TARGET_SHARE[position]
+        targets = _clip(rng.gauss(team_pass_attempts * shares[depth], 1.5)) if depth < len(shares) else 0
+        receptions = sum(rng.random() < (0.75 if position == "RB" else 0.63) for _ in range(targets))
+        rec_gains = [_clip(rng.expovariate(1 / ((7.5 if position == "RB" else 12.5) * skill)), -2)
+                     for _ in range(receptions)]
+        line.update(targets=targets, receptions=receptions, rec_yards=sum(rec_gains),
+                    longest_rec=max(rec_gains, default=0),
+                    rec_tds=sum(rng.random() < 0.055 * skill for _ in range(receptions)))
+        if position == "RB" and depth < len(CARRY_SHARE):
+            line['rush_attempts'] = _clip(rng.gauss(team_carries * CARRY_SHARE[depth], 2))
+
+    if line['rush_attempts']:
+        gains = [_clip(rng.expovariate(1 / (4.3 * skill)) - 1.5, -5) for _ in range(line['rush_attempts'])]
+        line.update(rush_yards=sum(gains), longest_rush=max(gains),
+                    rush_tds=sum(rng.random() < 0.03 * skill for _ in range(line['rush_attempts'])))
+
+    return line if any(line.values()) else None
+
+
+def generate_league(seasons=3, teams=32, first_season=2021, seed=0, unplayed_weeks=0):
+    """
+    Build a League of `seasons` seasons for the first `teams` NFL teams, deterministic for a seed.
+    The last `unplayed_weeks` weeks of the last season are only scheduled: no scores, no box scores.
+    """
+    rng = random.Random(seed)
+    league = League()
+    team_ids = list(range(1, teams + 1))
+    league.teams = [{'id': team_id, 'name': NFL_TEAMS[team_id - 1][0], 'division': NFL_TEAMS[team_id - 1][1]}
+                    for team_id in team_ids]
+
+    # Depth charts: team -> position -> [player_id] (starter first), and each player's skill
+    depth_charts = {team_id: {position: [] for position in DEPTH_CHART} for team_id in team_ids}
+    skills, open_spells = {}, {}  # open_spells: player_id -> index into league.player_teams
+
+    def sign(player_id, team_id, position, on_date, front=False):
+        chart = depth_charts[team_id][position]
+        if front:
+            chart.insert(0, player_id)
+        else:
+            chart.append(player_id)
+        open_spells[player_id] = len(league.player_teams)
+        league.player_teams.append({'player_id': player_id, 'team_id': team_id,
+                                    'start_date': on_date, 'end_date': None})
+
+    def release(player_id, team_id, position, on_date):
+        depth_charts[team_id][position].remove(player_id)
+        league.player_teams[open_spells.pop(player_id)]['end_date'] = on_date - timedelta(days=1)
+
+    def new_player(position, team_id, on_date):
+        player_id = len(league.players) + 1
+        league.players.append({'id': player_id, 'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                               'position': position})
+        skills[player_id] = min(1.5, max(0.6, rng.gauss(1.0, 0.15)))
+        sign(player_id, team_id, position, on_date)
+
+    first_day = date(first_season, 8, 1)
+    for team_id in team_ids:
+        for position, size in DEPTH_CHART.items():
+            for _ in range(size):
+                new_player(position, team_id, first_day)
+
+    def move_players(rate, on_date):
+        """Move a share of players to another team; the depth chart they leave is refilled."""
+        moving = [(player_id, team_id, position)
+                  for team_id in team_ids for position in DEPTH_CHART
+                  for player_id in depth_charts[team_id][position]
+                  if len(team_ids) > 1 and rng.random() < rate]
+        for player_id, team_id, position in moving:
+            new_team = rng.choice([other for other in team_ids if other != team_id])
+            release(player_id, team_id, position, on_date)
+            sign(player_id, new_team, position, on_date, front=skills[player_id] > 1.1)
+        for team_id in team_ids:
+            for position, size in DEPTH_CHART.items():
+                chart = depth_charts[team_id][position]
+                while len(chart) < size:
+                    new_player(position, team_id, on_date)
+                while len(chart) > size:
+                    release(chart[-1], team_id, position, on_date)
+
+    game_id = 0
+    for season in range(first_season, first_season + seasons):
+        if season > first_season:
+            move_players(OFFSEASON_MOVE_RATE, date(season, 3, 15))
+        opener = date(season, 9, 7) + timedelta(days=(3 - date(season, 9, 7).weekday()) % 7)  # Thursday
+
+        for week in range(1, WEEKS + 1):
+            if week == TRADE_WEEK + 1:
+                move_players(TRADE_RATE, opener + timedelta(weeks=week - 1))
+            order = team_ids[:]
+            rng.shuffle(order)
+            for slot, (home, away) in enumerate(zip(order[::2], order[1::2])):
+                game_id += 1
+                # Thursday opener, the rest on Sunday, the last one on Monday night
+                day = 0 if slot == 0 else (3 if slot < len(order) // 2 - 1 else 4)
+                game_date = opener + timedelta(weeks=week - 1, days=day)
+                if season == first_season + seasons - 1 and week > WEEKS - unplayed_weeks:
+                    league.games.append({
+                        'id': game_id, 'home_team_id': home, 'away_team_id': away, 'date': game_date,
+                        'game_time': rng.choice(KICKOFF_TIMES),
+                        'home_team_score': None, 'away_team_score': None, 'stats_processed': False,
+                    })
+                    continue
+                points, box_score = {}, []
+                for team_id in (home, away):
+                    team_carries = _clip(rng.gauss(26, 4), 10)
+                    team_pass_attempts = _clip(rng.gauss(34, 6), 15)
+                    touchdowns = 0
+                    for position, chart in depth_charts[team_id].items():
+                        for depth, player_id in enumerate(chart):
+                            line = _player_line(rng, position, depth, skills[player_id],
+                                                team_carries, team_pass_attempts)
+                            if line is None:
+                                continue
+                            touchdowns += line['pass_tds'] + line['rush_tds']
+                            box_score.append((team_id, player_id, line))
+                            league.player_games.append({'player_id': player_id, 'game_id': game_id,
+                                                        'team_id': team_id, **line})
+                    points[team_id] = 7 * touchdowns + 3 * _clip(rng.gauss(1.7, 1.1))
+                league.box_scores[game_id] = box_score
+                league.games.append({
+                    'id': game_id, 'home_team_id': home, 'away_team_id': away, 'date': game_date,
+                    'game_time': rng.choice(KICKOFF_TIMES),
+                    'home_team_score': points[home], 'away_team_score': points[away],
+                    'stats_processed': True,
+                })
+    return league
+
+
+def write_database(league, teams_only=False, batch_size=5000):
+    """Bulk insert the league (or just its teams) into the app's database. Commits."""
+    from app import db
+    from app.models import Team, Player, PlayerTeam, Game, PlayerGame, insert_ignore
+
+    insert_ignore(Team, league.teams)
+    if not teams_only:
+        insert_ignore(Player, league.players)
+        insert_ignore(PlayerTeam, league.player_teams)
+        insert_ignore(Game, league.games)
+        for start in range(0, len(league.player_games), batch_size):
+            insert_ignore(PlayerGame, league.player_games[start:start + batch_size])
+    db.session.commit()
+
+
+def _team_json(team):
+    return {"id": team['id'], "name": team['name'], "logo": f"https://media.api-sports.io/american-football/teams/{team['id']}.png"}
+
+
+def _game_json(game, teams, stage="Regular Season", week=None):
+    kickoff = datetime.combine(game['date'], game['game_time'], tzinfo=timezone.utc)
+    return {
+        "game": {
+            "id": game['id'],
+            "stage": stage,
+            "week": f"Week {week}" if week else "Preseason",
+            "date": {"timezone": "UTC", "date": game['date'].isoformat(),
+                     "time": game['game_time'].strftime("%H:%M"), "timestamp": int(kickoff.timestamp())},
+            "venue": {"name": f"{teams[game['home_team_id']]['name']} Stadium", "city": None},
+            "status": ({"short": "FT", "long": "Finished", "timer": None} if game['home_team_score'] is not None
+                       else {"short": "NS", "long": "Not Started", "timer": None}),
+        },
+        "league": {"id": 1, "name": "NFL", "season": str(game['date'].year if game['date'].month >= 3
+                                                         else game['date'].year - 1)},
+        "teams": {"home": _team_json(teams[game['home_team_id']]), "away": _team_json(teams[game['away_team_id']])},
+        "scores": {"home": {"total": game['home_team_score']}, "away": {"total": game['away_team_score']}},
+    }
+
+
+def _box_score_json(box_score, teams, players):
+    """A /games/statistics/players response: per team, Passing/Rushing/Receiving groups of players."""
+    response = []
+    for team_id in dict.fromkeys(team_id for team_id, _, _ in box_score):
+        groups = {"Passing": [], "Rushing": [], "Receiving": []}
+        for line_team, player_id, line in box_score:
+            if line_team != team_id:
+                continue
+            player = {"id": player_id, "name": players[player_id]['name'], "image": None}
+            if line['pass_attempts']:
+                groups["Passing"].append({"player": player, "statistics": [
+                    {"name": "comp att", "value": f"{line['pass_completions']}/{line['pass_attempts']}"},
+                    {"name": "yards", "value": str(line['pass_yards'])},
+                    {"name": "passing touch downs", "value": str(line['pass_tds'])},
+                    {"name": "interceptions", "value": str(line['pass_int'])},
+                ]})
+            if line['rush_attempts']:
+                groups["Rushing"].append({"player": player, "statistics": [
+                    {"name": "total rushes", "value": str(line['rush_attempts'])},
+                    {"name": "yards", "value": str(line['rush_yards'])},
+                    {"name": "rushing touch downs", "value": str(line['rush_tds'])},
+                    {"name": "longest rush", "value": str(line['longest_rush'])},
+                ]})
+            if line['targets']:
+                groups["Receiving"].append({"player": player, "statistics": [
+                    {"name": "targets", "value": str(line['targets'])},
+                    {"name": "total receptions", "value": str(line['receptions'])},
+                    {"name": "yards", "value": str(line['rec_yards'])},
+                    {"name": "receiving touch downs", "value": str(line['rec_tds'])},
+                    {"name": "longest reception", "value": str(line['longest_rec'])},
+                ]})
+        response.append({"team": _team_json(teams[team_id]),
+                         "groups": [{"name": name, "players": entries} for name, entries in groups.items()]})
+    return {"get": "games/statistics/players", "results": len(response), "response": response}
+
+
+def write_api_payloads(league, directory):
+    """
+    Store the league as the api-sports responses import_data.py would fetch: one /games response
+    per (team, season), with a preseason game it should skip, and one box score per game.
+    Returns the number of responses written.
+    """
+    cache = RawResponseCache(directory)
+    teams = {team['id']: team for team in league.teams}
+    players = {player['id']: player for player in league.players}
+
+    by_team_season = {}
+    for game in league.games:
+        season = game['date'].year if game['date'].month >= 3 else game['date'].year - 1
+        for team_id in (game['home_team_id'], game['away_team_id']):
+            by_team_season.setdefault((team_id, season), []).append(game)
+
+    written = 0
+    for (team_id, season), games in by_team_season.items():
+        preseason = {**games[0], 'id': 10_000_000 + team_id * 100 + season % 100,
+                     'date': games[0]['date'] - timedelta(weeks=3)}
+        response = [_game_json(preseason, teams, stage="Pre Season")] + [
+            _game_json(game, teams, week=week) for week, game in enumerate(games, start=1)
+        ]
+        cache.put("/games", {"team": str(team_id), "season": str(season)},
+                  {"get": "games", "results": len(response), "response": response})
+        written += 1
+
+    for game_id, box_score in league.box_scores.items():
+        cache.put("/games/statistics/players", {"id": game_id}, _box_score_json(box_score, teams, players))
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic league")
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--teams", type=int, default=32)
+    parser.add_argument("--first-season", type=int, default=2021)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unplayed-weeks", type=int, default=0,
+                        help="Leave the last weeks of the last season scheduled but not played")
+    parser.add_argument("--database", action="store_true", help="Insert the league into DATABASE_URL")
+    parser.add_argument("--teams-only", action="store_true",
+                        help="Only insert the teams (the import path adds everything else)")
+    parser.add_argument("--payloads", help="Write fake api-sports responses to this raw response cache directory")
+    args = parser.parse_args()
+
+    league = generate_league(args.seasons, args.teams, args.first_season, args.seed, args.unplayed_weeks)
+    print(f"Generated {league.counts()}")
+
+    if args.database or args.teams_only:
+        from app import create_app
+        with create_app().app_context():
+            write_database(league, teams_only=args.teams_only)
+        print("Teams written to the database" if args.teams_only else "League written to the database")
+    if args.payloads:
+        written = write_api_payloads(league, args.payloads)
+        print(f"Wrote {written} api-sports responses to {args.payloads}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import argparse
+
+from app import create_app
+from app.snapshot import export_snapshot
+from app.metrics import timed_job
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export Game, PlayerGame, Player and PlayerTeam to a columnar snapshot for database-free training"
+    )
+    parser.add_argument("--output", default=app.config["SNAPSHOT_DIR"], help="Snapshot directory")
+    args = parser.parse_args()
+
+    with app.app_context(), timed_job("export_snapshot"):
+        manifest = export_snapshot(args.output)
+        for table, info in manifest["tables"].items():
+            print(f"{table}: {info['rows']} rows")
+        print(f"Snapshot of data version {manifest['data_version']} written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,29 @@
 from app.models import *
 from app import create_app
+from app.ingest import ingest_player_stats, ingest_player_stats_batch
+from app.data_version import bump_data_version
+from app.response_cache import invalidate_response_cache
+from app.team_stats import refresh_team_season_stats
+from app.projections import season_of
+from app.api_client import ApiSportsClient, QuotaExhausted
+from app.api_quota import QuotaTracker
+from app.backfill import BOX_SCORE_ENDPOINT, GAMES_ENDPOINT, describe_plan, plan_backfill, season_games_params
+from app.raw_cache import RawResponseCache
+from app.metrics import timed_job
+from app.model_registry import current_data_version
+from app.projection_store import refresh_upcoming_projections
+from app.ingest_queue import (
+    LeaseHeartbeat, claim_jobs, complete_job, enqueue_unprocessed_games, fail_job, queue_status,
+    release_jobs, requeue_failed_jobs
+)
+import argparse
+import socket
+import threading
 import time
-import pandas as pd
-import requests
 import os
 from dotenv import load_dotenv
-import json
-from datetime import datetime, date
+from sqlalchemy import bindparam, update
+from datetime import datetime, date, timezone
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -14,12 +31,23 @@ load_dotenv()
 app = create_app()
 
 
+def api_client():
+    '''API client that counts its requests against the quota shared by every process (see app/api_quota.py).'''
+    return ApiSportsClient.from_config(app.config, quota=QuotaTracker.from_app(app))
+
+
 def import_game_data(games):
     '''
-    Takes the json response from https://v1.american-football.api-sports.io/games (with team and season parameters)
-    and creates a new game object, adding it to the database by calling add_game (in models.py)
+    Takes the json response from https://v1.american-football.api-sports.io/games (a team's or a
+    whole league's season) and adds the games that aren't in the database yet. Games listed more
+    than once (per-team responses list every game twice) are deduped by id before touching the
+    database, games of teams missing from the teams table are skipped (and printed), and the new
+    ones are written with a single insert. Games not played yet are stored with NULL scores (the
+    upcoming week is projected from them); their scores are filled in once a later response has
+    them. Returns the number added.
     '''
     with app.app_context():
+        rows, descriptions = {}, {}
         for game in games:
             game_info = game.get("game", {})
             if game_info.get("stage") != "Pre Season":
@@ -43,21 +71,70 @@ def import_game_data(games):
                 date = datetime.strptime(date_str, "%Y-%m-%d").date()
                 game_time = datetime.strptime(game_time_str, "%H:%M").time()
 
-                if not home_team_id or not away_team_id or not home_team_score or not away_team_score:
-                    print(f"Skipping game due to missing information")
+                if not home_team_id or not away_team_id:
+                    print("Skipping game due to missing information")
                     continue
+                if (home_team_score is None) != (away_team_score is None):
+                    # One score without the other: not a finished game, store it as scheduled
+                    home_team_score = away_team_score = None
                 
-                print(f"ID: {game_info.get("id")} - Date & Time: {date_str} {game_time_str} - {home_team.get('name')} vs {away_team.get('name')}: {home_team_score} - {away_team_score}")
-                # Add game to the database
-                add_game(home_team_id, away_team_id, home_team_score=home_team_score, away_team_score=away_team_score, 
-                        date=date, game_time=game_time, id=game_id)
-            
-
-def static_team_game_import():
+                if game_id in rows:
+                    continue
+                rows[game_id] = {
+                    'id': game_id, 'home_team_id': home_team_id, 'away_team_id': away_team_id,
+                    'home_team_score': home_team_score, 'away_team_score': away_team_score,
+                    'date': date, 'game_time': game_time, 'stats_processed': False,
+                }
+                descriptions[game_id] = f"{date_str} {game_time_str} - {home_team.get('name')} vs {away_team.get('name')}: {home_team_score} - {away_team_score}"
+
+        # A team the teams table doesn't know would fail the whole insert on its foreign key
+        known_teams = {team_id for (team_id,) in db.session.query(Team.id).all()}
+        for game_id in [game_id for game_id, row in rows.items()
+                        if row['home_team_id'] not in known_teams or row['away_team_id'] not in known_teams]:
+            print(f"Skipping game {game_id} with an unknown team: {descriptions[game_id]}")
+            del rows[game_id]
+
+        existing = dict(
+            db.session.query(Game.id, Game.home_team_score).filter(Game.id.in_(list(rows))).all()
+        ) if rows else {}
+        new_games = [row for game_id, row in rows.items() if game_id not in existing]
+        for row in new_games:
+            print(f"ID: {row['id']} - Date & Time: {descriptions[row['id']]}")
+        # Games with a new id but the same teams and date are skipped by the natural key
+        insert_ignore(Game, new_games)
+
+        # Scheduled games that have been played since they were stored
+        played = [row for game_id, row in rows.items()
+                  if game_id in existing and existing[game_id] is None and row['home_team_score'] is not None]
+        if played:
+            games_table = Game.__table__
+            db.session.execute(
+                update(games_table).where(games_table.c.id == bindparam('b_id')).values(
+                    home_team_score=bindparam('b_home_team_score'), away_team_score=bindparam('b_away_team_score')
+                ),
+                [{'b_id': row['id'], 'b_home_team_score': row['home_team_score'],
+                  'b_away_team_score': row['away_team_score']} for row in played],
+            )
+            for row in played:
+                print(f"Scored: {descriptions[row['id']]}")
+        added_seasons = {season_of(row['date']) for row in new_games + played}
+
+        # New games and scores change team records and what the read endpoints return
+        if added_seasons:
+            refresh_team_season_stats(sorted(added_seasons))
+            bump_data_version()
+            db.session.commit()
+            invalidate_response_cache('teams')
+        return len(new_games)
+
+
+def static_team_game_import(season="2022", client=None, refresh=False):
     '''
     API call commented out in case this function is accidentally recalled.
     This function does a static import for all 32 NFL teams from a specific season (year)
     into the postgres database
+    Responses come from the raw response cache when available; pass refresh=True for a season
+    that is still being played so new scores are fetched.
     '''
     team_ids = {
         "Raiders" : ["OAK", "AFC West", 1],
@@ -97,52 +174,39 @@ def static_team_game_import():
     #     for team in team_ids:
     #         add_team(team_ids[team][0], team_ids[team][1], team_ids[team][2])
 
-    API_URL = "https://v1.american-football.api-sports.io"
-    API_KEY = os.getenv("API_SPORTS_NFL_KEY")
-
-    endpoint = "/games"
-
-    api_counter = 0
+    client = client or api_client()
 
-    for team in team_ids:
-        # Parameters to be sent in the query string
-        params = {
-            "season": "2022",
+    # Parameters to be sent in the query string, one request per team
+    params_list = [
+        {
+            "season": str(season),
             "team": str(team_ids[team][2]),
             "timezone" : "America/New_York"
         }
-
-        # Headers to include in the request
-        headers = {
-            'x-rapidapi-host': "v1.american-football.api-sports.io",
-            'x-rapidapi-key': API_KEY
-        }
-        
-        # Make the GET request
-
-        # TEN REQUESTS PER MINUTE
-        api_counter += 1
-        if api_counter % 10 == 0:
-            print("Waiting to not screw with rate limiter...")
-            time.sleep(61)
-            print("Back to it!")
-        
-        response = requests.get(API_URL + endpoint, headers=headers, params=params)
-
-        # Check the response status
-        if response.status_code == 200:
-            # Successful request
-            data = response.json()
-            games = data.get("response", [])
-            import_game_data(games)
-            print("Data added to database!")
-        else:
+        for team in team_ids
+    ]
+
+    # Requests are paced by the client's rate limiter; every game is listed by both its teams,
+    # so the responses are imported together and each game is written once
+    games = []
+    for params, data, error in client.fetch_many("/games", params_list, refresh=refresh):
+        if error:
             # Something went wrong
-            print(f"Error: {response.status_code} - {response.text}")
+            print(f"Error: {error}")
+            continue
+        games.extend(data.get("response", []))
 
+    added = import_game_data(games)
+    print(f"{added} games added to database!")
 
-def process_player_stats_from_game(data, game_id, game_date):
-    
+
+def aggregate_player_stats(data):
+    '''
+    Takes the json response from https://v1.american-football.api-sports.io/games/statistics/players
+    and sums each player's Passing, Rushing and Receiving groups into one stat line keyed by player_id.
+    No database access: positions are guessed from the first group a player appears in and only
+    used when the player is new.
+    '''
     # Create a dictionary to aggregate stats by player_id
     aggregated_stats = {}
 
@@ -157,17 +221,13 @@ def process_player_stats_from_game(data, game_id, game_date):
 
                     # Initialize stats for the player if not already aggregated
                     if player_id not in aggregated_stats:
-                        
-                        player = Player.query.filter_by(id=player_id).first()
-                        if player:
-                            position = player.position
-                        else:  
-                            if group['name'] == 'Passing':
-                                position = "QB"
-                            elif group['name'] == 'Rushing':
-                                position = "RB"
-                            else:
-                                position = "WR"
+
+                        if group['name'] == 'Passing':
+                            position = "QB"
+                        elif group['name'] == 'Rushing':
+                            position = "RB"
+                        else:
+                            position = "WR"
 
                         aggregated_stats[player_id] = {
                             'team_id': team_id,
@@ -211,35 +271,12 @@ def process_player_stats_from_game(data, game_id, game_date):
                         aggregated_stats[player_id]['longest_rec'] = int(stats.get('longest reception', '0'))
                     
 
-    # Process the aggregated statistics
-    for player_id, stats in aggregated_stats.items():
-        # Add the player to the database if he doesn't exist
+    return aggregated_stats
 
-        add_player(stats['name'], stats['position'], stats['team_id'], start_date=game_date, id=player_id)
 
+def print_player_stats(aggregated_stats, game_id):
+    for player_id, stats in aggregated_stats.items():
         print(f"Name: {stats['name']} - Position: {stats['position']} - Team ID: {stats['team_id']} - Player ID: {player_id}")
-
-        # Add the PlayerGame to the database if it doesn't exist for this player and game
-
-        add_player_game(
-            player_id,
-            game_id,
-            pass_attempts=stats['pass_attempts'],
-            pass_completions=stats['pass_completions'],
-            pass_yards=stats['pass_yards'],
-            pass_tds=stats['pass_tds'],
-            pass_int=stats['pass_int'],
-            rush_attempts=stats['rush_attempts'],
-            rush_yards=stats['rush_yards'],
-            rush_tds=stats['rush_tds'],
-            longest_rush=stats['longest_rush'],
-            targets=stats['targets'],
-            receptions=stats['receptions'],
-            rec_yards=stats['rec_yards'],
-            rec_tds=stats['rec_tds'],
-            longest_rec=stats['longest_rec']
-        )
-
         print(f"Player ID: {player_id} - Game ID: {game_id}")
         print(f"Passing - Attempts: {stats['pass_attempts']} | Completions: {stats['pass_completions']} | Yds: {stats['pass_yards']} | Tds: {stats['pass_tds']} | Int: {stats['pass_int']}")
         print(f"Rushing - Attempts: {stats['rush_attempts']} | Yds: {stats['rush_yards']} | Tds: {stats['rush_tds']} | Longest Rush: {stats['longest_rush']}")
@@ -247,89 +284,279 @@ def process_player_stats_from_game(data, game_id, game_date):
         print("----------------------------------------------------------------------")
         print()
 
-def get_oldest_unprocessed_game():
-    try:
-        # Query for the oldest game with stats_processed=False
-        game = Game.query.filter_by(stats_processed=False).order_by(Game.date.asc()).first()
-        if game:
-            print(f"Oldest unprocessed game found: Game ID {game.id}, Date: {game.date}")
-            return game.id, game.date  # Return the game ID
-        else:
-            print("No unprocessed games found.")
-            return None
-    except Exception as e:
-        print(f"Error retrieving oldest unprocessed game: {e}")
-        return None, None
-
 
-if __name__ == "__main__":
+def process_player_stats_from_game(data, game_id, game_date, verbose=True):
+    '''
+    Aggregates a game's box score and writes players, roster spells and PlayerGames in one
+    transaction, marking the game as stats_processed in that same commit.
+    '''
+    aggregated_stats = aggregate_player_stats(data)
+    if verbose:
+        print_player_stats(aggregated_stats, game_id)
 
-    with app.app_context():
-        for x in range(100):
-            print()
-            print(x)
-            if x != 0 and x % 10 == 0:
-                print("Waiting to not screw up API access")
-                time.sleep(60)
-
-            game_id, game_date = get_oldest_unprocessed_game()
-            if not game_id or not game_date:
-                print("No more unprocessed games available.")
-                break
+    return ingest_player_stats(aggregated_stats, game_id, game_date)
 
-            if game_id:
 
-                API_URL = "https://v1.american-football.api-sports.io"
-                API_KEY = os.getenv("API_SPORTS_NFL_KEY")
+def process_player_stats_batch(games):
+    '''
+    Same as process_player_stats_from_game for many games at once, committed once for the batch.
+    games is an iterable of (data, game_id, game_date) tuples.
+    '''
+    return ingest_player_stats_batch(
+        (aggregate_player_stats(data), game_id, game_date) for data, game_id, game_date in games
+    )
 
-                endpoint = "/games/statistics/players"
+def run_ingest_worker(client, worker_id=None, limit=None, stop=None):
+    '''
+    Ingests box scores from the ingest_jobs queue until it is empty (or `limit` games are done):
+    leases a batch of the oldest pending games, fetches them concurrently and writes each game,
+    its stats_processed flag and its job's done status in one commit. A heartbeat keeps the
+    lease alive meanwhile; if the worker dies, its games go back to the queue when the lease
+    expires, and on Ctrl-C (or once the `stop` event is set) they are released right away.
+    Returns the number of games ingested.
+    '''
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+    batch_size = app.config["INGEST_BATCH_SIZE"]
+    lease_seconds = app.config["INGEST_LEASE_SECONDS"]
+    max_attempts = app.config["INGEST_MAX_ATTEMPTS"]
 
-                api_counter = 0
+    processed = 0
+    with app.app_context():
+        while (limit is None or processed < limit) and not (stop and stop.is_set()):
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            token, games = claim_jobs(worker_id, size, lease_seconds, max_attempts)
+            if not games:
+                break
+            print(f"[{worker_id}] Leased {len(games)} games")
+            game_dates = dict(games)
+
+            try:
+                with LeaseHeartbeat(app, token, lease_seconds):
+                    params_list = [{"id": game_id} for game_id, _ in games]
+                    for params, data, error in client.fetch_many("/games/statistics/players", params_list):
+                        if stop and stop.is_set():
+                            break  # The rest of the batch is released below
+                        game_id = params["id"]
+                        if isinstance(error, QuotaExhausted):
+                            raise error  # Not the game's fault: it goes back to the queue untouched
+                        if error:
+                            print(f"[{worker_id}] Error fetching stats for Game ID {game_id}: {error}")
+                            fail_job(game_id, token, error, max_attempts)
+                            continue
+
+                        try:
+                            ingest_player_stats(aggregate_player_stats(data), game_id, game_dates[game_id], commit=False)
+                            if not complete_job(game_id, token):
+                                # Another worker took the game over after our lease expired, it writes it
+                                db.session.rollback()
+                                print(f"[{worker_id}] Lost the lease on Game ID {game_id}, skipped")
+                                continue
+                            db.session.commit()
+                            invalidate_response_cache('players')
+                            processed += 1
+                            print(f"[{worker_id}] Processed player stats from game: {game_id}")
+                        except Exception as e:
+                            db.session.rollback()
+                            print(f"[{worker_id}] Error processing stats for Game ID {game_id}: {e}")
+                            fail_job(game_id, token, e, max_attempts)
+            except BaseException as e:
+                db.session.rollback()
+                released = release_jobs(token)
+                print(f"[{worker_id}] Stopped after {processed} games ({e or type(e).__name__}), "
+                      f"released {released} games back to the queue")
+                raise
+
+            if stop and stop.is_set():
+                released = release_jobs(token)
+                print(f"[{worker_id}] Stopped after {processed} games, released {released} games back to the queue")
+
+    return processed
+
+
+def ingest_from_queue(workers=1, limit=None, client=None):
+    '''
+    Queues every unprocessed game that isn't queued yet, then runs `workers` ingest workers in
+    threads sharing one API client (and so one rate limit). Other processes or machines can run
+    workers against the same queue at the same time; each game is claimed by one of them.
+    '''
+    client = client or api_client()
+    with app.app_context():
+        queued = enqueue_unprocessed_games()
+        db.session.commit()
+        print(f"Queued {queued} new games: {queue_status()}")
+
+    per_worker = None if limit is None else -(-limit // workers)
+    if workers == 1:
+        processed = run_ingest_worker(client, limit=per_worker)
+    else:
+        results, errors = [0] * workers, []
+        stop = threading.Event()  # Ctrl-C only reaches the main thread, this tells the workers
+
+        def work(index):
+            try:
+                results[index] = run_ingest_worker(client, limit=per_worker, stop=stop)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(index,), name=f"ingest-{index}") for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            print("Interrupted, waiting for the workers to finish their current game and release their leases...")
+            stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+        if errors:
+            raise errors[0]
+        processed = sum(results)
 
-                # Headers to include in the request
-                headers = {
-                    'x-rapidapi-host': "v1.american-football.api-sports.io",
-                    'x-rapidapi-key': API_KEY
-                }
+    with app.app_context():
+        print(f"Processed {processed} games: {queue_status()}")
+    return processed
 
-                params = {
-                    "id" : game_id
-                }
 
-                response = requests.get(API_URL + endpoint, headers=headers, params=params)
+def backfill_seasons(first_season, last_season, workers=1, wait=True, plan_only=False, client=None):
+    '''
+    Imports every game and box score of a range of seasons with as few API calls as possible:
+    one /games call per season (deduped games are written once), then one box score per game
+    through the ingest queue, all within the daily and per-minute quota. When the day's quota is
+    used up it waits for the reset and carries on (or stops, with wait=False). Fetched responses
+    stay in the raw response cache and progress in the queue, so running it again resumes.
+    Returns the last plan (see app/backfill.py).
+    '''
+    seasons = list(range(first_season, last_season + 1))
+    quota = QuotaTracker.from_app(app)
+    client = client or ApiSportsClient.from_config(app.config, quota=quota)
+
+    def current_plan():
+        with app.app_context():
+            return plan_backfill(seasons, client.cache, quota.remaining_today(), quota.daily_limit,
+                                 quota.per_minute_limit, quota.now())
+
+    plan = current_plan()
+    print(describe_plan(plan))
+    if plan_only:
+        return plan
+
+    while True:
+        try:
+            # Season lists that are already cached cost nothing, importing them again is a no-op
+            season_params = [season_games_params(season) for season in seasons]
+            for params, data, error in client.fetch_many(GAMES_ENDPOINT, season_params):
+                if isinstance(error, QuotaExhausted):
+                    raise error
+                if error:
+                    print(f"Error fetching the games of season {params['season']}: {error}")
+                    continue
+                print(f"Season {params['season']}: {import_game_data(data.get('response', []))} new games")
+
+            ingest_from_queue(workers=workers, client=client)
+            break
+        except QuotaExhausted as e:
+            if not wait:
+                print(f"Daily quota used up, run the backfill again after {e.reset_at:%Y-%m-%d %H:%M} UTC to resume")
+                return current_plan()
+            print(f"Daily quota used up, waiting until {e.reset_at:%Y-%m-%d %H:%M} UTC")
+            time.sleep(max(0.0, (e.reset_at - datetime.now(timezone.utc)).total_seconds()) + 5)
+            print(describe_plan(current_plan()))
+
+    plan = current_plan()
+    if plan.season_calls or plan.box_score_calls:
+        print("Backfill finished with calls left that failed, see python3 import_data.py --status")
+        print(describe_plan(plan))
+    else:
+        print(f"Backfill of seasons {first_season}-{last_season} complete")
+    return plan
+
+
+def replay_games_from_cache(cache=None):
+    '''Imports every cached /games response (see import_game_data).'''
+    cache = cache or RawResponseCache(app.config["RAW_RESPONSE_CACHE_DIR"])
+    for _, params, data in cache.entries("/games"):
+        import_game_data(data.get("response", []))
+
+
+def replay_box_scores_from_cache(cache=None, batch_size=50):
+    '''
+    Ingests every cached box score whose game is in the database, oldest game first,
+    one commit per batch. Cache files are found from the game ids (their names are derived from
+    the request) and each payload is only read when its game is ingested, so memory stays flat
+    however many seasons are replayed. Returns the number of games processed.
+    '''
+    cache = cache or RawResponseCache(app.config["RAW_RESPONSE_CACHE_DIR"])
 
-                # Check the response status
-                if response.status_code == 200:
-                    # Successful request
+    with app.app_context():
+        games = [
+            (game_id, game_date)
+            for game_id, game_date in db.session.query(Game.id, Game.date).order_by(Game.date.asc(), Game.id).all()
+            if cache.contains(BOX_SCORE_ENDPOINT, {"id": game_id})
+        ]
 
-                    data = response.json()
+        processed = 0
+        for start in range(0, len(games), batch_size):
+            batch = games[start:start + batch_size]
+            process_player_stats_batch(
+                (cache.get(BOX_SCORE_ENDPOINT, {"id": game_id}), game_id, game_date) for game_id, game_date in batch
+            )
+            processed += len(batch)
+            print(f"Replayed {processed}/{len(games)} box scores")
 
-                    # Modify function to accept raw json rather than a file path
-                    process_player_stats_from_game(data, game_id, game_date)
+    return processed
 
-                    print(f"Processed player stats from game: {game_id}")
 
-                    # Update the stats_processed field in the database
-                    try:
-                        game = Game.query.get(game_id)
-                        if game:
-                            game.stats_processed = True
-                            db.session.commit()
-                            print(f"Game ID {game_id} marked as processed.")
-                        else:
-                            print(f"Game ID {game_id} not found.")
-                    except Exception as e:
-                        db.session.rollback()
-                        print(f"Error updating stats_processed for Game ID {game_id}: {e}")
-                else:
-                    # Something went wrong
-                    print(f"Error: {response.status_code} - {response.text}")
+def replay_from_cache(cache=None, batch_size=50):
+    '''
+    Rebuilds games and player stats from the raw response cache without calling the API.
+    /games responses are imported first so every Game exists, then box scores are ingested
+    oldest game first, one commit per batch.
+    '''
+    cache = cache or RawResponseCache(app.config["RAW_RESPONSE_CACHE_DIR"])
+    replay_games_from_cache(cache)
+    return replay_box_scores_from_cache(cache, batch_size)
 
-        
 
+if __name__ == "__main__":
 
-    
-    
+    parser = argparse.ArgumentParser(description="Import player stats from api-sports")
+    parser.add_argument("--limit", type=int, default=100, help="Maximum number of games to process")
+    parser.add_argument("--workers", type=int, default=1, help="Ingest workers (threads) sharing the API quota")
+    parser.add_argument("--all", action="store_true", help="Keep going until the queue is empty (ignores --limit)")
+    parser.add_argument("--status", action="store_true", help="Show the ingest queue and exit")
+    parser.add_argument("--requeue-failed", action="store_true", help="Give failed games another set of attempts")
+    parser.add_argument("--backfill", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="Import every game and box score of seasons FIRST to LAST within the API quota")
+    parser.add_argument("--plan", action="store_true", help="With --backfill: only show the calls it would make")
+    parser.add_argument("--no-wait", action="store_true",
+                        help="With --backfill: stop when the daily quota is used up instead of waiting for the reset")
+    parser.add_argument("--replay", action="store_true",
+                        help="Rebuild the database from the raw response cache without calling the API")
+    parser.add_argument("--no-projections", action="store_true",
+                        help="Don't update the models and project the upcoming week after new stats are ingested")
+    args = parser.parse_args()
+
+    if args.status or args.requeue_failed:
+        with app.app_context():
+            if args.requeue_failed:
+                print(f"Requeued {requeue_failed_jobs()} failed games")
+            print(queue_status())
+    else:
+        with app.app_context(), timed_job("import_data"):
+            data_version = current_data_version()
+            if args.replay:
+                replay_from_cache()
+            elif args.backfill:
+                backfill_seasons(*args.backfill, workers=args.workers, wait=not args.no_wait, plan_only=args.plan)
+            else:
+                ingest_from_queue(workers=args.workers, limit=None if args.all else args.limit)
+            ingested = current_data_version() != data_version
+
+        if ingested and not args.no_projections:
+            with app.app_context(), timed_job("project_upcoming_week"):
+                print(f"Stored {refresh_upcoming_projections()} projections for the upcoming week")
 
 
 '''
@@ -1,5 +1,13 @@
+import argparse
+
 from app import create_app
 from app.models import db, PlayerGame, PlayerTeam, Game, Team, Player
+from app.data_version import bump_data_version, bump_roster_version
+from app.raw_cache import RawResponseCache
+from app.roster_index import get_roster_index
+from app.roster_reconciliation import backfill_box_score_teams, reconcile_rosters
+from app.response_cache import invalidate_response_cache
+from app.metrics import timed_job
 
 app = create_app()
 
@@ -14,31 +22,26 @@ def get_team_id_by_abbreviation(abbreviation):
 def create_missing_player_team_entries():
     """Iterate through PlayerGame objects and ensure corresponding PlayerTeam entries exist."""
     with app.app_context():
-        player_games = PlayerGame.query.all()
+        # Every box score with its game in one query, teams are checked against the roster index
+        player_games = (
+            db.session.query(PlayerGame, Game, Player)
+            .join(Game, PlayerGame.game_id == Game.id)
+            .join(Player, PlayerGame.player_id == Player.id)
+            .filter(Game.date.isnot(None))
+            .order_by(Game.date.asc())
+            .all()
+        )
+        teams = {team.id: team for team in Team.query.all()}
+        roster_index = get_roster_index()
         missing_count = 0
 
-        for player_game in player_games:
-            player = Player.query.get(player_game.player_id)
-            game = Game.query.get(player_game.game_id)
+        for player_game, game, player in player_games:
             game_date = game.date
 
-            home_team = Team.query.get(game.home_team_id)
-            away_team = Team.query.get(game.away_team_id)
-
-            home_team_entry = (
-                PlayerTeam.query.filter_by(player_id=player.id, team_id=home_team.id)
-                .filter(PlayerTeam.start_date <= game_date)
-                .filter((PlayerTeam.end_date.is_(None)) | (PlayerTeam.end_date >= game_date))
-                .first()
-            )
-            away_team_entry = (
-                PlayerTeam.query.filter_by(player_id=player.id, team_id=away_team.id)
-                .filter(PlayerTeam.start_date <= game_date)
-                .filter((PlayerTeam.end_date.is_(None)) | (PlayerTeam.end_date >= game_date))
-                .first()
-            )
-
-            if not home_team_entry and not away_team_entry:
+            home_team = teams[game.home_team_id]
+            away_team = teams[game.away_team_id]
+
+            if roster_index.team_of(player.id, game_date) not in (home_team.id, away_team.id):
                 # PlayerTeam entry is missing for both home and away teams
                 print()
                 print(
@@ -50,6 +53,7 @@ def create_missing_player_team_entries():
 
                 if team_id:
                     # Create a new PlayerTeam entry
+                    bump_roster_version()
                     new_player_team = PlayerTeam(
                         player_id=player.id,
                         team_id=team_id,
@@ -57,14 +61,65 @@ def create_missing_player_team_entries():
                         end_date=None  # Leave end_date open-ended for now
                     )
                     db.session.add(new_player_team)
+                    roster_index.add([(player.id, team_id, game_date, None)])
                     missing_count += 1
                     print(f"Added PlayerTeam for Player {player.name}, Team {team_abbreviation}, Start Date {game_date}")
                 else:
                     print(f"Skipping Player {player.name} for Game {player_game.game_id} due to missing team information.")
 
         # Commit all changes to the database
+        if missing_count:
+            bump_data_version()
         db.session.commit()
+        invalidate_response_cache('players')
         print(f"Completed! Added {missing_count} missing PlayerTeam entries.")
 
+def reconcile_player_teams(report_path, dry_run=False, backfill=False):
+    """
+    Non-interactive reconciliation: teams are taken from the box scores, spells are opened, closed
+    or removed in bulk and only the games that can't be decided are written to report_path.
+    """
+    with app.app_context(), timed_job("reconcile_player_teams"):
+        if backfill:
+            backfilled = backfill_box_score_teams(RawResponseCache(app.config["RAW_RESPONSE_CACHE_DIR"]))
+            print(f"Backfilled the box-score team of {backfilled} player games from the raw response cache.")
+
+        roster_index = get_roster_index()
+        summary, report = reconcile_rosters(roster_index, dry_run=dry_run)
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            if summary['opened'] or summary['updated'] or summary['removed']:
+                bump_data_version()
+            db.session.commit()
+            roster_index.refresh()
+            invalidate_response_cache('players')
+
+        print(f"{summary['uncovered_games']} uncovered player games across {summary['players']} players.")
+        print(f"{'Would open' if dry_run else 'Opened'} {summary['opened']}, "
+              f"{'update' if dry_run else 'updated'} {summary['updated']} and "
+              f"{'remove' if dry_run else 'removed'} {summary['removed']} PlayerTeam spells.")
+        if not report.empty:
+            report.to_csv(report_path, index=False)
+            print(f"{len(report)} ambiguous player games written to {report_path} for manual review.")
+        else:
+            print("No ambiguous player games.")
+        return summary
+
+
 if __name__ == "__main__":
-    create_missing_player_team_entries()
+    parser = argparse.ArgumentParser(description="Make sure every box score is covered by a PlayerTeam spell")
+    parser.add_argument("--interactive", action="store_true",
+                        help="Prompt for the team of every uncovered box score instead of inferring it")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--backfill-from-cache", action="store_true",
+                        help="First fill in missing box-score teams from the raw response cache")
+    parser.add_argument("--report", default="roster_ambiguities.csv",
+                        help="Where to write the games that need a manual decision")
+    args = parser.parse_args()
+
+    if args.interactive:
+        create_missing_player_team_entries()
+    else:
+        reconcile_player_teams(args.report, dry_run=args.dry_run, backfill=args.backfill_from_cache)
@@ -1,67 +1,54 @@
+import argparse
+import time
+
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
-from itertools import groupby
-from operator import attrgetter
 from sqlalchemy.sql import func, case
 
 from app.models import *
 from app import create_app
+from app.features import build_feature_dataset, STATS
+from app.roster_index import get_roster_index
+from app.incremental import update_positions
+from app.training import DEFAULT_SEED, train_positions
+from app.metrics import timed_job
+from app.modeling import (
+    MULTI_OUTPUT, PER_STAT, PROJECTABLE_POSITIONS, get_target_stats, get_feature_columns, predict_stats,
+    fit_random_forest
+)
 
 app = create_app()
 
+# Trained models are cached on disk and reused until new games are ingested
+model_registry = app.extensions["model_registry"]
+
 
-def get_player_performance(player_id, num_games=8):
-    """Fetch past game performances for a specific player."""
-    return (PlayerGame.query
-            .join(Game, PlayerGame.game_id == Game.id)
-            .filter(PlayerGame.player_id == player_id)
+def get_player_performance(player_id, num_games=8, before_date=None):
+    """Fetch past game performances for a specific player (optionally only games before `before_date`)."""
+    query = (PlayerGame.query
+             .join(Game, PlayerGame.game_id == Game.id)
+             .filter(PlayerGame.player_id == player_id))
+    if before_date is not None:
+        query = query.filter(Game.date < before_date)  # Avoid leaking future games into features
+    return (query
             .order_by(Game.date.desc())  # Sort by most recent games
             .limit(num_games)  # Fetch the last `num_games` performances
             .all())
 
 def get_pos_vs_team(team_id, position, num_games=8):
-    """Fetch top performances of players with the same position against a specific team."""
+    """
+    Fetch top performances of opposing players with the same position against a specific team,
+    most recent first. Reads the DefenseVsPosition table kept up to date during ingest.
+    """
     if position not in ["QB", "RB", "WR"]:
         raise ValueError(f"Unsupported position: {position}. Supported positions are QB, RB, WR.")
-    
-    performances = (PlayerGame.query
-                       .join(Game, PlayerGame.game_id == Game.id)
-                       .join(Player, PlayerGame.player_id == Player.id)
-                       .filter((Game.away_team_id == team_id) | (Game.home_team_id == team_id))
-                       .filter(Player.position == position)  # Filter by position
-                       .order_by(Game.date.desc())  # Sort by most recent games
-                       .all())
-    
-    # Group by game_id and sort within each game by rushing yards and attempts
-    grouped_by_game = groupby(performances, key=attrgetter('game_id'))
-
-    top_performances = []
-
-    for game_id, game_performances in grouped_by_game:
-        # Define sorting criteria based on position
-        if position == "QB":
-            # Sort by passing yards, then passing attempts
-            top_player = sorted(game_performances, 
-                                key=lambda x: (x.pass_yards, x.pass_attempts), 
-                                reverse=True)[0]
-        elif position == "RB":
-            # Sort by rushing yards, then rushing attempts
-            top_player = sorted(game_performances, 
-                                key=lambda x: (x.rush_yards, x.rush_attempts), 
-                                reverse=True)[0]
-        elif position == "WR":
-            # Sort by receiving yards, then receptions
-            top_player = sorted(game_performances, 
-                                key=lambda x: (x.rec_yards, x.receptions), 
-                                reverse=True)[0]
-
-        top_performances.append(top_player)
-
-    # Limit to the last `num_games`
-    return top_performances[:num_games]
+
+    query = (DefenseVsPosition.query
+             .filter_by(team_id=team_id, position=position)
+             .order_by(DefenseVsPosition.date.desc()))  # Sort by most recent games
+    if num_games:
+        query = query.limit(num_games)  # Limit to the last `num_games`
+    return query.all()
 
 
 def calculate_moving_averages(player_games, stats, window=3):
@@ -73,6 +60,9 @@ def calculate_moving_averages(player_games, stats, window=3):
             data[stat].append(getattr(game, stat, 0))  # Default to 0 if stat is missing
 
     df = pd.DataFrame(data)
+    if df.empty:
+        # No earlier games (e.g. a player's debut), nothing to average yet
+        return pd.Series(np.nan, index=stats, dtype=float)
     moving_averages = df.rolling(window=window).mean().iloc[-1]  # Get the most recent moving averages
     return moving_averages
 
@@ -92,24 +82,25 @@ def calculate_opponent_averages(pos_vs_team_games, stats):
 def train_model(historical_data_df, target_column, feature_columns):
     """Train a Random Forest model for a specific stat."""
 
-    X = historical_data_df[feature_columns]
-    y = historical_data_df[target_column]
+    model, mse = fit_random_forest(historical_data_df, [target_column], feature_columns)
+    print(f"{target_column} - Mean Squared Error: {mse[target_column]:.2f}")
 
-    # Split data into train and test sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return model
 
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
 
-    # Evaluate the model
-    predictions = model.predict(X_test)
-    mse = mean_squared_error(y_test, predictions)
-    print(f"{target_column} - Mean Squared Error: {mse:.2f}")
+def train_multi_output_model(historical_data_df, target_stats, feature_columns, n_jobs=-1):
+    """
+    Train one Random Forest that predicts every target stat jointly.
+    Uses the same split as train_model and reports the MSE of each stat.
+    """
+    # n_jobs=-1 grows the trees on all cores
+    model, mse_per_stat = fit_random_forest(historical_data_df, target_stats, feature_columns, n_jobs=n_jobs)
+    for stat, mse in mse_per_stat.items():
+        print(f"{stat} - Mean Squared Error: {mse:.2f}")
 
     return model
 
 
-
 def predict_stat(model, combined_features, feature_columns):
     """Predict a single stat using the trained model."""
     try:
@@ -181,13 +172,40 @@ def load_historical_data(position):
     return query.all()
 
 
+def get_player_rolling_averages(player_id, window=8, before_date=None):
+    """
+    The player's stored rolling averages after their latest game (before `before_date` if given),
+    named like the training features (player_<stat>). None if the player has no games.
+    """
+    query = PlayerRollingStat.query.filter_by(player_id=player_id)
+    if before_date is not None:
+        query = query.filter(PlayerRollingStat.date < before_date)
+    snapshot = query.order_by(PlayerRollingStat.date.desc()).first()
+    if not snapshot:
+        return None
+    return pd.Series(
+        {f"player_{stat}": getattr(snapshot, f"avg{window}_{stat}") for stat in STATS},
+        dtype=float
+    )
+
+
+def get_defense_averages(team_id, position, before_date=None):
+    """
+    The team's stored rolling averages allowed to a position after its latest game
+    (before `before_date` if given), named like the training features (defense_<stat>).
+    """
+    query = DefenseVsPosition.query.filter_by(team_id=team_id, position=position)
+    if before_date is not None:
+        query = query.filter(DefenseVsPosition.date < before_date)
+    latest = query.order_by(DefenseVsPosition.date.desc()).first()
+    if not latest:
+        return None
+    return pd.Series({f"defense_{stat}": getattr(latest, f"avg_{stat}") for stat in STATS}, dtype=float)
+
+
 def get_player_team_on_date(player_id, game_date):
-    """Fetch the player's team for a specific game date."""
-    return PlayerTeam.query.filter(
-        PlayerTeam.player_id == player_id,
-        PlayerTeam.start_date <= game_date,
-        (PlayerTeam.end_date.is_(None) | (PlayerTeam.end_date >= game_date))
-    ).first()
+    """Fetch the id of the player's team for a specific game date (None when unknown)."""
+    return get_roster_index().team_of(player_id, game_date)
 
 
 def build_training_dataset(position):
@@ -196,6 +214,15 @@ def build_training_dataset(position):
     1. Player's 8-game averages
     2. Opponent defense's 8-game averages against the position
     3. Target stats from load_historical_data
+    All features are computed "as of" each game in one vectorized pass (see app/features.py).
+    """
+    return build_feature_dataset(position)
+
+
+def build_training_dataset_iterative(position):
+    """
+    Row-by-row version of build_training_dataset, kept as a reference for benchmarks.
+    Issues several queries per training row.
     """
     # Step 1: Load the historical data for the specified position
     historical_data = load_historical_data(position)
@@ -219,13 +246,11 @@ def build_training_dataset(position):
         game_date = Game.query.get(row['game_id']).date
 
         # Determine the player's team on the game date
-        player_team = get_player_team_on_date(player_id, game_date)
-        if not player_team:
+        player_team_id = get_player_team_on_date(player_id, game_date)
+        if not player_team_id:
             print(f"Error: Could not determine team for player {player_id} on {game_date}")
             continue
 
-        player_team_id = player_team.team_id
-
         # Determine opponent team ID
         opponent_team_id = (
             row['home_team_id'] if player_team_id == row['away_team_id']
@@ -233,7 +258,7 @@ def build_training_dataset(position):
         )
 
         # Step 3: Filter player's performances to the last 8 games before the current game date
-        player_games = get_player_performance(player_id)
+        player_games = get_player_performance(player_id, before_date=game_date)
         print(f"Player Games: {player_games}")
         
        
@@ -248,7 +273,7 @@ def build_training_dataset(position):
         )
 
         # Step 4: Filter defensive performances to the last 8 games before the current game date
-        defense_games = get_pos_vs_team(opponent_team_id, position)
+        defense_games = get_pos_vs_team(opponent_team_id, position, num_games=None)
         recent_defense_games = [
             dg for dg in defense_games if dg.game.date < game_date
         ]
@@ -267,11 +292,16 @@ def build_training_dataset(position):
 
         # Combine data for training
         combined_data = {
-            **player_8_game_avg,
-            **defense_8_game_avg,
+            'game_id': row['game_id'],
+            'player_id': player_id,
+            'team_id': player_team_id,
+            'opponent_team_id': opponent_team_id,
+            **player_8_game_avg.rename(lambda x: f"player_{x}"),
+            **defense_8_game_avg.rename(lambda x: f"defense_{x}"),
             'rush_attempts': row['rush_attempts'],
             'rush_yards': row['rush_yards'],
             'rush_tds': row['rush_tds'],
+            'targets': row['targets'],
             'receptions': row['receptions'],
             'rec_yards': row['rec_yards'],
             'rec_tds': row['rec_tds'],
@@ -291,6 +321,43 @@ def build_training_dataset(position):
 
 
 
+def train_models(position, target_stats, feature_columns, mode=MULTI_OUTPUT):
+    """
+    Build the training dataset for a position and train its models:
+    one multi-output model for all target stats (MULTI_OUTPUT) or one model per stat (PER_STAT).
+    Returns {stat: model}; in MULTI_OUTPUT mode every stat maps to the same model.
+    """
+    print("Building training dataset...")
+    training_df = build_training_dataset(position)
+    print(training_df.head)
+    print("Training models...")
+
+    if mode == MULTI_OUTPUT:
+        model = train_multi_output_model(training_df, target_stats, feature_columns)
+        return {stat: model for stat in target_stats}
+
+    models = {}
+    for stat in target_stats:
+        print(f"Training model for {stat}...")
+        models[stat] = train_model(training_df, stat, feature_columns)
+    return models
+
+
+def get_models(position, registry=model_registry, mode=None):
+    """
+    Load the models for a position from the registry, training them only if
+    games have been ingested since the stored artifact was built.
+    """
+    mode = mode or app.config["MODEL_TRAINING_MODE"]
+    target_stats = get_target_stats(position)
+    feature_columns = get_feature_columns(target_stats)
+    return registry.get_or_train(
+        position, feature_columns, target_stats,
+        lambda: train_models(position, target_stats, feature_columns, mode),
+        variant=mode
+    )
+
+
 def main():
     with app.app_context():
         player_name = input("Enter the player's name who you want to predict performance for: ")
@@ -305,77 +372,33 @@ def main():
             print(f"Team '{team_name}' not found.")
             return
 
-        stats = ['rush_attempts', 'rush_yards', 'rush_tds',
-                 'targets', 'receptions', 'rec_yards', 'rec_tds', 
-                 'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int']
-
-        player_games = get_player_performance(player.id)
-        pos_vs_team_games = get_pos_vs_team(team.id, player.position)
-
-        if not player_games:
+        # Precomputed, point-in-time averages over the same 8-game window the models are trained on
+        print("\nLoading player-specific moving averages...")
+        player_moving_averages = get_player_rolling_averages(player.id)
+        if player_moving_averages is None:
             print(f"No past performance data found for {player_name}.")
             return
+        print(player_moving_averages)
 
-        if not pos_vs_team_games:
+        print("\nLoading opponent-specific averages...")
+        opponent_averages = get_defense_averages(team.id, player.position)
+        if opponent_averages is None:
             print(f"No performance data found for {player.position} against {team_name}.")
             return
-
-        # Calculate moving averages
-        print("\nCalculating player-specific moving averages...")
-        player_moving_averages = calculate_moving_averages(player_games, stats, window=3)
-        print(player_moving_averages)
-
-        print("\nCalculating opponent-specific averages...")
-        opponent_averages = calculate_opponent_averages(pos_vs_team_games, stats)
         print(opponent_averages)
 
         # Combine features
         print("\nCombining features...")
-
-        # Rename columns for clarity
-        player_moving_averages = player_moving_averages.rename(lambda x: f"player_{x}")
-        opponent_averages = opponent_averages.rename(lambda x: f"opponent_{x}")
-
-        combined_features = pd.concat([player_moving_averages, opponent_averages], axis=1)
+        combined_features = pd.concat([player_moving_averages, opponent_averages])
         print(combined_features)
 
-        # Step 3: Load historical data and train models
-        
-        # Maybe shave off columns based on position?
-        print("Building training dataset...")
-        training_df = build_training_dataset(player.position)
-        print(training_df.head)
-        print("Training models...")
-
-        if player.position == 'RB' or player.position == 'WR' or player.position == 'TE':
-            target_stats = ['rush_attempts', 'rush_yards', 'rush_tds', 'targets', 'receptions', 'rec_yards', 'rec_tds']
-
-        elif player.position == 'QB':
-            target_stats = ['rush_attempts', 'rush_yards', 'rush_tds',
-                            'pass_attempts', 'pass_completions', 'pass_yards', 'pass_tds', 'pass_int']
-
-        models = {}
-        feature_columns_dict = {}
-
-        # Identify valid feature columns based on 8-game rolling averages
-        valid_features = [f"player_{col}" for col in target_stats] + [f"defense_{col}" for col in target_stats]
-
-        for stat in target_stats:
-            print(f"Training model for {stat}...")
-            
-            # Feature columns will only include rolling averages (player_ and defense_ prefixes)
-            feature_columns = [col for col in valid_features if col in training_df.columns]
-            feature_columns_dict[stat] = feature_columns
-
-            # Train the model using the filtered feature columns
-            models[stat] = train_model(training_df, stat, feature_columns)
+        # Step 3: Load cached models (trains and stores them if the data changed)
+        artifact = get_models(player.position)
+        print(f"Using models trained on data version {artifact['data_version']} at {artifact['trained_at']}")
 
         # Step 4: Predict performance
         print("\nPredicting performance...")
-        predictions = {}
-        for stat in target_stats:
-            print(f"Predicting {stat}...")
-            predictions[stat] = predict_stat(models[stat], combined_features, feature_columns_dict[stat])
+        predictions = predict_stats(artifact, combined_features)
 
 
         # Step 5: Display predictions
@@ -384,6 +407,53 @@ def main():
             print(f"{stat}: {value:.2f}")
 
 
-if __name__ == "__main__":
-    main()
+def update(positions, mode=None, seed=DEFAULT_SEED):
+    """Incrementally update the models of several positions with the games ingested since they were trained."""
+    with app.app_context(), timed_job("update_models"):
+        for result in update_positions(positions, mode=mode, seed=seed):
+            print(f"{result.position}: {result.action} in {result.seconds:.2f}s "
+                  f"({result.new_rows} new rows; {result.detail})")
+
+
+def train(positions, mode=None, workers=None, seed=DEFAULT_SEED, force=False, snapshot_dir=None):
+    """Train the models of several positions at once and print how long each step took."""
+    with app.app_context(), timed_job("train_models"):
+        start = time.perf_counter()
+        timings = train_positions(positions, mode=mode, workers=workers, seed=seed, force=force,
+                                  snapshot_dir=snapshot_dir)
+        elapsed = time.perf_counter() - start
 
+        if timings:
+            print("\nposition  step                                rows  seconds")
+            for timing in timings:
+                print(f"{timing.position:<9} {timing.step[:34]:<34} {timing.rows:>6} {timing.seconds:>8.2f}")
+        print(f"Trained {len({timing.position for timing in timings})} positions in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict a player's next game, or train the models")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("predict", help="Interactive prediction for one player (the default)")
+    train_parser = commands.add_parser("train", help="Train the models of several positions in parallel")
+    train_parser.add_argument("--positions", nargs="+", default=PROJECTABLE_POSITIONS,
+                              help=f"Positions to train (default: {' '.join(PROJECTABLE_POSITIONS)})")
+    train_parser.add_argument("--mode", choices=[MULTI_OUTPUT, PER_STAT],
+                              help="Training mode (default: MODEL_TRAINING_MODE)")
+    train_parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    train_parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed of every model")
+    train_parser.add_argument("--force", action="store_true",
+                              help="Retrain even if models exist for the current data version")
+    train_parser.add_argument("--incremental", action="store_true",
+                              help="Add trees for the games ingested since the last training instead of "
+                                   "retraining (falls back to a full retrain when accuracy would suffer)")
+    train_parser.add_argument("--snapshot", help="Train from a snapshot directory (export_snapshot.py) "
+                                                 "instead of the database")
+    args = parser.parse_args()
+
+    if args.command == "train" and args.incremental:
+        update(args.positions, mode=args.mode, seed=args.seed)
+    elif args.command == "train":
+        train(args.positions, mode=args.mode, workers=args.workers, seed=args.seed, force=args.force,
+              snapshot_dir=args.snapshot)
+    else:
+        main()
@@ -0,0 +1,44 @@
+import argparse
+from datetime import date
+
+from app import create_app
+from app.metrics import timed_job
+from app.projection_store import refresh_upcoming_projections, store_projections, upcoming_week
+
+app = create_app()
+
+
+def project_upcoming_week(update_models=True):
+    """
+    Update the models with the latest games and store projections for the upcoming week (import_data.py
+    runs this after every ingest). The projections endpoint then serves that week from the table.
+    """
+    with app.app_context(), timed_job("project_upcoming_week"):
+        start_date, end_date = upcoming_week()
+        if start_date is None:
+            print("No upcoming games to project")
+            return 0
+        stored = refresh_upcoming_projections(update_models=update_models)
+        print(f"Stored {stored} projections for games from {start_date} to {end_date}")
+        return stored
+
+
+def project_dates(start_date, end_date):
+    """Store projections for any range of dates with the current models (e.g. to fill a past week)."""
+    with app.app_context(), timed_job("project_upcoming_week"):
+        stored = store_projections(start_date, end_date)
+        print(f"Stored {stored} projections for games from {start_date} to {end_date}")
+        return stored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store projections for the upcoming week")
+    parser.add_argument("--no-update", action="store_true", help="Project with the stored models as they are")
+    parser.add_argument("--dates", nargs=2, metavar=("FIRST", "LAST"), type=date.fromisoformat,
+                        help="Project the games between two dates (YYYY-MM-DD) instead of the upcoming week")
+    args = parser.parse_args()
+
+    if args.dates:
+        project_dates(*args.dates)
+    else:
+        project_upcoming_week(update_models=not args.no_update)
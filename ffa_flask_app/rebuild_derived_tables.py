@@ -0,0 +1,34 @@
+from app import create_app, db
+from app.defense_stats import rebuild_defense_vs_position
+from app.rolling_stats import rebuild_player_rolling_stats
+from app.team_stats import rebuild_team_season_stats
+from app.data_version import bump_data_version
+from app.response_cache import invalidate_response_cache
+from app.metrics import timed_job
+
+app = create_app()
+
+
+def rebuild_derived_tables():
+    """
+    Recompute every table derived from PlayerGame history and Game scores.
+    Ingest keeps them current; run this once after creating the tables or after fixing data by hand.
+    """
+    with app.app_context(), timed_job("rebuild_derived_tables"):
+        count = rebuild_defense_vs_position()
+        print(f"DefenseVsPosition: {count} rows")
+
+        count = rebuild_player_rolling_stats()
+        print(f"PlayerRollingStat: {count} rows")
+
+        count = rebuild_team_season_stats()
+        print(f"TeamSeasonStat: {count} rows")
+
+        # Rebuilt tables may differ after manual fixes, make clients refetch
+        bump_data_version()
+        db.session.commit()
+        invalidate_response_cache('players', 'teams')
+
+
+if __name__ == "__main__":
+    rebuild_derived_tables()
@@ -0,0 +1,35 @@
+# ffa_flask_app/tests/conftest.py
+'''
+Shared fixtures: an app on a fresh in-memory SQLite database for each test, with its model
+registry and raw response cache in the test's temporary directory.
+'''
+
+import os
+
+# Set before the app's config is imported, so tests never touch the DATABASE_URL database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+
+from app import create_app, db
+from app.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The app inside an app context, with every table created."""
+    app = create_app()
+    app.config.update(TESTING=True, RAW_RESPONSE_CACHE_DIR=str(tmp_path / "raw"),
+                      MODEL_REGISTRY_DIR=str(tmp_path / "models"))
+    app.extensions["model_registry"] = ModelRegistry(app.config["MODEL_REGISTRY_DIR"])
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
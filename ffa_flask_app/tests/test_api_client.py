@@ -0,0 +1,220 @@
+# ffa_flask_app/tests/test_api_client.py
+'''
+ApiSportsClient against a local stub HTTP server: retries, backoff, the in-flight bound and the
+raw response cache. Run from the ffa_flask_app directory with `python -m pytest`.
+'''
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+
+from app.api_client import ApiError, ApiSportsClient, TokenBucket
+from app.raw_cache import RawResponseCache
+
+
+class StubApi(ThreadingHTTPServer):
+    """
+    Answers each path with a scripted list of (status, headers, body) responses (bodies are sent
+    as json, or as they are when bytes), the last one repeating, and records every request and the most requests it was handling at once.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.scripts = {}
+        self.requests = []
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def script(self, path, *responses):
+        self.scripts[path] = list(responses)
+
+    def next_response(self, path):
+        with self.lock:
+            responses = self.scripts.get(path) or [(200, {}, {"response": []})]
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        with server.lock:
+            server.requests.append((url.path, dict(parse_qsl(url.query)), self.headers.get("x-rapidapi-key")))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            status, headers, body = server.next_response(url.path)
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubApi()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+def make_client(stub, sleeps, **kwargs):
+    # A fast bucket keeps the rate limit out of the way; retry delays are recorded instead of slept
+    kwargs.setdefault("rate_limiter", TokenBucket(60000, capacity=100))
+    return ApiSportsClient("test-key", base_url=stub.url, backoff=0.5, sleep=sleeps.append, **kwargs)
+
+
+def test_success_sends_key_and_params(stub, sleeps):
+    stub.script("/games", (200, {}, {"response": [{"id": 1}]}))
+    client = make_client(stub, sleeps)
+
+    assert client.get("/games", {"season": 2022}) == {"response": [{"id": 1}]}
+    assert stub.requests == [("/games", {"season": "2022"}, "test-key")]
+    assert sleeps == []
+
+
+def test_429_waits_for_retry_after(stub, sleeps):
+    stub.script("/games", (429, {"Retry-After": "7"}, {}), (200, {}, {"response": ["ok"]}))
+    client = make_client(stub, sleeps)
+
+    assert client.get("/games")["response"] == ["ok"]
+    assert sleeps == [7.0]
+    assert len(stub.requests) == 2
+
+
+def test_5xx_backs_off_exponentially(stub, sleeps):
+    stub.script("/games", (503, {}, {}), (502, {}, {}), (200, {}, {"response": ["ok"]}))
+    client = make_client(stub, sleeps)
+
+    assert client.get("/games")["response"] == ["ok"]
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries(stub, sleeps):
+    stub.script("/games", (500, {}, {}))
+    client = make_client(stub, sleeps, max_retries=2)
+
+    with pytest.raises(ApiError) as error:
+        client.get("/games")
+    assert error.value.status_code == 500
+    assert sleeps == [0.5, 1.0]
+    assert len(stub.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub, sleeps):
+    stub.script("/games", (404, {}, {}))
+    client = make_client(stub, sleeps)
+
+    with pytest.raises(ApiError) as error:
+        client.get("/games")
+    assert error.value.status_code == 404
+    assert sleeps == []
+    assert len(stub.requests) == 1
+
+
+def test_rate_limit_error_in_body_is_retried(stub, sleeps):
+    stub.script("/games", (200, {}, {"errors": {"rateLimit": "Too many requests"}, "response": []}),
+                (200, {}, {"errors": [], "response": ["ok"]}))
+    client = make_client(stub, sleeps)
+
+    assert client.get("/games")["response"] == ["ok"]
+    assert sleeps == [0.5]
+
+
+def test_invalid_json_is_retried(stub, sleeps):
+    stub.script("/games", (200, {}, b"<html>Bad gateway</html>"), (200, {}, {"response": ["ok"]}))
+    client = make_client(stub, sleeps)
+
+    assert client.get("/games")["response"] == ["ok"]
+    assert sleeps == [0.5]
+
+
+def test_fetch_many_reports_invalid_json_as_api_error(stub, sleeps):
+    stub.script("/games", (200, {}, b'{"response": ['))
+    client = make_client(stub, sleeps, max_retries=1)
+
+    [(params, data, error)] = list(client.fetch_many("/games", [{"id": 1}]))
+    assert data is None and isinstance(error, ApiError) and error.status_code == 200
+    assert len(stub.requests) == 2
+
+
+def test_fetch_many_bounds_requests_in_flight(stub, sleeps):
+    stub.delay = 0.05
+    client = make_client(stub, sleeps, max_in_flight=3)
+
+    results = list(client.fetch_many("/games/statistics/players", [{"id": game_id} for game_id in range(12)]))
+
+    assert sorted(int(params["id"]) for params, _, _ in results) == list(range(12))
+    assert all(error is None for _, _, error in results)
+    assert 1 < stub.max_in_flight <= 3
+
+
+def test_fetch_many_reports_errors_per_request(stub, sleeps):
+    stub.script("/games", (404, {}, {}))
+    client = make_client(stub, sleeps)
+
+    [(params, data, error)] = list(client.fetch_many("/games", [{"id": 1}]))
+    assert data is None and error.status_code == 404
+
+
+def test_cached_responses_skip_the_network(stub, sleeps, tmp_path):
+    stub.script("/games", (200, {}, {"response": ["first"]}), (200, {}, {"response": ["second"]}))
+    client = make_client(stub, sleeps, cache=RawResponseCache(str(tmp_path)))
+
+    assert client.get("/games", {"id": 5})["response"] == ["first"]
+    assert client.get("/games", {"id": "5"})["response"] == ["first"]  # Same request, from the cache
+    assert len(stub.requests) == 1
+
+    assert client.get("/games", {"id": 5}, refresh=True)["response"] == ["second"]
+    assert client.get("/games", {"id": 5})["response"] == ["second"]
+    assert len(stub.requests) == 2
+
+
+def test_failed_responses_are_not_cached(stub, sleeps, tmp_path):
+    stub.script("/games", (404, {}, {}))
+    cache = RawResponseCache(str(tmp_path))
+    client = make_client(stub, sleeps, cache=cache)
+
+    with pytest.raises(ApiError):
+        client.get("/games", {"id": 5})
+    assert not cache.contains("/games", {"id": 5})
+
+
+def test_replay_never_calls_the_api(stub, sleeps, tmp_path):
+    cache = RawResponseCache(str(tmp_path))
+    cache.put("/games", {"id": 5}, {"response": ["cached"]})
+    client = make_client(stub, sleeps, cache=cache, replay=True)
+
+    assert client.get("/games", {"id": 5}, refresh=True)["response"] == ["cached"]
+    with pytest.raises(ApiError):
+        client.get("/games", {"id": 6})
+    assert stub.requests == []
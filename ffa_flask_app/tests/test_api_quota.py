@@ -0,0 +1,122 @@
+# ffa_flask_app/tests/test_api_quota.py
+'''
+QuotaTracker against the api_usage table of an in-memory SQLite app: the per-minute share,
+the daily limit, the UTC day rollover and syncing with the API's rate-limit headers. Time is a
+hand-driven clock, and sleeping just moves it forward.
+'''
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.api_client import QuotaExhausted
+from app.api_quota import QuotaTracker
+from app.models import ApiUsage
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2023, 12, 1, 23, 58, 30, tzinfo=timezone.utc)
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def tracker(app, clock, daily_limit=5, per_minute_limit=2):
+    return QuotaTracker(app, daily_limit, per_minute_limit, now=clock, sleep=clock.sleep)
+
+
+def usage(day):
+    db.session.expire_all()
+    return db.session.get(ApiUsage, day)
+
+
+def test_acquire_counts_requests(app, clock):
+    quota = tracker(app, clock)
+    quota.acquire()
+    quota.acquire()
+
+    row = usage(clock.now.date())
+    assert (row.requests, row.minute_requests) == (2, 2)
+    assert quota.remaining_today() == 3
+    assert clock.sleeps == []
+
+
+def test_acquire_waits_for_the_next_minute(app, clock):
+    quota = tracker(app, clock)
+    for _ in range(3):
+        quota.acquire()
+
+    assert clock.sleeps == [pytest.approx(30.1)]
+    row = usage(clock.now.date())
+    assert (row.requests, row.minute_requests) == (3, 1)
+    assert row.minute_started_at.replace(tzinfo=None) == datetime(2023, 12, 1, 23, 59)
+
+
+def test_acquire_raises_once_the_day_is_used_up(app, clock):
+    quota = tracker(app, clock, daily_limit=3, per_minute_limit=10)
+    for _ in range(3):
+        quota.acquire()
+
+    with pytest.raises(QuotaExhausted) as raised:
+        quota.acquire()
+    assert raised.value.reset_at == datetime(2023, 12, 2, tzinfo=timezone.utc)
+    assert clock.sleeps == []
+
+
+def test_a_new_utc_day_starts_over(app, clock):
+    quota = tracker(app, clock, daily_limit=3, per_minute_limit=10)
+    for _ in range(3):
+        quota.acquire()
+    clock.now += timedelta(minutes=2)
+
+    quota.acquire()
+
+    assert usage(clock.now.date()).requests == 1
+    assert quota.remaining_today() == 2
+
+
+def test_trackers_share_the_counts(app, clock):
+    # e.g. two processes using the same key
+    first, second = tracker(app, clock), tracker(app, clock)
+    first.acquire()
+    second.acquire()
+
+    second.acquire()
+
+    assert len(clock.sleeps) == 1
+    assert first.remaining_today() == 2
+
+
+def test_record_only_raises_the_count(app, clock):
+    quota = tracker(app, clock, daily_limit=100)
+    quota.acquire()
+
+    quota.record({"x-ratelimit-requests-limit": "100", "x-ratelimit-requests-remaining": "90"})
+    assert usage(clock.now.date()).requests == 10
+    quota.record({"x-ratelimit-requests-limit": "100", "x-ratelimit-requests-remaining": "95"})
+    row = usage(clock.now.date())
+    assert (row.requests, row.remaining, row.daily_limit) == (10, 95, 100)
+
+    quota.record({})
+    assert usage(clock.now.date()).remaining == 95
+
+
+def test_exhaust_uses_up_the_day(app, clock):
+    quota = tracker(app, clock)
+    quota.exhaust()
+
+    assert quota.remaining_today() == 0
+    with pytest.raises(QuotaExhausted):
+        quota.acquire()
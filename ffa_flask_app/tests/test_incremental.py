@@ -0,0 +1,180 @@
+# ffa_flask_app/tests/test_incremental.py
+'''
+The gates of update_position (app/incremental.py): when it adds trees to the stored forests and
+when it falls back to a full retrain. Models are small forests fitted on synthetic feature rows,
+games live in an in-memory SQLite database; the full retrain and the feature building for new
+games are replaced, so each test only exercises the decision.
+'''
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+
+from app import db
+from app import incremental
+from app.incremental import CURRENT, RETRAINED, UPDATED, update_position
+from app.model_registry import build_artifact, current_data_version, feature_set_key
+from app.modeling import MULTI_OUTPUT, get_feature_columns, get_model_registry, get_target_stats
+from app.models import Game, Player, PlayerGame, Team
+
+POSITION = "WR"
+TARGET_STATS = get_target_stats(POSITION)
+FEATURE_COLUMNS = get_feature_columns(TARGET_STATS)
+FEATURE_SET = feature_set_key(FEATURE_COLUMNS, TARGET_STATS, MULTI_OUTPUT)
+OPENER = date(2023, 9, 10)
+TREES = 10
+
+
+def feature_rows(game_ids, per_game=40, shift=0.0, seed=0):
+    """Rows whose targets follow the player's own averages, plus shift (drift)."""
+    rng = np.random.default_rng(seed)
+    n = per_game * len(game_ids)
+    rows = pd.DataFrame(rng.uniform(0, 10, size=(n, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    for stat in TARGET_STATS:
+        rows[stat] = rows[f"player_{stat}"] + rng.normal(0, 1, n) + shift
+    rows.insert(0, "player_id", np.tile(np.arange(per_game), len(game_ids)))
+    rows.insert(0, "game_id", np.repeat(game_ids, per_game))
+    return rows
+
+
+def ingest(*game_ids):
+    """Mark games processed with a stat line each, which moves current_data_version()."""
+    for game_id in game_ids:
+        db.session.get(Game, game_id).stats_processed = True
+        db.session.add(PlayerGame(player_id=1, game_id=game_id, rec_yards=50))
+    db.session.commit()
+
+
+@pytest.fixture
+def league(app):
+    """Games 1-6 a week apart from the opener, game 0 a week before it; games 1-4 ingested."""
+    db.session.add_all([Team(id=1, name="BUF", division="AFC East"), Team(id=2, name="MIA", division="AFC East"),
+                        Player(id=1, name="Stefon Diggs", position=POSITION)])
+    db.session.add_all(Game(id=game_id, home_team_id=1, away_team_id=2, date=OPENER + timedelta(weeks=game_id - 1),
+                            home_team_score=21, away_team_score=17, stats_processed=False)
+                       for game_id in range(0, 7))
+    db.session.commit()
+    ingest(1, 2, 3, 4)
+
+
+@pytest.fixture
+def trained(league):
+    """WR models and their training set, stored for games 1-4."""
+    rows = feature_rows([1, 2, 3, 4])
+    fit, test = rows.iloc[:128], rows.iloc[128:]
+    model = RandomForestRegressor(n_estimators=TREES, random_state=0).fit(fit[FEATURE_COLUMNS], fit[TARGET_STATS])
+    predictions = model.predict(test[FEATURE_COLUMNS])
+    metrics = {stat: mean_squared_error(test[stat], predictions[:, i]) for i, stat in enumerate(TARGET_STATS)}
+
+    data_version = current_data_version()
+    artifact = build_artifact(POSITION, FEATURE_COLUMNS, TARGET_STATS, data_version,
+                              {stat: model for stat in TARGET_STATS}, MULTI_OUTPUT, metrics=metrics)
+    registry = get_model_registry()
+    registry.save(POSITION, FEATURE_SET, data_version, artifact)
+    registry.save_training_set(POSITION, FEATURE_SET, data_version, {1, 2, 3, 4}, OPENER + timedelta(weeks=3), rows)
+    return artifact
+
+
+@pytest.fixture
+def retrains(app, monkeypatch):
+    """The positions a full retrain was asked for, instead of retraining."""
+    calls = []
+    monkeypatch.setattr(incremental, "train_positions", lambda positions, **kwargs: calls.append(positions))
+    app.config.update(MODEL_UPDATE_TREES=TREES, MODEL_MAX_TREES=200, MODEL_MAX_DRIFT=1.5,
+                      MODEL_UPDATE_TOLERANCE=10.0, MODEL_UPDATE_REPLAY=4, MODEL_TRAINING_MODE=MULTI_OUTPUT)
+    return calls
+
+
+@pytest.fixture
+def new_rows(monkeypatch):
+    """Set new_rows.frame to the feature rows the new games build."""
+    class NewRows:
+        frame = pd.DataFrame(columns=["game_id", "player_id", *FEATURE_COLUMNS, *TARGET_STATS])
+    monkeypatch.setattr(incremental, "build_feature_dataset", lambda position, source: NewRows.frame)
+    return NewRows
+
+
+def test_without_stored_models_it_retrains(league, retrains):
+    result = update_position(POSITION)
+
+    assert result.action == RETRAINED and result.detail == "no stored models or training set"
+    assert retrains == [[POSITION]]
+
+
+def test_unchanged_data_is_current(trained, retrains):
+    assert update_position(POSITION).action == CURRENT
+    assert retrains == []
+
+
+def test_training_set_of_other_data_retrains(trained, retrains):
+    ingest(5)
+    get_model_registry().save_training_set(POSITION, FEATURE_SET, "other", {1, 2, 3, 4}, OPENER, feature_rows([1]))
+
+    assert update_position(POSITION).detail == "the stored training set doesn't match the models"
+
+
+def test_data_change_without_new_games_retrains(trained, retrains):
+    db.session.add(PlayerGame(player_id=1, game_id=0, rec_yards=10))  # Game 0 isn't processed
+    db.session.commit()
+
+    assert update_position(POSITION).detail == "the data changed without new games"
+
+
+def test_games_older_than_the_training_set_retrain(trained, retrains, new_rows):
+    ingest(0)
+
+    assert update_position(POSITION).detail == "new games are older than the training set"
+
+
+def test_forests_past_the_tree_limit_retrain(app, trained, retrains, new_rows):
+    app.config["MODEL_MAX_TREES"] = TREES + TREES - 1
+    new_rows.frame = feature_rows([5], seed=1)
+    ingest(5)
+
+    result = update_position(POSITION)
+
+    assert (result.action, result.new_rows) == (RETRAINED, 40)
+    assert result.detail == f"forests would grow past {TREES + TREES - 1} trees"
+
+
+def test_drift_on_new_games_retrains(trained, retrains, new_rows):
+    new_rows.frame = feature_rows([5], shift=5.0, seed=1)
+    ingest(5)
+
+    result = update_position(POSITION)
+
+    assert result.action == RETRAINED and result.detail.startswith("error on the new games is")
+
+
+def test_update_worsening_held_out_error_retrains(app, trained, retrains, new_rows):
+    app.config["MODEL_UPDATE_TOLERANCE"] = -1.0  # Any held-out error is too much
+    new_rows.frame = feature_rows([5], seed=1)
+    ingest(5)
+
+    result = update_position(POSITION)
+
+    assert result.action == RETRAINED and result.detail.startswith("the update raised the held-out error")
+
+
+def test_update_adds_trees_and_extends_the_training_set(trained, retrains, new_rows):
+    new_rows.frame = feature_rows([5, 6], seed=1)
+    ingest(5, 6)
+
+    result = update_position(POSITION)
+
+    assert (result.action, result.new_rows) == (UPDATED, 80)
+    assert retrains == []
+    registry = get_model_registry()
+    artifact = registry.latest(POSITION, FEATURE_SET)
+    assert artifact["data_version"] == current_data_version() and artifact["updates"] == 1
+    assert artifact["base_data_version"] == trained["data_version"]
+    assert len(artifact["models"]["rec_yards"].estimators_) == TREES + TREES
+    training_set = registry.load_training_set(POSITION, FEATURE_SET)
+    assert training_set["game_ids"] == {1, 2, 3, 4, 5, 6}
+    assert training_set["last_date"] == OPENER + timedelta(weeks=5)
+    assert len(training_set["rows"]) == 240
+    assert update_position(POSITION).action == CURRENT
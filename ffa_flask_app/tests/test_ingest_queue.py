@@ -0,0 +1,147 @@
+# ffa_flask_app/tests/test_ingest_queue.py
+'''
+The box-score ingest queue on an in-memory SQLite database: enqueueing played games, disjoint
+claims, lease expiry and renewal, completion and the attempt limit. The queue's clock is
+replaced so leases expire without waiting.
+'''
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app import ingest_queue
+from app.ingest_queue import (
+    DONE, FAILED, LEASED, PENDING, claim_jobs, complete_job, enqueue_unprocessed_games, fail_job,
+    queue_status, release_jobs, renew_lease, requeue_failed_jobs
+)
+from app.models import Game, IngestJob, Team
+
+OPENER = date(2023, 9, 10)
+LEASE = 300
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2023, 12, 1, 12, tzinfo=timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ingest_queue, "_now", clock)
+    return clock
+
+
+@pytest.fixture
+def games(app):
+    """Games 1-4 in weeks 1-4, played and unprocessed, plus game 5 still to be played."""
+    db.session.add_all([Team(id=1, name="BUF", division="AFC East"), Team(id=2, name="MIA", division="AFC East")])
+    db.session.add_all(
+        Game(id=game_id, home_team_id=1 + game_id % 2, away_team_id=2 - game_id % 2,
+             date=OPENER + timedelta(weeks=game_id - 1), stats_processed=False,
+             home_team_score=None if game_id == 5 else 21, away_team_score=None if game_id == 5 else 17)
+        for game_id in range(1, 6)
+    )
+    db.session.commit()
+    enqueue_unprocessed_games()
+    db.session.commit()
+
+
+def claim(size=2, worker="worker-1", max_attempts=3):
+    return claim_jobs(worker, size, LEASE, max_attempts)
+
+
+def job(game_id):
+    db.session.expire_all()
+    return db.session.get(IngestJob, game_id)
+
+
+def test_enqueue_skips_scheduled_games_and_queued_ones(games):
+    assert sorted(db.session.scalars(db.select(IngestJob.game_id))) == [1, 2, 3, 4]
+    assert enqueue_unprocessed_games() == 0
+
+
+def test_enqueue_closes_jobs_of_games_processed_elsewhere(games):
+    db.session.get(Game, 2).stats_processed = True
+    db.session.commit()
+
+    enqueue_unprocessed_games()
+
+    assert job(2).status == DONE
+
+
+def test_claims_are_oldest_first_and_disjoint(games, clock):
+    first_token, first = claim(worker="worker-1")
+    second_token, second = claim(worker="worker-2")
+
+    assert [game_id for game_id, _ in first] == [1, 2]
+    assert [game_id for game_id, _ in second] == [3, 4]
+    assert first_token != second_token
+    assert claim()[1] == []
+    assert job(1).worker_id == "worker-1" and job(1).attempts == 1
+
+
+def test_expired_lease_is_claimed_again(games, clock):
+    token, _ = claim(size=4)
+    clock.advance(LEASE + 1)
+
+    new_token, claimed = claim(size=1, worker="worker-2")
+
+    assert [game_id for game_id, _ in claimed] == [1]
+    assert job(1).lease_token == new_token and job(1).attempts == 2
+    # The first worker lost game 1, so it can't complete it
+    assert not complete_job(1, token)
+    assert complete_job(2, token)
+    db.session.commit()
+    assert job(2).status == DONE
+
+
+def test_renewed_lease_does_not_expire(games, clock):
+    token, _ = claim()
+    clock.advance(LEASE - 10)
+    assert renew_lease(token, LEASE) == 2
+    clock.advance(LEASE - 10)
+
+    _, claimed = claim(size=4, worker="worker-2")
+
+    assert [game_id for game_id, _ in claimed] == [3, 4]
+    assert queue_status()['expired_leases'] == 0
+
+
+def test_lease_expiring_on_every_attempt_fails_the_job(games, clock):
+    for _ in range(2):
+        claim(size=1, max_attempts=2)
+        clock.advance(LEASE + 1)
+
+    _, claimed = claim(size=1, max_attempts=2)
+
+    assert job(1).status == FAILED and job(1).last_error == 'lease expired on every attempt'
+    assert [game_id for game_id, _ in claimed] == [2]
+    assert requeue_failed_jobs() == 1
+    assert job(1).status == PENDING and job(1).attempts == 0
+
+
+def test_fail_job_requeues_until_the_last_attempt(games, clock):
+    token, _ = claim(size=1, max_attempts=2)
+    fail_job(1, token, "timeout", max_attempts=2)
+    assert job(1).status == PENDING and job(1).last_error == "timeout"
+
+    token, _ = claim(size=1, max_attempts=2)
+    fail_job(1, token, "timeout", max_attempts=2)
+    assert job(1).status == FAILED
+
+
+def test_release_returns_jobs_without_using_an_attempt(games, clock):
+    token, _ = claim()
+
+    assert release_jobs(token) == 2
+
+    assert job(1).status == PENDING and job(1).attempts == 0
+    assert queue_status() == {PENDING: 4, LEASED: 0, DONE: 0, FAILED: 0, 'expired_leases': 0}
@@ -0,0 +1,71 @@
+# ffa_flask_app/tests/test_model_registry.py
+'''
+ModelRegistry on a temporary directory shared by two registries, as two processes would share
+it: latest() survives files deleted by the other one's save, and only one artifact per position
+and feature set stays in memory.
+'''
+
+import os
+
+import pytest
+
+from app import model_registry
+from app.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "models")
+
+
+def artifact(data_version):
+    return {"data_version": data_version, "models": {}}
+
+
+def test_latest_returns_the_newest_save(directory):
+    ModelRegistry(directory).save("WR", "abc", "1-1", artifact("1-1"))
+    ModelRegistry(directory).save("WR", "abc", "2-2", artifact("2-2"))
+
+    assert ModelRegistry(directory).latest("WR", "abc")["data_version"] == "2-2"
+    assert ModelRegistry(directory).latest("WR", "xyz") is None
+
+
+def test_latest_skips_files_deleted_after_listing(directory, monkeypatch):
+    registry = ModelRegistry(directory)
+    registry.save("WR", "abc", "2-2", artifact("2-2"))
+    vanished = registry.path("WR", "abc", "1-1")
+    list_files = model_registry.glob.glob
+    monkeypatch.setattr(model_registry.glob, "glob", lambda pattern: [vanished, *list_files(pattern)])
+
+    assert ModelRegistry(directory).latest("WR", "abc")["data_version"] == "2-2"
+
+
+def test_latest_looks_again_when_its_file_is_replaced_while_loading(directory, monkeypatch):
+    ModelRegistry(directory).save("WR", "abc", "1-1", artifact("1-1"))
+    registry, other_process = ModelRegistry(directory), ModelRegistry(directory)
+    load_file = model_registry.joblib.load
+    loads = []
+
+    def load_after_a_newer_save(path):
+        loads.append(os.path.basename(path))
+        if len(loads) == 1:
+            other_process.save("WR", "abc", "2-2", artifact("2-2"))
+        return load_file(path)
+
+    monkeypatch.setattr(model_registry.joblib, "load", load_after_a_newer_save)
+
+    assert registry.latest("WR", "abc")["data_version"] == "2-2"
+    assert loads == ["1-1.joblib", "2-2.joblib"]
+
+
+def test_only_the_last_artifact_per_feature_set_stays_loaded(directory):
+    registry, other_process = ModelRegistry(directory), ModelRegistry(directory)
+    registry.save("WR", "abc", "1-1", artifact("1-1"))
+    registry.save("QB", "abc", "1-1", artifact("1-1"))
+    other_process.save("WR", "abc", "2-2", artifact("2-2"))
+
+    assert registry.latest("WR", "abc")["data_version"] == "2-2"
+    assert registry.load("WR", "abc", "1-1") is None
+
+    assert sorted(registry._loaded) == [("QB", "abc"), ("WR", "abc")]
+    assert registry._loaded[("WR", "abc")][0] == registry.path("WR", "abc", "2-2")
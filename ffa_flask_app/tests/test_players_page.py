@@ -0,0 +1,126 @@
+# ffa_flask_app/tests/test_players_page.py
+'''
+Keyset pagination of the player listing (get_players_page and GET /api/players/) on an
+in-memory SQLite app: pages follow ids with gaps, filters and fields apply per player, and a
+player with several open spells still counts once.
+'''
+
+from datetime import date
+
+import pytest
+
+from app import db
+from app.players import get_players_page, iter_players
+from app.models import Player, PlayerTeam, Team
+
+BILLS, DOLPHINS = 1, 2
+PLAYER_IDS = [2, 3, 5, 8, 13, 21, 34]
+
+
+@pytest.fixture
+def players(app):
+    """
+    Players with gaps between their ids, QBs every third one. 5 has two open spells (Dolphins
+    the latest), 8 left the Bills, 13 never had a team; the rest are on the Bills.
+    """
+    db.session.add_all([Team(id=BILLS, name="BUF", division="AFC East"),
+                        Team(id=DOLPHINS, name="MIA", division="AFC East")])
+    db.session.add_all(Player(id=player_id, name=f"Player {player_id}", position="QB" if i % 3 == 0 else "WR")
+                       for i, player_id in enumerate(PLAYER_IDS))
+    for player_id in PLAYER_IDS:
+        if player_id == 5:
+            db.session.add_all([PlayerTeam(player_id=5, team_id=BILLS, start_date=date(2020, 3, 1)),
+                                PlayerTeam(player_id=5, team_id=DOLPHINS, start_date=date(2022, 3, 16))])
+        elif player_id == 8:
+            db.session.add(PlayerTeam(player_id=8, team_id=BILLS, start_date=date(2020, 3, 1), end_date=date(2021, 3, 1)))
+        elif player_id != 13:
+            db.session.add(PlayerTeam(player_id=player_id, team_id=BILLS, start_date=date(2020, 3, 1)))
+    db.session.commit()
+
+
+def all_pages(limit, **filters):
+    pages, after_id = [], None
+    while True:
+        page, after_id = get_players_page(after_id=after_id, limit=limit, **filters)
+        pages.append([player['id'] for player in page])
+        if after_id is None:
+            return pages
+
+
+def test_pages_follow_ids_with_gaps(players):
+    assert all_pages(3) == [[2, 3, 5], [8, 13, 21], [34]]
+
+
+def test_full_last_page_has_no_next_page(players):
+    assert all_pages(7) == [PLAYER_IDS]
+    assert all_pages(len(PLAYER_IDS) + 1) == [PLAYER_IDS]
+
+
+def test_player_with_two_open_spells_counts_once(players):
+    page, next_after_id = get_players_page(limit=3)
+
+    assert [player['id'] for player in page] == [2, 3, 5]
+    assert next_after_id == 5
+    assert page[2] == {'id': 5, 'name': "Player 5", 'position': "WR", 'team_id': DOLPHINS, 'team': "MIA"}
+
+
+def test_players_without_a_current_team_have_none(players):
+    page, _ = get_players_page(after_id=5, limit=2)
+
+    assert [(player['id'], player['team_id'], player['team']) for player in page] == [(8, None, None), (13, None, None)]
+
+
+def test_filters_apply_before_the_page(players):
+    assert all_pages(1, position="QB") == [[2], [8], [34]]
+    assert all_pages(2, team_id=BILLS) == [[2, 3], [5, 21], [34]]
+    assert all_pages(2, team_id=DOLPHINS) == [[5]]
+
+
+def test_team_filter_reports_that_team(players):
+    # 5's Bills spell was never closed, so they are listed with the Bills as well
+    page, _ = get_players_page(team_id=BILLS, limit=10)
+    assert [(player['id'], player['team']) for player in page] == [(2, "BUF"), (3, "BUF"), (5, "BUF"), (21, "BUF"), (34, "BUF")]
+
+
+def test_fields_pick_the_columns(players):
+    page, _ = get_players_page(limit=2, fields=['id', 'team'])
+    assert page == [{'id': 2, 'team': "BUF"}, {'id': 3, 'team': "BUF"}]
+
+
+def test_iter_players_matches_the_pages(players):
+    assert [player['id'] for player in iter_players(after_id=3)] == PLAYER_IDS[2:]
+
+
+def test_route_sends_the_cursor_in_headers(client, players):
+    response = client.get("/api/players/?limit=3&position=WR")
+
+    assert [player['id'] for player in response.get_json()] == [3, 5, 13]
+    assert response.headers["X-Next-After-Id"] == "13"
+    assert response.headers["Link"] == '<http://localhost/api/players/?limit=3&position=WR&after_id=13>; rel="next"'
+
+    last = client.get("/api/players/?limit=3&position=WR&after_id=13")
+    assert [player['id'] for player in last.get_json()] == [21]
+    assert "X-Next-After-Id" not in last.headers and "Link" not in last.headers
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=1001", "fields=id,salary"])
+def test_route_rejects_bad_arguments(client, players, query):
+    assert client.get(f"/api/players/?{query}").status_code == 400
+
+
+def test_json_and_json_lines_get_their_own_etags(client, players):
+    as_json = client.get("/api/players/?limit=3")
+    as_lines = client.get("/api/players/?limit=3", headers={"Accept": "application/x-ndjson"})
+
+    assert as_lines.mimetype == "application/x-ndjson" and len(as_lines.get_data().splitlines()) == len(PLAYER_IDS)
+    assert as_json.headers["ETag"] != as_lines.headers["ETag"]
+    assert "Accept" in as_json.vary and "Accept" in as_lines.vary
+
+    # A JSON ETag doesn't validate the JSON-lines body
+    revalidated = client.get("/api/players/?limit=3", headers={"Accept": "application/x-ndjson",
+                                                               "If-None-Match": as_json.headers["ETag"]})
+    assert revalidated.status_code == 200 and revalidated.get_data() == as_lines.get_data()
+
+    not_modified = client.get("/api/players/?limit=3", headers={"If-None-Match": as_json.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == as_json.headers["ETag"] and "Accept" in not_modified.vary
@@ -0,0 +1,78 @@
+# ffa_flask_app/tests/test_raw_cache.py
+'''
+RawResponseCache's layout: one directory per endpoint, so walking an endpoint's entries never
+opens another endpoint's files, and files of the older flat layout are still read and moved.
+'''
+
+import gzip
+import json
+import os
+
+import pytest
+
+from app.raw_cache import RawResponseCache
+
+BOX_SCORES = "/games/statistics/players"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RawResponseCache(str(tmp_path / "raw"))
+    cache.put("/games", {"team": 1, "season": 2023}, {"response": ["games of 1"]})
+    cache.put("/games", {"team": 2, "season": 2023}, {"response": ["games of 2"]})
+    for game_id in range(1, 4):
+        cache.put(BOX_SCORES, {"id": game_id}, {"response": [f"box score {game_id}"]})
+    return cache
+
+
+def put_legacy(cache, endpoint, params, data):
+    """A file written before responses were kept per endpoint."""
+    key = cache.key(endpoint, params)
+    path = cache.legacy_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"endpoint": endpoint, "params": cache.normalize_params(params), "data": data}, f)
+    return path
+
+
+def test_responses_are_stored_per_endpoint(cache):
+    assert sorted(os.listdir(cache.directory)) == ["games", "games-statistics-players"]
+    assert cache.get(BOX_SCORES, {"id": "2"}) == {"response": ["box score 2"]}
+    assert cache.get("/games", {"id": 2}) is None
+
+
+def test_entries_of_an_endpoint_only_open_its_files(cache, monkeypatch):
+    opened = []
+    read = RawResponseCache._read
+    monkeypatch.setattr(RawResponseCache, "_read", staticmethod(lambda path: opened.append(path) or read(path)))
+
+    entries = list(cache.entries("/games"))
+
+    assert sorted(data["response"][0] for _, _, data in entries) == ["games of 1", "games of 2"]
+    assert len(opened) == 2 and all(os.sep + "games" + os.sep in path for path in opened)
+    assert len(list(cache.entries())) == 5
+
+
+def test_legacy_files_are_read_and_moved(cache):
+    legacy = put_legacy(cache, BOX_SCORES, {"id": 9}, {"response": ["old box score"]})
+    assert cache.contains(BOX_SCORES, {"id": 9})
+    assert cache.get(BOX_SCORES, {"id": 9}) == {"response": ["old box score"]}
+
+    entries = list(cache.entries(BOX_SCORES))
+
+    assert {"id": "9"} in [params for _, params, _ in entries] and len(entries) == 4
+    assert not os.path.exists(legacy) and not os.path.exists(os.path.dirname(legacy))
+    assert os.path.exists(cache.path(BOX_SCORES, cache.key(BOX_SCORES, {"id": 9})))
+
+
+def test_stale_legacy_file_does_not_replace_a_newer_response(cache):
+    legacy = put_legacy(cache, BOX_SCORES, {"id": 1}, {"response": ["stale"]})
+
+    assert cache.migrate_legacy_entries() == 0
+
+    assert not os.path.exists(legacy)
+    assert cache.get(BOX_SCORES, {"id": 1}) == {"response": ["box score 1"]}
+
+
+def test_missing_directory_has_no_entries(tmp_path):
+    assert list(RawResponseCache(str(tmp_path / "missing")).entries()) == []
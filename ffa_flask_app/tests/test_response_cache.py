@@ -0,0 +1,124 @@
+# ffa_flask_app/tests/test_response_cache.py
+'''
+LocalResponseCache's LRU eviction, TTL expiry and tag invalidation (with a hand-driven clock),
+and cached_response on the teams endpoint of an in-memory SQLite app.
+'''
+
+from app import db
+from app.data_version import bump_data_version
+from app.models import Team
+from app.response_cache import LocalResponseCache, NullResponseCache, invalidate_response_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LocalResponseCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.info()["evictions"] == 1
+
+
+def test_overwriting_a_key_does_not_evict():
+    cache = LocalResponseCache(max_entries=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+
+    assert (cache.get("a"), cache.get("b")) == (10, 2)
+    assert cache.info()["entries"] == 2
+
+
+def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    cache = LocalResponseCache(max_entries=10, default_ttl=60, clock=clock)
+    cache.set("short", 1, ttl=5)
+    cache.set("default", 2)
+
+    clock.now += 5
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+
+    clock.now += 55
+    assert cache.get("default") is None
+    info = cache.info()
+    assert (info["entries"], info["expirations"], info["hits"], info["misses"]) == (0, 2, 1, 2)
+
+
+def test_invalidating_a_tag_drops_only_its_entries():
+    cache = LocalResponseCache(max_entries=10, default_ttl=60)
+    cache.set("players", 1, tags=("players",))
+    cache.set("both", 2, tags=("players", "teams"))
+    cache.set("teams", 3, tags=("teams",))
+
+    assert cache.invalidate_tags(["players"]) == 2
+
+    assert cache.get("players") is None and cache.get("both") is None
+    assert cache.get("teams") == 3
+    # The dropped key no longer counts against the teams tag
+    assert cache.invalidate_tags(["teams"]) == 1
+
+
+def test_evicted_entries_leave_their_tags():
+    cache = LocalResponseCache(max_entries=1, default_ttl=60)
+    cache.set("a", 1, tags=("players",))
+    cache.set("b", 2, tags=("players",))
+
+    assert cache.invalidate_tags(["players"]) == 1
+    assert cache.info()["entries"] == 0
+
+
+def test_null_cache_stores_nothing():
+    cache = NullResponseCache()
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def add_team():
+    db.session.add(Team(id=1, name="BUF", division="AFC East"))
+    bump_data_version()
+    db.session.commit()
+
+
+def test_cached_response_hits_until_invalidated(app, client):
+    add_team()
+
+    first = client.get("/api/teams/1")
+    second = client.get("/api/teams/1")
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.get_json() == first.get_json()
+
+    assert invalidate_response_cache("teams") == 1
+    assert client.get("/api/teams/1").headers["X-Cache"] == "MISS"
+
+
+def test_new_data_version_misses_the_cache(app, client):
+    add_team()
+    client.get("/api/teams/1")
+
+    db.session.get(Team, 1).name = "MIA"
+    bump_data_version()
+    db.session.commit()
+
+    response = client.get("/api/teams/1")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json()["name"] == "MIA"
+
+
+def test_errors_are_not_cached(app, client):
+    add_team()
+    client.get("/api/teams/2")
+
+    assert client.get("/api/teams/2").headers["X-Cache"] == "MISS"
@@ -0,0 +1,68 @@
+# ffa_flask_app/tests/test_rolling_stats.py
+'''
+Rolling-average snapshots refreshed game by game (record_game_rolling_stats) read only the games
+their windows need, and still match a rebuild from the whole history, late games included.
+'''
+
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app import db
+from app.features import SNAPSHOT_WINDOWS, STATS
+from app.models import Game, Player, PlayerGame, PlayerRollingStat, Team
+from app.rolling_stats import (
+    compute_rolling_snapshots, load_player_game_history, rebuild_player_rolling_stats, record_game_rolling_stats
+)
+
+OPENER = date(2023, 9, 10)
+GAMES = 12
+PLAYERS = [1, 2]
+
+
+@pytest.fixture
+def season(app):
+    """Games 1-12 a week apart; both players have a stat line in each, none refreshed yet."""
+    db.session.add_all([Team(id=1, name="BUF", division="AFC East"), Team(id=2, name="MIA", division="AFC East")])
+    db.session.add_all(Player(id=player_id, name=f"Player {player_id}", position="WR") for player_id in PLAYERS)
+    db.session.add_all(Game(id=game_id, home_team_id=1, away_team_id=2, date=OPENER + timedelta(weeks=game_id - 1),
+                            home_team_score=21, away_team_score=17, stats_processed=True)
+                       for game_id in range(1, GAMES + 1))
+    db.session.add_all(PlayerGame(player_id=player_id, game_id=game_id, targets=game_id, receptions=game_id % 4,
+                                  rec_yards=10 * game_id + player_id, rec_tds=game_id % 3 == 0)
+                       for player_id in PLAYERS for game_id in range(1, GAMES + 1))
+    db.session.commit()
+
+
+def stored_snapshots():
+    columns = ['player_id', 'game_id', *[f"avg{window}_{stat}" for window in SNAPSHOT_WINDOWS for stat in STATS]]
+    rows = db.session.query(*[getattr(PlayerRollingStat, column) for column in columns]).all()
+    return pd.DataFrame(rows, columns=columns).sort_values(['player_id', 'game_id']).reset_index(drop=True)
+
+
+def test_history_since_a_date_keeps_only_what_the_windows_need(season):
+    history = load_player_game_history([1], since=OPENER + timedelta(weeks=9), prior_games=7)
+
+    assert sorted(history['game_id']) == list(range(3, GAMES + 1))
+
+
+def test_history_since_the_first_games_has_nothing_earlier(season):
+    history = load_player_game_history(PLAYERS, since=OPENER + timedelta(weeks=1), prior_games=7)
+
+    assert sorted(history['game_id'].unique()) == list(range(1, GAMES + 1))
+    assert len(history) == GAMES * len(PLAYERS)
+
+
+def test_refreshing_game_by_game_matches_a_rebuild(season):
+    # Game 5 arrives after the games following it, shifting their windows
+    for game_id in [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12, 5]:
+        record_game_rolling_stats(game_id, PLAYERS)
+    db.session.commit()
+    refreshed = stored_snapshots()
+
+    rebuild_player_rolling_stats()
+
+    pd.testing.assert_frame_equal(refreshed, stored_snapshots())
+    expected = compute_rolling_snapshots(load_player_game_history())
+    assert len(refreshed) == len(expected) == GAMES * len(PLAYERS)
@@ -0,0 +1,155 @@
+# ffa_flask_app/tests/test_roster_index.py
+'''
+RosterIndex lookups (team_of, players_on, spells_of) on hand-written spells, and loading and
+refreshing it from the player_teams table of an in-memory SQLite app.
+'''
+
+from datetime import date
+
+import pytest
+
+from app import db
+from app.data_version import bump_data_version, bump_roster_version
+from app.models import Player, PlayerTeam, Team
+from app.roster_index import RosterIndex, get_roster_index
+from app.roster_reconciliation import apply_spell_changes
+
+BILLS, DOLPHINS, JETS = 1, 2, 3
+ALLEN, HILL, WILSON = 10, 11, 12
+
+
+def index_of(*spells):
+    index = RosterIndex()
+    index.add(spells)
+    return index
+
+
+def test_team_of_follows_a_trade():
+    index = index_of((HILL, BILLS, date(2020, 3, 1), date(2022, 3, 15)),
+                     (HILL, DOLPHINS, date(2022, 3, 16), None))
+
+    assert index.team_of(HILL, date(2020, 2, 29)) is None
+    assert index.team_of(HILL, date(2020, 3, 1)) == BILLS
+    assert index.team_of(HILL, date(2022, 3, 15)) == BILLS
+    assert index.team_of(HILL, date(2022, 3, 16)) == DOLPHINS
+    assert index.team_of(HILL, date(2030, 1, 1)) == DOLPHINS
+    assert index.team_of(ALLEN, date(2022, 3, 16)) is None
+
+
+def test_team_of_walks_back_past_ended_spells():
+    # A long spell with a short loan inside it that ended before the lookup date
+    index = index_of((HILL, BILLS, date(2020, 1, 1), None),
+                     (HILL, JETS, date(2021, 1, 1), date(2021, 2, 1)))
+
+    assert index.team_of(HILL, date(2021, 1, 15)) == JETS
+    assert index.team_of(HILL, date(2021, 6, 1)) == BILLS
+
+
+def test_latest_start_wins_when_spells_overlap():
+    # The Bills spell was never closed
+    index = index_of((HILL, BILLS, date(2020, 3, 1), None), (HILL, DOLPHINS, date(2022, 3, 16), None))
+
+    assert index.team_of(HILL, date(2023, 1, 1)) == DOLPHINS
+    assert index.teams_of([HILL, HILL, ALLEN], [date(2021, 1, 1), date(2023, 1, 1), date(2023, 1, 1)]) == \
+        [BILLS, DOLPHINS, None]
+
+
+def test_players_on_a_date():
+    index = index_of((ALLEN, BILLS, date(2018, 4, 26), None),
+                     (HILL, BILLS, date(2020, 3, 1), date(2022, 3, 15)),
+                     (HILL, DOLPHINS, date(2022, 3, 16), None),
+                     (WILSON, JETS, date(2021, 4, 29), None))
+
+    assert index.players_on(BILLS, date(2018, 1, 1)) == []
+    assert index.players_on(BILLS, date(2021, 9, 1)) == [ALLEN, HILL]
+    assert index.players_on(BILLS, date(2022, 3, 15)) == [ALLEN, HILL]
+    assert index.players_on(BILLS, date(2022, 3, 16)) == [ALLEN]
+    assert index.players_on(DOLPHINS, date(2022, 3, 16)) == [HILL]
+    assert index.players_on(99, date(2022, 3, 16)) == []
+
+
+def test_added_spells_update_built_timelines():
+    index = index_of((ALLEN, BILLS, date(2018, 4, 26), None))
+    assert index.players_on(BILLS, date(2023, 1, 1)) == [ALLEN]
+
+    assert index.add([(HILL, BILLS, date(2022, 10, 1), None), (ALLEN, BILLS, date(2018, 4, 26), None)]) == 1
+
+    assert index.players_on(BILLS, date(2023, 1, 1)) == [ALLEN, HILL]
+    assert len(index) == 2
+
+
+def test_spells_of_reports_open_spells_as_none():
+    index = index_of((HILL, DOLPHINS, date(2022, 3, 16), None), (HILL, BILLS, date(2020, 3, 1), date(2022, 3, 15)))
+
+    assert index.spells_of(HILL) == [(date(2020, 3, 1), date(2022, 3, 15), BILLS), (date(2022, 3, 16), None, DOLPHINS)]
+    assert index.spells_of(ALLEN) == []
+
+
+@pytest.fixture
+def rosters(app):
+    """Hill's Bills and Dolphins spells; Allen has none yet."""
+    db.session.add_all([Team(id=BILLS, name="BUF", division="AFC East"),
+                        Team(id=DOLPHINS, name="MIA", division="AFC East"),
+                        Player(id=ALLEN, name="Josh Allen", position="QB"),
+                        Player(id=HILL, name="Tyreek Hill", position="WR")])
+    bump_roster_version()
+    db.session.add_all([PlayerTeam(player_id=HILL, team_id=BILLS, start_date=date(2020, 3, 1), end_date=date(2022, 3, 15)),
+                        PlayerTeam(player_id=HILL, team_id=DOLPHINS, start_date=date(2022, 3, 16))])
+    db.session.commit()
+
+
+def add_spell(player_id, team_id, start_date):
+    bump_roster_version()
+    db.session.add(PlayerTeam(player_id=player_id, team_id=team_id, start_date=start_date))
+    db.session.commit()
+
+
+def test_load_reads_every_spell(rosters):
+    index = RosterIndex.load()
+
+    assert len(index) == 2
+    assert index.team_of(HILL, date(2021, 1, 1)) == BILLS
+    assert index.players_on(DOLPHINS, date(2023, 1, 1)) == [HILL]
+
+
+def test_refresh_without_spell_writes_loads_nothing(rosters):
+    index = RosterIndex.load()
+    bump_data_version()  # e.g. a game ingested without new players
+    db.session.commit()
+
+    assert index.refresh() == 0
+
+
+def test_refresh_adds_only_new_spells(rosters):
+    index = RosterIndex.load()
+    add_spell(ALLEN, BILLS, date(2018, 4, 26))
+    players = index._players
+
+    assert index.refresh() == 1
+
+    assert index._players is players  # Not rebuilt
+    assert index.players_on(BILLS, date(2021, 1, 1)) == [ALLEN, HILL]
+    assert index.refresh() == 0
+
+
+def test_refresh_reloads_after_spells_are_closed_or_deleted(rosters):
+    index = RosterIndex.load()
+    apply_spell_changes(to_insert=[(HILL, BILLS, date(2024, 3, 1), None)],
+                        to_update=[((HILL, DOLPHINS, date(2022, 3, 16)), date(2024, 2, 29))],
+                        to_delete=[(HILL, BILLS, date(2020, 3, 1))])
+    db.session.commit()
+
+    assert index.refresh() == 2
+
+    assert index.spells_of(HILL) == [(date(2022, 3, 16), date(2024, 2, 29), DOLPHINS), (date(2024, 3, 1), None, BILLS)]
+    assert index.team_of(HILL, date(2021, 1, 1)) is None
+
+
+def test_shared_index_sees_spells_written_in_the_same_app_context(rosters):
+    index = get_roster_index()
+    assert index.team_of(ALLEN, date(2021, 1, 1)) is None
+
+    add_spell(ALLEN, BILLS, date(2018, 4, 26))
+
+    assert get_roster_index() is index
+    assert index.team_of(ALLEN, date(2021, 1, 1)) == BILLS
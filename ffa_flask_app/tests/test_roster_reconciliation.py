@@ -0,0 +1,137 @@
+# ffa_flask_app/tests/test_roster_reconciliation.py
+'''
+Roster reconciliation's planning steps (resolve_game_teams, plan_spells, diff_spells) on
+hand-written games and an in-memory roster index, no database needed.
+'''
+
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app.roster_index import RosterIndex
+from app.roster_reconciliation import diff_spells, plan_spells, resolve_game_teams
+
+PLAYER = 7
+BILLS, DOLPHINS, JETS, PATRIOTS = 1, 2, 3, 4
+OPENER = date(2023, 9, 10)
+
+
+def week(number):
+    return OPENER + timedelta(weeks=number - 1)
+
+
+def roster(*spells):
+    """An index holding PLAYER's (start, end, team) spells."""
+    index = RosterIndex()
+    index.add([(PLAYER, team_id, start, end) for start, end, team_id in spells])
+    return index
+
+
+def games(*rows):
+    """load_affected_games rows from (week, home, away, box-score team or None)."""
+    return pd.DataFrame(
+        [(PLAYER, game_id, week(number), home, away, box_team, True)
+         for game_id, (number, home, away, box_team) in enumerate(rows, start=1)],
+        columns=['player_id', 'game_id', 'date', 'home_team_id', 'away_team_id', 'box_team_id', 'uncovered'],
+    )
+
+
+def reconcile(index, games_df):
+    resolved, ambiguous = resolve_game_teams(games_df, index)
+    plans = plan_spells(resolved, index)
+    return plans.get(PLAYER), diff_spells(plans, index), ambiguous
+
+
+def test_mid_season_trade_closes_the_old_spell_and_opens_the_new_one():
+    index = roster((date(2023, 8, 1), None, BILLS))
+    games_df = games((1, BILLS, JETS, BILLS), (2, PATRIOTS, BILLS, BILLS),
+                     (3, DOLPHINS, JETS, DOLPHINS), (4, PATRIOTS, DOLPHINS, DOLPHINS))
+
+    plan, (to_insert, to_update, to_delete), ambiguous = reconcile(index, games_df)
+
+    assert plan == [(date(2023, 8, 1), week(3) - timedelta(days=1), BILLS), (week(3), None, DOLPHINS)]
+    assert to_insert == [(PLAYER, DOLPHINS, week(3), None)]
+    assert to_update == [((PLAYER, BILLS, date(2023, 8, 1)), week(3) - timedelta(days=1))]
+    assert to_delete == [] and ambiguous.empty
+
+
+def test_existing_spell_of_the_new_team_keeps_its_start():
+    signed = week(2) + timedelta(days=3)
+    index = roster((date(2023, 8, 1), None, BILLS), (signed, None, DOLPHINS))
+    games_df = games((1, BILLS, JETS, BILLS), (2, PATRIOTS, BILLS, BILLS), (3, DOLPHINS, JETS, DOLPHINS))
+
+    plan, (to_insert, to_update, to_delete), _ = reconcile(index, games_df)
+
+    assert plan == [(date(2023, 8, 1), signed - timedelta(days=1), BILLS), (signed, None, DOLPHINS)]
+    assert to_insert == [] and to_delete == []
+    assert to_update == [((PLAYER, BILLS, date(2023, 8, 1)), signed - timedelta(days=1))]
+
+
+def test_return_to_an_earlier_team_opens_a_second_spell():
+    traded = week(3)
+    index = roster((date(2023, 8, 1), traded - timedelta(days=1), BILLS), (traded, None, DOLPHINS))
+    games_df = games((1, BILLS, JETS, BILLS), (3, DOLPHINS, JETS, DOLPHINS), (5, BILLS, PATRIOTS, BILLS))
+
+    plan, (to_insert, to_update, to_delete), _ = reconcile(index, games_df)
+
+    assert plan == [(date(2023, 8, 1), traded - timedelta(days=1), BILLS),
+                    (traded, week(5) - timedelta(days=1), DOLPHINS),
+                    (week(5), None, BILLS)]
+    assert to_insert == [(PLAYER, BILLS, week(5), None)]
+    assert to_update == [((PLAYER, DOLPHINS, traded), week(5) - timedelta(days=1))]
+    assert to_delete == []
+
+
+def test_future_signing_is_kept_and_ends_the_last_spell():
+    signing = date(2024, 3, 15)
+    index = roster((date(2023, 8, 1), None, BILLS), (signing, None, JETS))
+    games_df = games((1, BILLS, JETS, BILLS), (3, DOLPHINS, PATRIOTS, DOLPHINS))
+
+    plan, (to_insert, to_update, to_delete), _ = reconcile(index, games_df)
+
+    assert (signing, None, JETS) in plan
+    assert (week(3), signing - timedelta(days=1), DOLPHINS) in plan
+    assert to_insert == [(PLAYER, DOLPHINS, week(3), signing - timedelta(days=1))]
+    assert to_delete == []
+
+
+def test_spell_without_games_between_two_runs_is_kept():
+    index = roster((date(2023, 8, 1), week(1), BILLS),
+                   (week(1) + timedelta(days=1), week(2), JETS),
+                   (week(2) + timedelta(days=1), None, DOLPHINS))
+    games_df = games((1, BILLS, PATRIOTS, BILLS), (3, DOLPHINS, PATRIOTS, DOLPHINS))
+
+    _, (to_insert, to_update, to_delete), _ = reconcile(index, games_df)
+
+    assert (to_insert, to_update, to_delete) == ([], [], [])
+
+
+def test_box_score_team_that_did_not_play_is_ambiguous():
+    index = roster()
+    games_df = games((1, BILLS, JETS, PATRIOTS))
+
+    plan, (to_insert, _, _), ambiguous = reconcile(index, games_df)
+
+    assert plan is None and to_insert == []
+    assert ambiguous['reason'].tolist() == ['box-score team did not play in the game']
+
+
+def test_box_score_team_that_did_not_play_falls_back_to_the_known_team():
+    index = roster()
+    games_df = games((1, BILLS, JETS, BILLS), (2, PATRIOTS, BILLS, DOLPHINS), (3, BILLS, DOLPHINS, BILLS))
+
+    plan, _, ambiguous = reconcile(index, games_df)
+
+    assert plan == [(week(1), None, BILLS)]
+    assert ambiguous.empty
+
+
+def test_game_between_the_two_teams_it_moved_between_is_ambiguous():
+    index = roster()
+    games_df = games((1, BILLS, JETS, BILLS), (2, BILLS, DOLPHINS, None), (3, DOLPHINS, PATRIOTS, DOLPHINS))
+
+    plan, _, ambiguous = reconcile(index, games_df)
+
+    assert ambiguous['game_id'].tolist() == [2]
+    assert ambiguous['reason'].tolist() == ['played between the two teams it moved between']
+    assert plan == [(week(1), week(3) - timedelta(days=1), BILLS), (week(3), None, DOLPHINS)]
@@ -0,0 +1,84 @@
+# ffa_flask_app/tests/test_scoring.py
+'''
+ScoringRules on hand-written stat lines (presets, custom weights, threshold bonuses) and
+parse_scoring's reading of request arguments and its errors.
+'''
+
+import pandas as pd
+import pytest
+
+from app.scoring import HALF_PPR, PPR, STANDARD, ScoringRules, parse_scoring
+
+LINES = pd.DataFrame([
+    # A quarterback's day, a receiver's day, and a row with missing stats
+    {'pass_yards': 300, 'pass_tds': 2, 'pass_int': 1, 'rush_yards': 20},
+    {'receptions': 8, 'rec_yards': 120, 'rec_tds': 1},
+    {'rec_yards': None},
+])
+
+
+def test_standard_half_ppr_and_ppr():
+    assert STANDARD.score(LINES).round(2).tolist() == [20.0, 18.0, 0.0]
+    assert HALF_PPR.score(LINES).round(2).tolist() == [20.0, 22.0, 0.0]
+    assert PPR.score(LINES).round(2).tolist() == [20.0, 26.0, 0.0]
+
+
+def test_score_keeps_the_frame_index():
+    lines = LINES.set_axis([10, 20, 30])
+    assert STANDARD.score(lines).index.tolist() == [10, 20, 30]
+
+
+def test_bonus_applies_from_its_threshold():
+    rules = STANDARD.customized(bonuses=[('rec_yards', 100, 3), ('pass_yards', 300, 2)])
+
+    assert rules.score(LINES).round(2).tolist() == [22.0, 21.0, 0.0]
+    assert rules.score(pd.DataFrame([{'rec_yards': 99}])).round(2).tolist() == [9.9]
+
+
+def test_customized_keeps_the_preset_unchanged():
+    rules = PPR.customized(weights={'pass_tds': 6}, bonuses=[('rush_yards', 100, 3)])
+
+    assert rules.name == "custom"
+    assert rules.weights['pass_tds'] == 6 and rules.weights['receptions'] == 1
+    assert PPR.weights['pass_tds'] == 4 and PPR.bonuses == ()
+    assert rules.describe()['bonuses'] == [{'stat': 'rush_yards', 'threshold': 100, 'points': 3}]
+
+
+def test_bonus_only_stat_is_scored():
+    rules = ScoringRules("bonus only", {'pass_tds': 4}, bonuses=[('rush_yards', 100, 3)])
+
+    assert sorted(rules.stats) == ['pass_tds', 'rush_yards']
+    assert rules.score(pd.DataFrame([{'rush_yards': 120, 'pass_tds': 1}])).tolist() == [7.0]
+
+
+def test_unknown_stats_are_rejected():
+    with pytest.raises(ValueError, match="Unknown stats in scoring rules: fumbles, sacks"):
+        ScoringRules("bad", {'sacks': 1}, bonuses=[('fumbles', 1, -2)])
+
+
+def test_parse_scoring_defaults_to_the_configured_preset(app):
+    assert parse_scoring() is STANDARD
+    app.config["FANTASY_SCORING"] = "ppr"
+    assert parse_scoring() is PPR
+    assert parse_scoring("Half_PPR") is HALF_PPR
+
+
+def test_parse_scoring_reads_weights_and_bonuses(app):
+    rules = parse_scoring("ppr", weights="pass_tds:6, receptions:0.5", bonuses="rec_yards>=100:3,rush_yards>=100:2.5")
+
+    assert rules.weights['pass_tds'] == 6 and rules.weights['receptions'] == 0.5
+    assert isinstance(rules.weights['pass_tds'], int)
+    assert rules.bonuses == (('rec_yards', 100, 3), ('rush_yards', 100, 2.5))
+
+
+@pytest.mark.parametrize("arguments, message", [
+    ({'name': 'superflex'}, "Unknown scoring: superflex"),
+    ({'weights': 'receptions'}, "weights must look like"),
+    ({'weights': 'receptions:one'}, "weights must look like"),
+    ({'bonuses': 'rec_yards:100:3'}, "weights must look like"),
+    ({'bonuses': 'rec_yards>100:3'}, "weights must look like"),
+    ({'weights': 'sacks:1'}, "Unknown stats in scoring rules: sacks"),
+])
+def test_parse_scoring_errors(app, arguments, message):
+    with pytest.raises(ValueError, match=message):
+        parse_scoring(**arguments)
@@ -0,0 +1,121 @@
+# ffa_flask_app/tests/test_snapshot.py
+'''
+export_snapshot and Snapshot round-trip: every exported column reads back like the database
+gives it (nulls, dates, times, floats, narrow integers), and SnapshotSource builds the same
+position frame and roster as the database does.
+'''
+
+import json
+import os
+from datetime import date, time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import db
+from app.features import load_position_games
+from app.model_registry import current_data_version
+from app.models import Game, Player, PlayerGame, PlayerTeam, Team
+from app.snapshot import SNAPSHOT_MODELS, Snapshot, SnapshotSource, export_snapshot
+
+
+@pytest.fixture
+def league(app):
+    db.session.add_all([Team(id=1, name="BUF", division="AFC East"), Team(id=2, name="MIA", division="AFC East"),
+                        Player(id=1, name="Josh Allen", position="QB"), Player(id=2, name="Tyreek Hill", position="WR"),
+                        Player(id=70000, name="Practice Squad", position="WR")])
+    db.session.add_all([
+        PlayerTeam(player_id=1, team_id=1, start_date=date(2018, 4, 26)),
+        PlayerTeam(player_id=2, team_id=1, start_date=date(2020, 3, 1), end_date=date(2022, 3, 15)),
+        PlayerTeam(player_id=2, team_id=2, start_date=date(2022, 3, 16)),
+        Game(id=1, home_team_id=1, away_team_id=2, date=date(2021, 9, 12), game_time=time(13, 0),
+             spread=-3.5, over_under=47.5, home_team_score=35, away_team_score=0, stats_processed=True),
+        Game(id=2, home_team_id=2, away_team_id=1, date=date(2023, 9, 10), game_time=time(16, 25, 30),
+             home_team_score=20, away_team_score=31, stats_processed=True),
+        # Scheduled: no scores, time, spread or stats yet
+        Game(id=3, home_team_id=1, away_team_id=2, date=date(2023, 12, 31), stats_processed=False),
+    ])
+    db.session.add_all([
+        PlayerGame(player_id=1, game_id=1, team_id=1, pass_attempts=38, pass_completions=27, pass_yards=315,
+                   pass_tds=3, rush_attempts=6, rush_yards=42),
+        PlayerGame(player_id=2, game_id=1, team_id=1, targets=9, receptions=7, rec_yards=111, rec_tds=1),
+        PlayerGame(player_id=1, game_id=2, team_id=1, pass_attempts=33, pass_yards=-4, pass_int=2),
+        PlayerGame(player_id=2, game_id=2, targets=11, receptions=11, rec_yards=215, rec_tds=2),  # No box-score team
+        PlayerGame(player_id=70000, game_id=2, team_id=2, rec_yards=12),
+    ])
+    db.session.commit()
+
+
+def database_rows(model):
+    columns = list(model.__table__.columns)
+    return [tuple(row) for row in db.session.execute(db.select(*columns).order_by(model.id)).all()]
+
+
+def snapshot_rows(snapshot, model):
+    frame = snapshot.table(model.__tablename__)
+    rows = []
+    for record in frame.itertuples(index=False, name=None):
+        rows.append(tuple(None if isinstance(value, float) and np.isnan(value) else value for value in record))
+    return rows
+
+
+def test_every_table_reads_back_like_the_database(league, tmp_path):
+    manifest = export_snapshot(tmp_path / "snapshot")
+    snapshot = Snapshot(tmp_path / "snapshot")
+
+    assert snapshot.data_version == current_data_version() == manifest["data_version"]
+    for model in SNAPSHOT_MODELS:
+        assert manifest["tables"][model.__tablename__]["rows"] == db.session.query(model).count()
+        assert snapshot_rows(snapshot, model) == database_rows(model), model.__tablename__
+
+
+def test_columns_are_stored_narrow_with_null_markers(league, tmp_path):
+    export_snapshot(tmp_path / "snapshot")
+    snapshot = Snapshot(tmp_path / "snapshot")
+    columns = snapshot.manifest["tables"]
+
+    assert snapshot.array("player_games", "rec_tds").dtype == np.int8
+    assert snapshot.array("players", "id").dtype == np.int32  # 70000 doesn't fit an int16
+    assert snapshot.array("games", "spread").dtype == np.float32
+    assert columns["games"]["columns"]["home_team_score"]["null"] == np.iinfo(np.int8).min
+    assert columns["player_teams"]["columns"]["end_date"]["kind"] == "date"
+    assert snapshot.column("player_teams", "end_date").tolist() == [None, date(2022, 3, 15), None]
+    assert np.isnan(snapshot.column("player_games", "team_id")[3])
+
+
+def test_snapshot_source_matches_the_database(league, tmp_path):
+    export_snapshot(tmp_path / "snapshot")
+    source = SnapshotSource(str(tmp_path / "snapshot"))
+
+    for position in ("QB", "WR"):
+        from_snapshot = source.position_games(position)
+        from_database = load_position_games(position)
+        pd.testing.assert_frame_equal(from_snapshot, from_database[from_snapshot.columns], check_dtype=False)
+
+    roster = source.roster_index()
+    assert roster.team_of(2, date(2021, 9, 12)) == 1 and roster.team_of(2, date(2023, 9, 10)) == 2
+
+
+def test_export_replaces_an_older_snapshot(league, tmp_path):
+    directory = tmp_path / "snapshots" / "latest"
+    export_snapshot(directory)
+    db.session.add(PlayerGame(player_id=2, game_id=3, rec_yards=5))
+    db.session.commit()
+
+    manifest = export_snapshot(directory)
+
+    assert Snapshot(directory).table("player_games")["id"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert os.listdir(tmp_path / "snapshots") == ["latest"]  # No temporary directories left behind
+    with open(directory / "manifest.json") as f:
+        assert json.load(f)["data_version"] == manifest["data_version"] == "6-6"
+
+
+def test_unknown_format_is_rejected(league, tmp_path):
+    export_snapshot(tmp_path / "snapshot")
+    manifest_path = tmp_path / "snapshot" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.write_text(json.dumps({**manifest, "format": 99}))
+
+    with pytest.raises(ValueError, match="Unsupported snapshot format 99"):
+        Snapshot(tmp_path / "snapshot")